@@ -0,0 +1,13 @@
+"""Synthetic data generator and stage benchmark suite."""
+
+from .synthetic import (
+    generate_transactions,
+    iter_transaction_chunks,
+    write_synthetic_dataset,
+)
+
+__all__ = [
+    "generate_transactions",
+    "iter_transaction_chunks",
+    "write_synthetic_dataset",
+]
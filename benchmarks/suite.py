@@ -0,0 +1,276 @@
+"""Benchmark suite timing and memory-profiling each pipeline stage on synthetic data."""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from eda_weekday_weekend.data_loader import load_and_preprocess
+from kmeans.kmeans import create_rfm_features
+from promotional_analysis.coffee_prediction import (
+    predict_most_sold_coffee_month,
+    predict_most_sold_coffee_week,
+)
+from promotional_analysis.config_loader import load_config
+from promotional_analysis.data_loader import (
+    normalize_coffee_names,
+    prepare_daily_coffee_sales,
+    prepare_daily_sales,
+)
+from promotional_analysis.promotion_recommendation import (
+    analyze_promotion_scenarios,
+    get_default_profit_margins,
+    recommend_daily_promotions,
+)
+from promotional_analysis.sales_prediction import predict_next_day_sales
+from transaction_store import parse_transaction_times, read_transactions
+from user_analysis.features import engineer_features
+from user_analysis.models import train_and_evaluate
+
+from .synthetic import write_synthetic_dataset
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = [10**4, 10**5, 10**6]
+
+
+@dataclass
+class Stage:
+    """A benchmarked pipeline stage."""
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    max_rows: int | None = None
+
+
+def _scenario_margins(margins: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    """Build the base/lowered/raised scenarios used by promotional_analsysis_main."""
+    return {
+        "base": margins,
+        "lowered": {k: v * 0.8 for k, v in margins.items()},
+        "raised": {k: v * 1.2 for k, v in margins.items()},
+    }
+
+
+def _engineer(ctx: Dict[str, Any]) -> Any:
+    """Run feature engineering and keep X/y for the training stage."""
+    _, ctx["X"], ctx["y"], _, _ = engineer_features(ctx["transactions"])
+    return ctx["X"]
+
+
+STAGES: List[Stage] = [
+    Stage("load_and_preprocess", lambda ctx: load_and_preprocess(ctx["path"])),
+    Stage("engineer_features", _engineer, max_rows=10**7),
+    Stage("train_and_evaluate", lambda ctx: train_and_evaluate(ctx["X"], ctx["y"]), max_rows=10**6),
+    Stage("create_rfm_features", lambda ctx: create_rfm_features(ctx["transactions"])),
+    Stage("recommend_daily_promotions", lambda ctx: recommend_daily_promotions(
+        ctx["daily_coffee_sales"], ctx["profit_margins"])),
+    Stage("analyze_promotion_scenarios", lambda ctx: analyze_promotion_scenarios(
+        ctx["promo_df"], _scenario_margins(ctx["profit_margins"]), [3, 7, 14, 30])),
+    Stage("predict_next_day_sales", lambda ctx: predict_next_day_sales(ctx["daily_sales"])),
+    Stage("predict_most_sold_coffee_month", lambda ctx: predict_most_sold_coffee_month(ctx["promo_df"])),
+    Stage("predict_most_sold_coffee_week", lambda ctx: predict_most_sold_coffee_week(ctx["promo_df"])),
+]
+
+
+def _prepare_context(path: Path) -> Dict[str, Any]:
+    """Load and aggregate the inputs shared by the stages (not timed)."""
+    # One read and parse; the promotional frame only adds the merged coffee names
+    transactions = parse_transaction_times(read_transactions(path))
+    promo_df = normalize_coffee_names(transactions)
+    daily_coffee_sales = prepare_daily_coffee_sales(promo_df)
+    return {
+        "path": path,
+        "transactions": transactions,
+        "promo_df": promo_df,
+        "daily_sales": prepare_daily_sales(promo_df),
+        "daily_coffee_sales": daily_coffee_sales,
+        "profit_margins": get_default_profit_margins(
+            daily_coffee_sales.columns.tolist(), config=load_config()),
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int = 1, profile_memory: bool = True) -> Dict[str, Any]:
+    """
+    Time a callable and optionally measure its peak Python/NumPy heap allocation.
+
+    Memory is measured in a separate run under tracemalloc so tracing overhead
+    does not distort the timings.
+
+    Args:
+        fn: Zero-argument callable to measure
+        repeat: Number of timed runs; the fastest is reported
+        profile_memory: Whether to run once more under tracemalloc
+
+    Returns:
+        Dictionary with 'seconds', 'seconds_all' and 'peak_mib' (None if not profiled)
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    peak_mib = None
+    if profile_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mib = peak / 2**20
+    return {"seconds": min(timings), "seconds_all": timings, "peak_mib": peak_mib}
+
+
+def run_benchmarks(
+    sizes: List[int] | None = None,
+    stages: List[str] | None = None,
+    repeat: int = 1,
+    profile_memory: bool = True,
+    seed: int = 0,
+    output_dir: str | Path | None = RESULTS_DIR,
+) -> Dict[str, Any]:
+    """
+    Benchmark every stage on synthetic datasets of increasing size.
+
+    Args:
+        sizes: Row counts to generate. Defaults to DEFAULT_SIZES
+        stages: Optional stage names to run. If None, runs all STAGES
+        repeat: Number of timed runs per stage
+        profile_memory: Whether to record peak allocations
+        seed: Random seed for the synthetic generator
+        output_dir: Directory for the JSON results file. If None, nothing is written
+
+    Returns:
+        Dictionary with 'meta' and a 'results' list (one entry per stage and size)
+    """
+    sizes = sizes or DEFAULT_SIZES
+    selected = [stage for stage in STAGES if stages is None or stage.name in stages]
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            path = write_synthetic_dataset(Path(tmp) / f"synthetic_{n_rows}.csv", n_rows, seed=seed)
+            ctx = _prepare_context(path)
+            for stage in selected:
+                entry = {"stage": stage.name, "rows": n_rows}
+                if stage.max_rows is not None and n_rows > stage.max_rows:
+                    entry["status"] = "skipped"
+                else:
+                    try:
+                        entry.update(measure(lambda: stage.run(ctx), repeat, profile_memory))
+                        entry["status"] = "ok"
+                    except Exception as exc:
+                        entry.update(status="failed", error=repr(exc))
+                results.append(entry)
+                print(_format_entry(entry))
+            del ctx
+            gc.collect()
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        out_path = output_dir / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        with open(out_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {out_path}")
+    return report
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    tolerance: float = 1.25) -> List[Dict[str, Any]]:
+    """
+    Find stages that got slower or hungrier than a baseline run.
+
+    Args:
+        baseline: Report dictionary from an earlier run
+        current: Report dictionary from the current run
+        tolerance: Ratio above which a metric counts as a regression
+
+    Returns:
+        List of regressions with stage, rows, metric, baseline, current and ratio
+    """
+    reference = {(r["stage"], r["rows"]): r for r in baseline["results"] if r.get("status") == "ok"}
+    regressions = []
+    for entry in current["results"]:
+        base = reference.get((entry["stage"], entry["rows"]))
+        if base is None or entry.get("status") != "ok":
+            continue
+        for metric in ("seconds", "peak_mib"):
+            if base.get(metric) and entry.get(metric) is not None:
+                ratio = entry[metric] / base[metric]
+                if ratio > tolerance:
+                    regressions.append({
+                        "stage": entry["stage"], "rows": entry["rows"], "metric": metric,
+                        "baseline": base[metric], "current": entry[metric], "ratio": ratio,
+                    })
+    return regressions
+
+
+def _format_entry(entry: Dict[str, Any]) -> str:
+    """Format one result line for console output."""
+    label = f"{entry['stage']:<32} {entry['rows']:>12,}"
+    if entry["status"] != "ok":
+        return f"{label}  {entry['status']}"
+    memory = "" if entry["peak_mib"] is None else f"  peak {entry['peak_mib']:9.1f} MiB"
+    return f"{label}  {entry['seconds']:9.3f} s{memory}"
+
+
+def main(argv: List[str] | None = None) -> None:
+    """
+    Command line entry point.
+
+    Args:
+        argv: Optional argument list. If None, uses sys.argv
+
+    Returns:
+        None. Prints results and any regressions against --baseline
+    """
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Row counts to benchmark (e.g. 10000 100000 1000000)")
+    parser.add_argument("--stages", nargs="+", default=None, help="Subset of stage names")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=str(RESULTS_DIR))
+    parser.add_argument("--baseline", default=None, help="Earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.stages, args.repeat, not args.no_memory,
+                            args.seed, args.output_dir)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_results(json.load(f), report, args.tolerance)
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+        for item in regressions:
+            print(f"  {item['stage']} @ {item['rows']:,} rows: {item['metric']} "
+                  f"{item['baseline']:.3f} -> {item['current']:.3f} ({item['ratio']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
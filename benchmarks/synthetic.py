@@ -0,0 +1,194 @@
+"""Synthetic transaction generator reproducing the index_1.csv schema at any scale."""
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from transaction_store.config import PARTITION_FILE_NAME
+
+# Share of transactions per opening hour, measured on upload/index_1.csv
+HOUR_WEIGHTS = {
+    6: 0.1, 7: 2.5, 8: 6.5, 9: 6.8, 10: 9.6, 11: 8.1, 12: 6.8, 13: 6.2, 14: 6.3,
+    15: 6.7, 16: 7.8, 17: 6.7, 18: 6.1, 19: 6.5, 20: 4.7, 21: 5.4, 22: 3.2,
+}
+# Share of transactions per weekday (0=Monday)
+WEEKDAY_WEIGHTS = [15.4, 16.1, 14.0, 14.3, 15.0, 13.3, 11.9]
+# Menu with list price and share of transactions
+COFFEE_MENU = {
+    "Americano": (30.0, 578),
+    "Americano with Milk": (35.0, 824),
+    "Cappuccino": (40.0, 501),
+    "Cocoa": (40.0, 243),
+    "Cortado": (30.0, 292),
+    "Espresso": (25.0, 134),
+    "Hot Chocolate": (40.0, 282),
+    "Latte": (40.0, 782),
+}
+# Card prices are the list price times one of these factors, changing monthly
+CARD_PRICE_FACTORS = [1.0, 0.9675, 0.931, 0.8205]
+CASH_SHARE = 0.0245
+# Zipf exponent of card popularity; 0.8 reproduces a few regulars and many one-off cards
+CARD_ZIPF_EXPONENT = 0.8
+CSV_COLUMNS = ["date", "datetime", "cash_type", "card", "money", "coffee_name"]
+
+
+def _card_labels(card_ids: np.ndarray) -> np.ndarray:
+    """Format integer card ids as ANON-XXXX-XXXX-XXXX strings."""
+    ids = card_ids.astype(np.int64) + 1
+    parts = [(ids // 10**8) % 10**4, (ids // 10**4) % 10**4, ids % 10**4]
+    padded = [np.char.zfill(part.astype(str), 4) for part in parts]
+    return np.char.add(np.char.add(np.char.add("ANON-", padded[0]), "-"),
+                       np.char.add(np.char.add(padded[1], "-"), padded[2]))
+
+
+def _day_counts(n_rows: int, dates: pd.DatetimeIndex, rng: np.random.Generator) -> np.ndarray:
+    """Split n_rows across days according to the weekday profile."""
+    weights = np.asarray(WEEKDAY_WEIGHTS, dtype=float)[dates.dayofweek]
+    return rng.multinomial(n_rows, weights / weights.sum())
+
+
+def iter_transaction_chunks(
+    n_rows: int,
+    chunk_rows: int = 1_000_000,
+    n_cards: int | None = None,
+    start: str = "2024-03-01",
+    days: int = 365,
+    stores: List[str] | None = None,
+    seed: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """
+    Generate synthetic transactions as chronologically ordered chunks.
+
+    Each chunk covers whole days, so chunks can be written one after another
+    without holding the full dataset in memory.
+
+    Args:
+        n_rows: Total number of transactions to generate
+        chunk_rows: Approximate number of rows per chunk
+        n_cards: Number of distinct cards. If None, uses n_rows // 3
+        start: First date of the generated period
+        days: Number of days covered
+        stores: Optional store ids; if given, a 'store' column is added
+        seed: Random seed
+
+    Yields:
+        DataFrames with the raw csv columns (strings for date/datetime)
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D")
+    per_day = _day_counts(n_rows, dates, rng)
+
+    n_cards = max(1, n_cards or n_rows // 3)
+    card_weights = 1.0 / np.arange(1, n_cards + 1) ** CARD_ZIPF_EXPONENT
+    card_cdf = np.cumsum(card_weights / card_weights.sum())
+    # Shuffle which id is popular so ids are not ordered by frequency
+    card_order = rng.permutation(n_cards)
+
+    hours = np.fromiter(HOUR_WEIGHTS.keys(), dtype=np.int64)
+    hour_p = np.fromiter(HOUR_WEIGHTS.values(), dtype=float)
+    hour_p /= hour_p.sum()
+    coffee_names = np.array(list(COFFEE_MENU))
+    list_prices = np.array([price for price, _ in COFFEE_MENU.values()])
+    coffee_p = np.array([share for _, share in COFFEE_MENU.values()], dtype=float)
+    coffee_p /= coffee_p.sum()
+    month_factors = rng.choice(CARD_PRICE_FACTORS, size=days // 28 + 2)
+
+    day_start = 0
+    while day_start < days:
+        day_end = day_start
+        rows = 0
+        while day_end < days and (rows == 0 or rows + per_day[day_end] <= chunk_rows):
+            rows += per_day[day_end]
+            day_end += 1
+
+        day_index = np.repeat(np.arange(day_start, day_end), per_day[day_start:day_end])
+        n = len(day_index)
+        offsets_ms = (
+            rng.choice(hours, size=n, p=hour_p) * 3_600_000
+            + rng.integers(0, 3_600_000, size=n)
+        )
+        stamps = dates.values[day_index].astype("datetime64[ms]") + offsets_ms.astype("timedelta64[ms]")
+        order = np.argsort(stamps, kind="stable")
+        stamps, day_index = stamps[order], day_index[order]
+
+        coffee = rng.choice(len(coffee_names), size=n, p=coffee_p)
+        is_cash = rng.random(n) < CASH_SHARE
+        factor = np.where(is_cash, 1.0, month_factors[day_index // 28])
+        money = np.round(list_prices[coffee] * factor, 2)
+        cards = card_order[np.minimum(np.searchsorted(card_cdf, rng.random(n)), n_cards - 1)]
+        card_labels = np.where(is_cash, None, _card_labels(cards)).astype(object)
+
+        datetime_text = np.char.replace(np.datetime_as_string(stamps, unit="ms"), "T", " ")
+        chunk = pd.DataFrame({
+            "date": np.datetime_as_string(stamps, unit="D"),
+            "datetime": datetime_text,
+            "cash_type": np.where(is_cash, "cash", "card"),
+            "card": card_labels,
+            "money": money,
+            "coffee_name": coffee_names[coffee],
+        })
+        if stores:
+            chunk["store"] = np.asarray(stores)[rng.integers(0, len(stores), size=n)]
+        yield chunk
+        day_start = day_end
+
+
+def generate_transactions(n_rows: int, **kwargs) -> pd.DataFrame:
+    """
+    Generate a synthetic transaction DataFrame in memory.
+
+    Args:
+        n_rows: Number of transactions
+        **kwargs: Options forwarded to iter_transaction_chunks
+
+    Returns:
+        DataFrame with the index_1.csv columns (plus 'store' if stores were given)
+    """
+    kwargs.setdefault("chunk_rows", max(n_rows, 1))
+    return pd.concat(iter_transaction_chunks(n_rows, **kwargs), ignore_index=True)
+
+
+def write_synthetic_dataset(path: str | Path, n_rows: int, **kwargs) -> Path:
+    """
+    Stream synthetic transactions to a csv file or a partitioned dataset directory.
+
+    When stores are given the output is written in the store=/year=/month=
+    layout, replacing any store= partitions already under the root;
+    otherwise a single csv file is written (or overwritten).
+
+    Args:
+        path: Output csv file, or dataset root when stores are given
+        n_rows: Number of transactions
+        **kwargs: Options forwarded to iter_transaction_chunks
+
+    Returns:
+        Path to the written csv file or dataset root
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if kwargs.get("stores") and path.is_dir():
+        # Partition files are appended to, so rows of an earlier run must not survive
+        for stale in path.glob("store=*"):
+            shutil.rmtree(stale)
+    for index, chunk in enumerate(iter_transaction_chunks(n_rows, **kwargs)):
+        if "store" in chunk.columns:
+            # Chunks hold whole days, so a month may span chunks; append to its partition file
+            _append_partitioned(chunk, path)
+        else:
+            chunk.to_csv(path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+    return path
+
+
+def _append_partitioned(chunk: pd.DataFrame, root: Path) -> None:
+    """Append a chunk to the store=/year=/month= layout, creating partition files as needed."""
+    stamps = chunk["datetime"].str.slice(0, 7)
+    for (store, year_month), rows in chunk.groupby(["store", stamps], sort=True):
+        year, month = year_month.split("-")
+        directory = root / f"store={store}" / f"year={int(year)}" / f"month={int(month):02d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        file = directory / PARTITION_FILE_NAME
+        rows[CSV_COLUMNS].to_csv(file, mode="a", header=not file.exists(), index=False)
@@ -0,0 +1,36 @@
+"""Customer lifetime value and churn scoring from card purchase histories (BG/NBD and Gamma-Gamma)."""
+
+from .summary import purchase_days, rfm_arrays, rfm_summary, update_summary
+from .models import (
+    BGNBDParams,
+    GammaGammaParams,
+    bgnbd_log_likelihood,
+    expected_purchases,
+    expected_spend,
+    fit_bgnbd,
+    fit_gamma_gamma,
+    gamma_gamma_log_likelihood,
+    probability_alive,
+)
+from .scoring import CustomerValueModel, customer_value_main, fit_customer_value, rescore, score_customers
+
+__all__ = [
+    "purchase_days",
+    "rfm_arrays",
+    "rfm_summary",
+    "update_summary",
+    "BGNBDParams",
+    "GammaGammaParams",
+    "bgnbd_log_likelihood",
+    "expected_purchases",
+    "expected_spend",
+    "fit_bgnbd",
+    "fit_gamma_gamma",
+    "gamma_gamma_log_likelihood",
+    "probability_alive",
+    "CustomerValueModel",
+    "customer_value_main",
+    "fit_customer_value",
+    "rescore",
+    "score_customers",
+]
@@ -0,0 +1,23 @@
+"""Command line entry point: python -m customer_value."""
+from __future__ import annotations
+
+import argparse
+
+from .config import HORIZON_DAYS
+from .scoring import customer_value_main
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score card holders by churn risk and lifetime value.")
+    parser.add_argument("--data-path", default=None)
+    parser.add_argument("--stores", nargs="+", default=None)
+    parser.add_argument("--start", default=None, help="Only use transactions at or after this time")
+    parser.add_argument("--end", default=None, help="Only use transactions before this time")
+    parser.add_argument("--days", type=int, default=HORIZON_DAYS, help="Days ahead to value")
+    parser.add_argument("--output", default=None, help="Write per-card scores to this csv file")
+    args = parser.parse_args()
+    customer_value_main(args.data_path, args.stores, args.start, args.end, args.days, args.output)
+
+
+if __name__ == "__main__":
+    main()
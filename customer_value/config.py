@@ -0,0 +1,19 @@
+"""Centralized configuration for the customer lifetime value and churn engine."""
+from __future__ import annotations
+
+# Purchases are counted once per card and calendar day; recency and age are in days
+PERIOD = "D"
+
+# Expected visits and lifetime value are projected this many days past the data
+HORIZON_DAYS = 90
+
+# Lifetime value is discounted per DISCOUNT_PERIOD_DAYS by DISCOUNT_RATE
+DISCOUNT_PERIOD_DAYS = 30
+DISCOUNT_RATE = 0.01
+
+# L2 penalty on the model parameters; a small value keeps the fit stable for
+# short histories where few cards have repeat purchases
+PENALIZER = 0.001
+
+# Cards whose probability of still being active falls below this are at risk
+CHURN_THRESHOLD = 0.5
@@ -0,0 +1,189 @@
+"""Batch and incremental lifetime value and churn scores for every card holder."""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import span, traced
+from transaction_store import parse_transaction_times, read_transactions
+
+from .config import CHURN_THRESHOLD, DISCOUNT_PERIOD_DAYS, DISCOUNT_RATE, HORIZON_DAYS, PENALIZER, PERIOD
+from .models import (
+    BGNBDParams,
+    GammaGammaParams,
+    expected_purchases,
+    expected_spend,
+    fit_bgnbd,
+    fit_gamma_gamma,
+    probability_alive,
+)
+from .summary import rfm_arrays, rfm_summary, update_summary
+
+
+@dataclass(frozen=True)
+class CustomerValueModel:
+    """Fitted purchase and spend models and the day their data ends."""
+    purchases: BGNBDParams
+    spend: GammaGammaParams
+    observation_end: pd.Timestamp
+
+
+def fit_customer_value(
+    summary: pd.DataFrame, observation_end=None, penalizer: float = PENALIZER
+) -> CustomerValueModel:
+    """
+    Fit the BG/NBD and Gamma-Gamma models on a card summary.
+
+    Args:
+        summary: Summary from rfm_summary
+        observation_end: Last observed day. If None, the latest purchase day in summary
+        penalizer: L2 penalty on the model parameters
+
+    Returns:
+        CustomerValueModel
+    """
+    end = summary["last_purchase"].max() if observation_end is None else pd.Timestamp(observation_end).floor(PERIOD)
+    x, t_x, age, monetary = rfm_arrays(summary, end)
+    return CustomerValueModel(
+        purchases=fit_bgnbd(x, t_x, age, penalizer),
+        spend=fit_gamma_gamma(x, monetary, penalizer),
+        observation_end=end,
+    )
+
+
+def score_customers(
+    summary: pd.DataFrame,
+    model: CustomerValueModel,
+    observation_end=None,
+    horizon_days: int = HORIZON_DAYS,
+    discount_rate: float = DISCOUNT_RATE,
+    churn_threshold: float = CHURN_THRESHOLD,
+) -> pd.DataFrame:
+    """
+    Churn risk, expected visits and discounted lifetime value of every card.
+
+    Scoring is closed-form given the fitted parameters, so it runs on the
+    whole summary in a few vectorized passes.
+
+    Args:
+        summary: Summary from rfm_summary or update_summary
+        model: Fitted CustomerValueModel
+        observation_end: Last observed day. If None, the model's observation_end
+        horizon_days: Days ahead for expected visits and lifetime value
+        discount_rate: Discount rate per DISCOUNT_PERIOD_DAYS
+        churn_threshold: Probability alive below which a card is at risk
+
+    Returns:
+        DataFrame indexed by card with frequency, recency, age, monetary_value,
+        p_alive, churn_probability, at_risk, expected_visits, expected_spend and clv
+    """
+    end = model.observation_end if observation_end is None else observation_end
+    x, t_x, age, monetary = rfm_arrays(summary, end)
+
+    # Visits per discount period, each discounted back to the end of observation
+    steps = np.unique(np.append(np.arange(DISCOUNT_PERIOD_DAYS, horizon_days, DISCOUNT_PERIOD_DAYS), horizon_days))
+    cumulative = expected_purchases(model.purchases, steps, x, t_x, age)
+    per_step = np.diff(cumulative, axis=1, prepend=0.0)
+    discount = (1 + discount_rate) ** -(steps / DISCOUNT_PERIOD_DAYS)
+    spend = expected_spend(model.spend, x, monetary)
+    p_alive = probability_alive(model.purchases, x, t_x, age)
+
+    return pd.DataFrame({
+        "frequency": x,
+        "recency": t_x,
+        "age": age,
+        "monetary_value": monetary,
+        "p_alive": p_alive,
+        "churn_probability": 1 - p_alive,
+        "at_risk": p_alive < churn_threshold,
+        "expected_visits": cumulative[:, -1],
+        "expected_spend": spend,
+        "clv": spend * (per_step @ discount),
+    }, index=summary.index)
+
+
+def rescore(
+    summary: pd.DataFrame,
+    scores: pd.DataFrame,
+    model: CustomerValueModel,
+    new_transactions: pd.DataFrame,
+    horizon_days: int = HORIZON_DAYS,
+) -> Tuple[pd.DataFrame, pd.DataFrame, CustomerValueModel]:
+    """
+    Fold new visits into the summary and update the scores without refitting.
+
+    Only the cards with new visits are rescored while the observation end
+    stays the same; once new data moves it forward, every card ages and all
+    are rescored, which is the same closed-form pass as score_customers.
+
+    Args:
+        summary: Summary that scores were computed from
+        scores: Scores from score_customers or an earlier rescore
+        model: Fitted CustomerValueModel
+        new_transactions: Transactions after the ones already summarized
+        horizon_days: Days ahead for expected visits and lifetime value
+
+    Returns:
+        Tuple of (updated summary, updated scores, model with the new observation_end)
+    """
+    summary, changed = update_summary(summary, new_transactions)
+    if len(changed) and summary.loc[changed, "last_purchase"].max() > model.observation_end:
+        model = replace(model, observation_end=summary.loc[changed, "last_purchase"].max())
+        return summary, score_customers(summary, model, horizon_days=horizon_days), model
+    fresh = score_customers(summary.loc[changed], model, horizon_days=horizon_days)
+    scores = pd.concat([scores.drop(index=changed, errors="ignore"), fresh]).loc[summary.index]
+    return summary, scores, model
+
+
+@traced("customer_value_main", "customer_value")
+def customer_value_main(
+    data_path: str | Path | None = None,
+    stores: List[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    horizon_days: int = HORIZON_DAYS,
+    output_path: str | Path | None = None,
+) -> pd.DataFrame:
+    """
+    Fit the lifetime value models and score every card holder.
+
+    Args:
+        data_path: Optional path to CSV file or partitioned dataset root
+        stores: Optional store ids to include. If None, uses every store
+        start: Optional inclusive start of the history window
+        end: Optional exclusive end of the history window
+        horizon_days: Days ahead for expected visits and lifetime value
+        output_path: Optional csv file for the per-card scores
+
+    Returns:
+        Scores from score_customers
+    """
+    with span("load_transactions", "customer_value") as stage:
+        df = parse_transaction_times(read_transactions(data_path, stores=stores, start=start, end=end))
+        stage.rows_out = len(df)
+    with span("rfm_summary", "customer_value", rows_in=len(df)) as stage:
+        summary = rfm_summary(df)
+        stage.rows_out = len(summary)
+    with span("fit_customer_value", "customer_value", rows_in=len(summary)):
+        model = fit_customer_value(summary)
+    with span("score_customers", "customer_value", rows_in=len(summary)) as stage:
+        scores = score_customers(summary, model, horizon_days=horizon_days)
+        stage.rows_out = len(scores)
+
+    print(f"BG/NBD: {model.purchases}")
+    print(f"Gamma-Gamma: {model.spend}")
+    print(f"{len(scores)} card holders, {int(scores['at_risk'].sum())} at risk of churn, "
+          f"expected {horizon_days}-day value {scores['clv'].sum():.2f}")
+    print("Top card holders by lifetime value:")
+    print(scores.sort_values("clv", ascending=False).head(10).round(3).to_string())
+
+    if output_path is not None:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        scores.to_csv(output_path)
+        print(f"Scores written to {output_path}")
+    return scores
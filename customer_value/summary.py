@@ -0,0 +1,121 @@
+"""Per-card purchase summaries (frequency, recency, age, spend) kept as updatable sufficient statistics."""
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import PERIOD
+
+SUMMARY_COLUMNS = ("first_purchase", "last_purchase", "frequency", "repeat_value")
+
+
+def purchase_days(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Spend per card and purchase day, for card transactions only.
+
+    Args:
+        df: Transactions with parsed datetime, cash_type, card and money columns
+
+    Returns:
+        DataFrame with card, day and money, sorted by card and day
+    """
+    cards = df[(df["cash_type"] == "card") & df["card"].notna()]
+    daily = pd.DataFrame({
+        "card": cards["card"].to_numpy(),
+        "day": cards["datetime"].dt.floor(PERIOD).to_numpy(),
+        "money": cards["money"].to_numpy(dtype=float),
+    })
+    return daily.groupby(["card", "day"], sort=True)["money"].sum().reset_index()
+
+
+def _summarize_days(daily: pd.DataFrame) -> pd.DataFrame:
+    grouped = daily.groupby("card", sort=True)
+    summary = grouped.agg(
+        first_purchase=("day", "min"),
+        last_purchase=("day", "max"),
+        frequency=("day", "size"),
+        repeat_value=("money", "sum"),
+    )
+    # Repeat purchases exclude the first day, whose spend carries no information about returning
+    summary["frequency"] -= 1
+    summary["repeat_value"] -= grouped["money"].first()
+    return summary
+
+
+def rfm_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Purchase summary of every card holder.
+
+    Args:
+        df: Transactions with parsed datetime, cash_type, card and money columns
+
+    Returns:
+        DataFrame indexed by card with first_purchase, last_purchase,
+        frequency (repeat purchase days) and repeat_value (spend on them)
+    """
+    return _summarize_days(purchase_days(df))
+
+
+def update_summary(summary: pd.DataFrame, new_transactions: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Index]:
+    """
+    Fold newly arrived transactions into a summary without rereading history.
+
+    New transactions may fall on a card's last purchase day but not before it.
+
+    Args:
+        summary: Summary from rfm_summary or an earlier update
+        new_transactions: Transactions after the ones already summarized
+
+    Returns:
+        Tuple of (updated summary, index of the cards whose statistics changed)
+    """
+    daily = purchase_days(new_transactions)
+    known = daily["card"].isin(summary.index).to_numpy()
+    fresh = _summarize_days(daily[~known])
+
+    seen = daily[known]
+    previous = summary.loc[seen["card"]]
+    first = previous["first_purchase"].to_numpy()
+    last = previous["last_purchase"].to_numpy()
+    day = seen["day"].to_numpy()
+    if (day < last).any():
+        raise ValueError("new transactions predate the last summarized purchase")
+    changes = pd.DataFrame({
+        "card": seen["card"].to_numpy(),
+        "frequency": (day > last).astype(np.int64),
+        "repeat_value": np.where(day > first, seen["money"].to_numpy(), 0.0),
+        "last_purchase": day,
+    }).groupby("card", sort=False).agg(frequency=("frequency", "sum"), repeat_value=("repeat_value", "sum"),
+                                       last_purchase=("last_purchase", "max"))
+
+    updated = summary.copy()
+    updated.loc[changes.index, "frequency"] += changes["frequency"]
+    updated.loc[changes.index, "repeat_value"] += changes["repeat_value"]
+    updated.loc[changes.index, "last_purchase"] = changes["last_purchase"]
+    updated = pd.concat([updated, fresh[list(SUMMARY_COLUMNS)]])
+    return updated, changes.index.append(fresh.index)
+
+
+def rfm_arrays(summary: pd.DataFrame, observation_end=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Model inputs in days: repeat purchases, recency, age and mean repeat spend.
+
+    Args:
+        summary: Summary from rfm_summary or update_summary
+        observation_end: Last observed day. If None, the latest purchase day in summary
+
+    Returns:
+        Tuple of (frequency x, recency t_x from first to last purchase, age T
+        from first purchase to observation_end, mean spend per repeat purchase
+        day, 0 without repeats)
+    """
+    end = summary["last_purchase"].max() if observation_end is None else pd.Timestamp(observation_end).floor(PERIOD)
+    period = pd.Timedelta(1, PERIOD)
+    first = summary["first_purchase"]
+    x = summary["frequency"].to_numpy(dtype=float)
+    t_x = ((summary["last_purchase"] - first) / period).to_numpy(dtype=float)
+    age = ((end - first) / period).to_numpy(dtype=float)
+    monetary = np.divide(summary["repeat_value"].to_numpy(dtype=float), x, out=np.zeros(len(x)), where=x > 0)
+    return x, t_x, age, monetary
@@ -1,28 +1,24 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from transaction_store import TEMPORAL_COLUMNS, attach_calendar, parse_transaction_times, read_transactions
+
 # Set global plot style
 sns.set_style("whitegrid")
 
-def load_and_preprocess_data(file_path):
+def load_and_preprocess_data(file_path, stores=None, start=None, end=None):
     try:
-        df = pd.read_csv(file_path)
+        df = read_transactions(file_path, stores=stores, start=start, end=end)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         return None
 
-    # Convert columns to datetime objects
-    df['datetime'] = pd.to_datetime(df['datetime'])
-    df['date'] = pd.to_datetime(df['date'])
+    # Convert columns to datetime objects ('date' is derived from 'datetime')
+    parse_transaction_times(df)
 
-    # Feature Engineering: Extract time components
-    df['hour'] = df['datetime'].dt.hour
-    df['day_of_week_num'] = df['datetime'].dt.dayofweek
-    df['month_num'] = df['datetime'].dt.month
-    df['day_of_week_name'] = df['datetime'].dt.day_name()
-    # Create binary weekend flag (1 if weekend, 0 if not)
-    df['is_weekend'] = df['day_of_week_name'].isin(['Saturday', 'Sunday']).astype(int)
+    # Feature Engineering: hour, day of week, month, day name and binary weekend flag,
+    # gathered from the shared calendar/hour dimensions
+    attach_calendar(df, TEMPORAL_COLUMNS)
     
     print("Data loaded and preprocessed successfully.")
     return df
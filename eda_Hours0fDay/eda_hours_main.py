@@ -1,17 +1,24 @@
 import os
 
+from instrumentation import span, traced
+
 try:
     from .eda_hoursOfDay import load_and_preprocess_data, plot_transactions_by_hour
 except ImportError:
     from eda_hoursOfDay import load_and_preprocess_data, plot_transactions_by_hour
 
-def eda_hourly_transactions_main(data_path: str = None):
+@traced(category='eda_Hours0fDay')
+def eda_hourly_transactions_main(data_path: str = None, stores: list = None,
+                                 start: str = None, end: str = None):
     '''
     Main execution for Hourly Transactions EDA.
 
     Args:
-        data_path: Path to the CSV file (relative to project root). 
+        data_path: Path to the CSV file or partitioned dataset root (relative to project root). 
                    If None, uses default path 'index_1.csv'.
+        stores: Optional list of store ids to analyze. If None, uses the union of all stores.
+        start: Optional inclusive start of the time window (e.g. '2024-06-01').
+        end: Optional exclusive end of the time window.
     
     Returns:
     None
@@ -23,11 +30,14 @@ def eda_hourly_transactions_main(data_path: str = None):
     print(f"Target data file: {data_path}")
 
     # Load and Preprocess Data
-    df = load_and_preprocess_data(data_path)
+    with span('load_and_preprocess_data', 'eda_Hours0fDay') as stage:
+        df = load_and_preprocess_data(data_path, stores=stores, start=start, end=end)
+        stage.rows_out = None if df is None else len(df)
     
     if df is not None:
         # Plot Transactions
-        plot_transactions_by_hour(df)
+        with span('plot_transactions_by_hour', 'eda_Hours0fDay', rows_in=len(df)):
+            plot_transactions_by_hour(df)
 
 if __name__ == "__main__":
     eda_hourly_transactions_main()
\ No newline at end of file
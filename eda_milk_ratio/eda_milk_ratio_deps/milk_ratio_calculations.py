@@ -1,5 +1,20 @@
 import pandas as pd
 
+from transaction_store import parse_timestamps
+
+# Recipe (milk, coffee) proportions per drink; unknown drinks count as black coffee
+MILK_MAP = {
+    "Latte": (0.7, 0.3),
+    "Cappuccino": (0.67, 0.33),
+    "Flat White": (0.75, 0.25),
+    "Hot Chocolate": (1.0, 0.0),
+    "Cocoa": (1.0, 0.0),
+    "Americano": (0.0, 1.0),
+    "Americano with Milk": (0.2, 0.8),
+    "Cortado": (0.5, 0.5)
+}
+DEFAULT_MILK_COFFEE = (0.0, 1.0)
+
 def determine_milk_ratio(drink):
     '''
     Helper function to define milk ratios and return corresponding milk ratios.
@@ -12,18 +27,7 @@ def determine_milk_ratio(drink):
     tuple
         Tuple corresponding to milk to coffee ratio
     '''
-    milk_map = {
-        "Latte": (0.7, 0.3),
-        "Cappuccino": (0.67, 0.33),
-        "Flat White": (0.75, 0.25),
-        "Hot Chocolate": (1.0, 0.0),
-        "Cocoa": (1.0, 0.0),
-        "Americano": (0.0, 1.0),
-        "Americano with Milk": (0.2, 0.8),
-        "Cortado": (0.5, 0.5)
-    }
-
-    milk, coffee = milk_map.get(drink, (0.0, 1.0))
+    milk, coffee = MILK_MAP.get(drink, DEFAULT_MILK_COFFEE)
     return milk / (milk + coffee)
 
 def add_hour_of_day(df: pd.DataFrame) -> pd.DataFrame:
@@ -39,7 +43,7 @@ def add_hour_of_day(df: pd.DataFrame) -> pd.DataFrame:
             new 'hour_of_day' column
     """
 
-    df["datetime"] = pd.to_datetime(df["datetime"])
+    df["datetime"] = parse_timestamps(df["datetime"])
 
     # Extract hour
     df["hour_of_day"] = df["datetime"].dt.hour
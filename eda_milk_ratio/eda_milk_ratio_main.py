@@ -1,4 +1,5 @@
-import pandas as pd
+from instrumentation import span, traced
+from transaction_store import read_transactions
 
 try:
     from .eda_milk_ratio_deps.milk_ratio_calculations import determine_milk_ratio, add_hour_of_day
@@ -9,13 +10,17 @@ except ImportError:
     from eda_milk_ratio_deps.milk_ratio_scatterplot import milk_ratio_scatter
     from eda_milk_ratio_deps.milk_ratio_heatmap import milk_ratio_heatmap
 
-def eda_milk_main(data_path: str = None):
+@traced(category='eda_milk_ratio')
+def eda_milk_main(data_path: str = None, stores: list = None, start: str = None, end: str = None):
     '''
     Main execution for milk ratio EDA.
 
     Args:
-        data_path: Path to the CSV file (relative to project root). 
+        data_path: Path to the CSV file or partitioned dataset root (relative to project root). 
                     If None, uses path from config.json
+        stores: Optional list of store ids to analyze. If None, uses the union of all stores
+        start: Optional inclusive start of the time window (e.g. '2024-06-01')
+        end: Optional exclusive end of the time window
     
     Returns:
     None
@@ -25,25 +30,31 @@ def eda_milk_main(data_path: str = None):
     if data_path is None:
         data_path = 'upload/index_1.csv'
 
-    df = pd.read_csv(data_path)
+    with span('load_transactions', 'eda_milk_ratio') as stage:
+        df = read_transactions(data_path, stores=stores, start=start, end=end)
+        stage.rows_out = len(df)
 
-    # Classify observations thorugh the hour of day
-    add_hour_of_day(df)
+    with span('compute_milk_ratio', 'eda_milk_ratio', rows_in=len(df)) as stage:
+        # Classify observations thorugh the hour of day
+        add_hour_of_day(df)
 
-    # Calculate milk ratios and append to dataframe
-    df["milk_ratio"] = df["coffee_name"].apply(determine_milk_ratio)
+        # Calculate milk ratios and append to dataframe
+        df["milk_ratio"] = df["coffee_name"].apply(determine_milk_ratio)
+        stage.rows_out = len(df)
 
     # Calculate and create scatterplot for milk
     print("--------------------")
     print("Plotting Average Milk Ratio by Hour")
     print("--------------------")
-    milk_ratio_scatter(df)
+    with span('milk_ratio_scatter', 'eda_milk_ratio', rows_in=len(df)):
+        milk_ratio_scatter(df)
 
     # Calculate and create heatmap for milk 
     print("--------------------")
     print("Plotting Average Milk Ratio Heatmap")
     print("--------------------")
-    milk_ratio_heatmap(df)
+    with span('milk_ratio_heatmap', 'eda_milk_ratio', rows_in=len(df)):
+        milk_ratio_heatmap(df)
 
 if __name__ == "__main__":
     eda_milk_main()
\ No newline at end of file
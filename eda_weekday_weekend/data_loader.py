@@ -1,43 +1,40 @@
 """Data loading utilities for the weekday/weekend EDA package."""
 from __future__ import annotations
 
-import holidays
+from typing import List
+
 import pandas as pd
 
+from transaction_store import attach_calendar, parse_transaction_times, read_transactions
+
 from .config import resolve_data_path
 
 
-def load_and_preprocess(data_path: str | None = None) -> pd.DataFrame:
+def load_and_preprocess(
+    data_path: str | None = None,
+    stores: List[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> pd.DataFrame:
     """
     Load raw transaction data, parse datetime columns, and classify day types.
     
     Args:
-        data_path: Optional path to the CSV file. If None, uses default path
+        data_path: Optional path to the CSV file or partitioned dataset root. If None, uses default path
+        stores: Optional store ids to load. If None, loads the union of all stores
+        start: Optional inclusive start of the time window (e.g. "2024-06-01")
+        end: Optional exclusive end of the time window
         
     Returns:
         DataFrame with added weekday and day_type columns
     """
     path = resolve_data_path(data_path)
-    df = pd.read_csv(path)
-
-    df["date"] = pd.to_datetime(df["date"])
-    df["datetime"] = pd.to_datetime(df["datetime"])
-    df["weekday"] = df["datetime"].dt.weekday  # 0=Monday, 6=Sunday
-
-    us_holidays = holidays.US(years=[2024, 2025])
-
-    def classify_day_type(row: pd.Series) -> str:
-        date = row["date"]
-        weekday = row["weekday"]
-        if date.date() in us_holidays:
-            return "Holiday"
-        elif weekday >= 5:
-            return "Weekend"
-        else:
-            return "Weekday"
-
-    df["day_type"] = df.apply(classify_day_type, axis=1)
-    return df
+    df = read_transactions(path, stores=stores, start=start, end=end)
+
+    parse_transaction_times(df)
+    # Holiday / Weekend / Weekday is classified once per date in the calendar dimension
+    attach_calendar(df, ["day_of_week_num", "day_type"])
+    return df.rename(columns={"day_of_week_num": "weekday"})  # 0=Monday, 6=Sunday
 
 
 def compute_daily_sales(df: pd.DataFrame) -> pd.DataFrame:
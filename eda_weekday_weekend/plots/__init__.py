@@ -1,25 +1,41 @@
 """Plotting sub-package for weekday/weekend EDA."""
 from __future__ import annotations
 
+from typing import List
+
+from instrumentation import span, traced
+
 from .sales import eda_sales_comparison
 from .coffee import eda_popular_coffee_comparison
 from .order_value import eda_order_value_statistics
 from .style import init_style
 
 
-def run_all_eda(data_path: str | None = None) -> None:
+@traced(category="eda_weekday_weekend")
+def run_all_eda(
+    data_path: str | None = None,
+    stores: List[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> None:
     """
     Execute all EDA visualizations in sequence.
     
     Args:
-        data_path: Optional path to CSV file. If None, uses default path
+        data_path: Optional path to CSV file or partitioned dataset root. If None, uses default path
+        stores: Optional store ids to include. If None, uses the union of all stores
+        start: Optional inclusive start of the time window (e.g. "2024-06-01")
+        end: Optional exclusive end of the time window
         
     Returns:
         None. Displays all plots sequentially
     """
-    eda_sales_comparison(data_path)
-    eda_popular_coffee_comparison(data_path)
-    eda_order_value_statistics(data_path)
+    with span("eda_sales_comparison", "eda_weekday_weekend"):
+        eda_sales_comparison(data_path, stores=stores, start=start, end=end)
+    with span("eda_popular_coffee_comparison", "eda_weekday_weekend"):
+        eda_popular_coffee_comparison(data_path, stores=stores, start=start, end=end)
+    with span("eda_order_value_statistics", "eda_weekday_weekend"):
+        eda_order_value_statistics(data_path, stores=stores, start=start, end=end)
 
 
 __all__ = [
@@ -1,6 +1,8 @@
 """Popular coffee comparison visualization."""
 from __future__ import annotations
 
+from typing import List
+
 import matplotlib.pyplot as plt
 
 from ..config import DAY_TYPE_ORDER, DAY_TYPE_COLOR_MAP, FIG_SIZE_TRIPLE
@@ -10,17 +12,25 @@ from .style import init_style
 init_style()
 
 
-def eda_popular_coffee_comparison(data_path: str | None = None) -> None:
+def eda_popular_coffee_comparison(
+    data_path: str | None = None,
+    stores: List[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> None:
     """
     Display Top 5 popular coffees comparison by day type as horizontal bar charts.
     
     Args:
-        data_path: Optional path to CSV file. If None, uses default path
+        data_path: Optional path to CSV file or partitioned dataset root. If None, uses default path
+        stores: Optional store ids to include. If None, uses the union of all stores
+        start: Optional inclusive start of the time window (e.g. "2024-06-01")
+        end: Optional exclusive end of the time window
         
     Returns:
         None. Displays the plot using plt.show()
     """
-    df = load_and_preprocess(data_path)
+    df = load_and_preprocess(data_path, stores=stores, start=start, end=end)
 
     coffee_stats = df.groupby(["day_type", "coffee_name"]).size().reset_index(name="count")
     total_by_day = df.groupby("day_type").size().reset_index(name="total")
@@ -1,6 +1,8 @@
 """Order value statistics visualization."""
 from __future__ import annotations
 
+from typing import List
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -11,17 +13,25 @@ from .style import init_style
 init_style()
 
 
-def eda_order_value_statistics(data_path: str | None = None) -> None:
+def eda_order_value_statistics(
+    data_path: str | None = None,
+    stores: List[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> None:
     """
     Display average order value comparison and distribution box plot by day type.
     
     Args:
-        data_path: Optional path to CSV file. If None, uses default path
+        data_path: Optional path to CSV file or partitioned dataset root. If None, uses default path
+        stores: Optional store ids to include. If None, uses the union of all stores
+        start: Optional inclusive start of the time window (e.g. "2024-06-01")
+        end: Optional exclusive end of the time window
         
     Returns:
         None. Displays the plot using plt.show()
     """
-    df = load_and_preprocess(data_path)
+    df = load_and_preprocess(data_path, stores=stores, start=start, end=end)
 
     avg_order_stats = df.groupby("day_type")["money"].agg(
         [("Mean", "mean"), ("Median", "median"), ("Std Dev", "std"), ("Min", "min"), ("Max", "max")]
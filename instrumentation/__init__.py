@@ -0,0 +1,40 @@
+"""Per-stage timing and memory instrumentation shared by every analysis entry point."""
+
+from .tracer import (
+    Span,
+    SpanRecord,
+    Tracer,
+    count_rows,
+    get_tracer,
+    span,
+    traced,
+)
+from .export import format_summary, trace_to_dict, write_chrome_trace, write_json_trace
+from .profiling import (
+    PROFILE_MODES,
+    ProfileReport,
+    SamplingProfiler,
+    format_report,
+    profile_call,
+    write_profile,
+)
+
+__all__ = [
+    "Span",
+    "SpanRecord",
+    "Tracer",
+    "count_rows",
+    "get_tracer",
+    "span",
+    "traced",
+    "format_summary",
+    "trace_to_dict",
+    "write_chrome_trace",
+    "write_json_trace",
+    "PROFILE_MODES",
+    "ProfileReport",
+    "SamplingProfiler",
+    "format_report",
+    "profile_call",
+    "write_profile",
+]
@@ -0,0 +1,136 @@
+"""Export recorded spans as a JSON trace, a Chrome trace or a console summary."""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .tracer import Tracer, get_tracer
+
+
+def trace_to_dict(tracer: Tracer | None = None) -> Dict[str, Any]:
+    """
+    Convert recorded spans into a JSON-serializable trace.
+
+    Args:
+        tracer: Tracer to export. If None, uses the process-wide tracer
+
+    Returns:
+        Dictionary with 'meta' and 'spans' (in start order)
+    """
+    tracer = tracer or get_tracer()
+    spans = sorted(tracer.records, key=lambda record: record.start)
+    return {
+        "meta": {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(tracer.origin_epoch)),
+            "pid": os.getpid(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dropped_spans": tracer.dropped,
+        },
+        "spans": [asdict(record) for record in spans],
+    }
+
+
+def write_json_trace(path: str | Path, tracer: Tracer | None = None) -> Path:
+    """
+    Write recorded spans to a structured JSON trace file.
+
+    Args:
+        path: Output file path
+        tracer: Tracer to export. If None, uses the process-wide tracer
+
+    Returns:
+        Path to the written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(trace_to_dict(tracer), f, indent=2, default=str)
+    return path
+
+
+def write_chrome_trace(path: str | Path, tracer: Tracer | None = None) -> Path:
+    """
+    Write recorded spans in the Chrome trace event format.
+
+    The file opens in chrome://tracing or https://ui.perfetto.dev.
+
+    Args:
+        path: Output file path
+        tracer: Tracer to export. If None, uses the process-wide tracer
+
+    Returns:
+        Path to the written file
+    """
+    tracer = tracer or get_tracer()
+    events: List[Dict[str, Any]] = []
+    for record in tracer.records:
+        args = {
+            "cpu_seconds": round(record.cpu_seconds, 6),
+            "peak_rss_delta_mib": record.peak_rss_delta_mib,
+            "rss_end_mib": record.rss_end_mib,
+            "rows_in": record.rows_in,
+            "rows_out": record.rows_out,
+            **record.attributes,
+        }
+        if record.error:
+            args["error"] = record.error
+        events.append({
+            "name": record.name,
+            "cat": record.category or "default",
+            "ph": "X",
+            "ts": record.start * 1e6,
+            "dur": record.wall_seconds * 1e6,
+            "pid": record.pid,
+            "tid": record.thread_id,
+            "args": args,
+        })
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+    return path
+
+
+def format_summary(tracer: Tracer | None = None, top: int | None = None) -> str:
+    """
+    Format recorded spans as an indented table, slowest top-level stages first.
+
+    Args:
+        tracer: Tracer to summarize. If None, uses the process-wide tracer
+        top: Optional number of top-level spans to show
+
+    Returns:
+        Multi-line summary string
+    """
+    tracer = tracer or get_tracer()
+    children: Dict[Any, list] = {}
+    for record in sorted(tracer.records, key=lambda r: r.start):
+        children.setdefault(record.parent_id, []).append(record)
+    roots = sorted(children.get(None, []), key=lambda r: r.wall_seconds, reverse=True)
+    if top is not None:
+        roots = roots[:top]
+
+    def fmt(value, spec):
+        return f"{'-':>10}" if value is None else format(value, spec)
+
+    lines = [f"{'span':<48} {'wall s':>9} {'cpu s':>9} {'peak+ MiB':>10} {'rows in':>10} {'rows out':>10}"]
+
+    def walk(record):
+        label = ("  " * record.depth + record.name)[:48]
+        lines.append(
+            f"{label:<48} {record.wall_seconds:9.3f} {record.cpu_seconds:9.3f} "
+            f"{fmt(record.peak_rss_delta_mib, '10.1f')} {fmt(record.rows_in, '10,')} "
+            f"{fmt(record.rows_out, '10,')}"
+        )
+        for child in children.get(record.span_id, []):
+            walk(child)
+
+    for root in roots:
+        walk(root)
+    return "\n".join(lines)
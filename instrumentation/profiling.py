@@ -0,0 +1,356 @@
+"""Whole-pipeline profiling: a stack-sampling profiler and a cProfile wrapper with per-package rollups."""
+from __future__ import annotations
+
+import cProfile
+import json
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PROFILE_MODES = ("sample", "cprofile")
+DEFAULT_INTERVAL = 0.005
+
+_STDLIB = Path(sysconfig.get_paths()["stdlib"]).resolve()
+_SITE_MARKERS = ("site-packages", "dist-packages")
+
+
+def module_for_file(filename: str) -> Tuple[str, bool]:
+    """
+    Map a source file to a dotted module name.
+
+    Args:
+        filename: Code object filename
+
+    Returns:
+        Tuple of (module name, whether the file belongs to this project)
+    """
+    if filename.startswith("<frozen "):
+        return filename[len("<frozen "):-1], False
+    if filename.startswith("<") or filename == "~":
+        return "builtins", False
+    path = Path(filename).resolve().with_suffix("")
+    if path.name == "__init__":
+        path = path.parent
+    for marker in _SITE_MARKERS:
+        if marker in path.parts:
+            return ".".join(path.parts[path.parts.index(marker) + 1:]), False
+    for root, is_project in ((PROJECT_ROOT, True), (_STDLIB, False)):
+        try:
+            return ".".join(path.relative_to(root).parts), is_project
+        except ValueError:
+            continue
+    return path.name, False
+
+
+def package_of(module: str) -> str:
+    """Return the top-level package of a dotted module name."""
+    return module.split(".")[0]
+
+
+def _package_order(row: Dict[str, Any]) -> tuple:
+    """Sort project packages first by attributed time, then the rest by self time."""
+    return (not row["project"], -row.get("attributed_seconds", row["self_seconds"]))
+
+
+@dataclass
+class ProfileReport:
+    """Result of a profiled run."""
+    mode: str
+    seconds: float
+    packages: List[Dict[str, Any]]
+    functions: List[Dict[str, Any]]
+    folded: Dict[str, float] = field(default_factory=dict)
+    stats: Optional[pstats.Stats] = None
+
+
+class SamplingProfiler:
+    """
+    Periodically samples the call stack of one thread from a background thread.
+
+    Each sample is weighted by the time elapsed since the previous one, so
+    long calls into C code that hold the GIL are not under-counted.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_id: Optional[int] = None) -> None:
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            self.samples[tuple(reversed(stack))] += now - last
+            last = now
+
+    def start(self) -> "SamplingProfiler":
+        """Start sampling in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> bool:
+        self.stop()
+        return False
+
+
+def _label(code, cache: Dict[Any, Tuple[str, str, bool]]) -> Tuple[str, str, bool]:
+    """Return (frame label, package, is_project) for a code object, memoized."""
+    if code not in cache:
+        module, is_project = module_for_file(code.co_filename)
+        cache[code] = (f"{module}:{code.co_name}", package_of(module), is_project)
+    return cache[code]
+
+
+def summarize_samples(samples: Counter, top: int = 25) -> Tuple[List[dict], List[dict], Dict[str, float]]:
+    """
+    Roll stack samples up into per-package and per-function tables and folded stacks.
+
+    Per package, 'self_seconds' counts samples whose innermost frame is in the
+    package, 'inclusive_seconds' samples where it appears anywhere on the stack,
+    and 'attributed_seconds' samples whose innermost project frame is in it
+    (e.g. pandas time spent on behalf of promotional_analysis).
+
+    Args:
+        samples: Counter mapping root-first code-object stacks to seconds
+        top: Number of functions to keep
+
+    Returns:
+        Tuple of (packages, functions, folded stacks)
+    """
+    cache: Dict[Any, Tuple[str, str, bool]] = {}
+    packages: Dict[str, Dict[str, Any]] = {}
+    functions: Dict[str, Dict[str, float]] = {}
+    folded: Dict[str, float] = Counter()
+
+    def package_row(name: str, is_project: bool) -> Dict[str, Any]:
+        return packages.setdefault(name, {
+            "package": name, "project": is_project,
+            "self_seconds": 0.0, "inclusive_seconds": 0.0, "attributed_seconds": 0.0,
+        })
+
+    for stack, seconds in samples.items():
+        labels = [_label(code, cache) for code in stack]
+        folded[";".join(label for label, _, _ in labels)] += seconds
+
+        leaf_label, leaf_package, leaf_project = labels[-1]
+        package_row(leaf_package, leaf_project)["self_seconds"] += seconds
+        for name, is_project in {(package, project) for _, package, project in labels}:
+            package_row(name, is_project)["inclusive_seconds"] += seconds
+        for _, package, is_project in reversed(labels):
+            if is_project:
+                package_row(package, True)["attributed_seconds"] += seconds
+                break
+
+        functions.setdefault(leaf_label, {"function": leaf_label, "self_seconds": 0.0,
+                                          "inclusive_seconds": 0.0})["self_seconds"] += seconds
+        for label in {label for label, _, _ in labels}:
+            functions.setdefault(label, {"function": label, "self_seconds": 0.0,
+                                         "inclusive_seconds": 0.0})["inclusive_seconds"] += seconds
+
+    package_rows = sorted(packages.values(), key=_package_order)
+    function_rows = sorted(functions.values(), key=lambda row: row["self_seconds"], reverse=True)
+    return package_rows, function_rows[:top], dict(folded)
+
+
+def _cprofile_attribution(stats: pstats.Stats, modules: Dict[tuple, Tuple[str, bool]]) -> Dict[str, float]:
+    """
+    Attribute every function's self time to the project packages that called it.
+
+    cProfile keeps only caller edges, so library time is split across callers in
+    proportion to the cumulative time each caller spent in it, recursively, until
+    a project function is reached (the usual gprof approximation).
+    """
+    shares: Dict[tuple, Dict[str, float]] = {}
+
+    def share_of(key: tuple, visiting: set) -> Dict[str, float]:
+        if key in shares:
+            return shares[key]
+        module, is_project = modules[key]
+        if is_project:
+            return {package_of(module): 1.0}
+        result: Dict[str, float] = {}
+        callers = stats.stats[key][4]
+        total = sum(edge[3] for edge in callers.values())
+        if total > 0 and key not in visiting:
+            visiting.add(key)
+            for caller, edge in callers.items():
+                if caller not in stats.stats:
+                    continue
+                for package, fraction in share_of(caller, visiting).items():
+                    result[package] = result.get(package, 0.0) + fraction * edge[3] / total
+            visiting.discard(key)
+        shares[key] = result
+        return result
+
+    attributed: Dict[str, float] = {}
+    for key, (_, _, tottime, _, _) in stats.stats.items():
+        for package, fraction in share_of(key, set()).items():
+            attributed[package] = attributed.get(package, 0.0) + tottime * fraction
+    return attributed
+
+
+def summarize_cprofile(stats: pstats.Stats, top: int = 25) -> Tuple[List[dict], List[dict]]:
+    """
+    Roll cProfile statistics up into per-package self and attributed time and a hot-function table.
+
+    Args:
+        stats: pstats.Stats of the profiled run
+        top: Number of functions to keep
+
+    Returns:
+        Tuple of (packages, functions)
+    """
+    packages: Dict[str, Dict[str, Any]] = {}
+    functions = []
+    modules = {key: module_for_file(key[0]) for key in stats.stats}
+    for (filename, lineno, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        module, is_project = modules[(filename, lineno, name)]
+        package = package_of(module)
+        row = packages.setdefault(package, {"package": package, "project": is_project,
+                                            "self_seconds": 0.0, "calls": 0})
+        row["self_seconds"] += tottime
+        row["calls"] += ncalls
+        functions.append({
+            "function": f"{module}:{name}" if module != "builtins" else name,
+            "line": lineno,
+            "calls": ncalls,
+            "self_seconds": tottime,
+            "inclusive_seconds": cumtime,
+        })
+    for package, seconds in _cprofile_attribution(stats, modules).items():
+        packages[package]["attributed_seconds"] = seconds
+    package_rows = sorted(packages.values(), key=_package_order)
+    function_rows = sorted(functions, key=lambda row: row["self_seconds"], reverse=True)
+    return package_rows, function_rows[:top]
+
+
+def profile_call(func: Callable[..., Any], *args: Any, mode: str = "sample",
+                 interval: float = DEFAULT_INTERVAL, top: int = 25, **kwargs: Any) -> Tuple[Any, ProfileReport]:
+    """
+    Run a callable under the sampling profiler or cProfile.
+
+    Args:
+        func: Callable to profile, e.g. the whole pipeline
+        *args: Positional arguments for func
+        mode: 'sample' (low overhead, per-package attribution) or 'cprofile' (deterministic)
+        interval: Sampling interval in seconds for 'sample' mode
+        top: Number of functions in the hot-function table
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Tuple of (func's return value, ProfileReport)
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode}. Use one of {PROFILE_MODES}")
+
+    started = time.perf_counter()
+    if mode == "sample":
+        with SamplingProfiler(interval) as sampler:
+            result = func(*args, **kwargs)
+        packages, functions, folded = summarize_samples(sampler.samples, top)
+        return result, ProfileReport(mode, time.perf_counter() - started, packages, functions, folded)
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    stats = pstats.Stats(profiler)
+    packages, functions = summarize_cprofile(stats, top)
+    return result, ProfileReport(mode, time.perf_counter() - started, packages, functions, stats=stats)
+
+
+def format_report(report: ProfileReport, min_seconds: float = 0.01) -> str:
+    """
+    Format the per-package rollup and hot-function table for the console.
+
+    Args:
+        report: ProfileReport from profile_call
+        min_seconds: Library packages with less self time than this are folded into one line
+
+    Returns:
+        Multi-line string
+    """
+    lines = [f"Profile ({report.mode}), {report.seconds:.2f} s total", "",
+             f"{'package':<28} {'self s':>9} {'incl s':>9} {'attrib s':>9}"]
+    minor = [row for row in report.packages
+             if not row["project"] and row["self_seconds"] < min_seconds]
+    for row in report.packages:
+        if row in minor:
+            continue
+        inclusive = row.get("inclusive_seconds")
+        attributed = row.get("attributed_seconds") if row["project"] else None
+        lines.append(
+            f"{row['package'][:28]:<28} {row['self_seconds']:9.3f} "
+            f"{'-' if inclusive is None else format(inclusive, '.3f'):>9} "
+            f"{'-' if attributed is None else format(attributed, '.3f'):>9}"
+        )
+    if minor:
+        label = f"({len(minor)} other packages)"
+        lines.append(f"{label:<28} {sum(row['self_seconds'] for row in minor):9.3f}")
+    lines += ["", f"{'function':<72} {'self s':>9} {'incl s':>9}"]
+    for row in report.functions:
+        lines.append(f"{row['function'][-72:]:<72} {row['self_seconds']:9.3f} "
+                     f"{row['inclusive_seconds']:9.3f}")
+    return "\n".join(lines)
+
+
+def write_profile(report: ProfileReport, output_dir: str | Path) -> List[Path]:
+    """
+    Write flame-graph input and the summary tables.
+
+    Sample mode writes folded stacks (profile.folded) for flamegraph.pl or
+    speedscope; cProfile mode writes profile.prof for snakeviz or flameprof.
+    Both write profile_summary.json with the package and function tables.
+
+    Args:
+        report: ProfileReport from profile_call
+        output_dir: Directory for the output files
+
+    Returns:
+        List of written paths
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    if report.folded:
+        folded_path = output_dir / "profile.folded"
+        with open(folded_path, "w") as f:
+            for stack, seconds in sorted(report.folded.items()):
+                # flamegraph.pl expects integer counts; use microseconds
+                f.write(f"{stack} {max(int(seconds * 1e6), 1)}\n")
+        written.append(folded_path)
+    if report.stats is not None:
+        prof_path = output_dir / "profile.prof"
+        report.stats.dump_stats(prof_path)
+        written.append(prof_path)
+
+    summary_path = output_dir / "profile_summary.json"
+    with open(summary_path, "w") as f:
+        json.dump({"mode": report.mode, "seconds": report.seconds,
+                   "packages": report.packages, "functions": report.functions}, f, indent=2)
+    written.append(summary_path)
+    return written
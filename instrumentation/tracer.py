@@ -0,0 +1,299 @@
+"""Lightweight span tracer recording wall time, CPU time, RSS and row counts per stage."""
+from __future__ import annotations
+
+import functools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Deque, Dict, Iterable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_MIB = 2**20
+# ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+# Spans kept per tracer; older ones are dropped first so long runs stay bounded
+MAX_RECORDS = 100_000
+
+
+def _current_rss() -> Optional[int]:
+    """Return the resident set size of this process in bytes, if psutil is available."""
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def _peak_rss() -> Optional[int]:
+    """Return the process high-water RSS in bytes."""
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    return None
+
+
+def count_rows(obj: Any) -> Optional[int]:
+    """
+    Count the rows of a DataFrame, Series or array (or the first one inside a tuple).
+
+    Args:
+        obj: Value passed into or returned from a stage
+
+    Returns:
+        Number of rows, or None if obj holds no row-shaped value
+    """
+    shape = getattr(obj, "shape", None)
+    if shape:
+        return int(shape[0])
+    if isinstance(obj, tuple):
+        for item in obj:
+            rows = count_rows(item)
+            if rows is not None:
+                return rows
+    return None
+
+
+@dataclass
+class SpanRecord:
+    """
+    Measurements of one finished span.
+
+    peak_rss_delta_mib is how far the span raised the process high-water RSS,
+    so it is 0 when the span stayed below an earlier peak.
+    """
+    name: str
+    category: str
+    span_id: int
+    parent_id: Optional[int]
+    depth: int
+    start: float
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_delta_mib: Optional[float]
+    rss_start_mib: Optional[float]
+    rss_end_mib: Optional[float]
+    rows_in: Optional[int]
+    rows_out: Optional[int]
+    pid: int
+    thread_id: int
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Span:
+    """
+    An open span. Use as a context manager; set rows_out before it closes.
+
+    Example:
+        with span("load_data", "promotional_analysis") as s:
+            df = load_data(path)
+            s.rows_out = len(df)
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, category: str = "",
+                 rows_in: Optional[int] = None, **attributes: Any) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.attributes = attributes
+        self._token = None
+
+    def set(self, **attributes: Any) -> None:
+        """Attach extra attributes to the span."""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        if not self.tracer.enabled:
+            return self
+        self.span_id = self.tracer._next_id()
+        parent = self.tracer._current.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self._token = self.tracer._current.set(self)
+        self._rss_start = _current_rss()
+        self._peak_start = _peak_rss()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self._token is None:
+            return False
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        peak_end = _peak_rss()
+        rss_end = _current_rss()
+        self.tracer._current.reset(self._token)
+        self._token = None
+
+        peak_delta = None
+        if peak_end is not None and self._peak_start is not None:
+            peak_delta = (peak_end - self._peak_start) / _MIB
+        self.tracer._record(SpanRecord(
+            name=self.name,
+            category=self.category,
+            span_id=self.span_id,
+            parent_id=self.parent_id,
+            depth=self.depth,
+            start=self._wall_start - self.tracer.origin,
+            wall_seconds=wall,
+            cpu_seconds=cpu,
+            peak_rss_delta_mib=peak_delta,
+            rss_start_mib=None if self._rss_start is None else self._rss_start / _MIB,
+            rss_end_mib=None if rss_end is None else rss_end / _MIB,
+            rows_in=self.rows_in,
+            rows_out=self.rows_out,
+            pid=os.getpid(),
+            thread_id=threading.get_ident(),
+            error=None if exc_type is None else f"{exc_type.__name__}: {exc}",
+            attributes=dict(self.attributes),
+        ))
+        return False
+
+
+class Tracer:
+    """
+    Collects finished spans for the current process.
+
+    At most max_records spans are kept; once full, the oldest are dropped and
+    counted in dropped. Parents finish after their children, so the outer
+    stages survive the longest.
+    """
+
+    def __init__(self, enabled: bool = True, max_records: int = MAX_RECORDS) -> None:
+        self.enabled = enabled
+        self.max_records = max_records
+        self.records: Deque[SpanRecord] = deque(maxlen=max_records)
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self.origin_epoch = time.time()
+        self._lock = threading.Lock()
+        self._ids = 0
+        self._current: ContextVar[Optional[Span]] = ContextVar(f"span_{id(self)}", default=None)
+
+    def _next_id(self) -> int:
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def _record(self, record: SpanRecord) -> None:
+        with self._lock:
+            if len(self.records) == self.max_records:
+                self.dropped += 1
+            self.records.append(record)
+
+    def merge(self, records: Iterable[SpanRecord], origin_epoch: float) -> None:
+        """
+        Add spans recorded by another tracer, e.g. in a worker process.
+
+        Span ids are renumbered, the other tracer's top-level spans become
+        children of the currently open span, and start times are shifted onto
+        this tracer's clock.
+
+        Args:
+            records: Finished spans from the other tracer
+            origin_epoch: The other tracer's origin_epoch
+        """
+        records = sorted(records, key=lambda r: r.depth)
+        if not records:
+            return
+        parent = self._current.get()
+        parent_id = getattr(parent, "span_id", None) if parent is not None else None
+        # Forked workers may have opened their spans below an inherited parent
+        shift = (parent.depth + 1 if parent_id is not None else 0) - records[0].depth
+        offset = origin_epoch - self.origin_epoch
+        ids: Dict[int, int] = {}
+        for record in records:
+            ids[record.span_id] = self._next_id()
+            self._record(replace(
+                record,
+                span_id=ids[record.span_id],
+                parent_id=ids.get(record.parent_id, parent_id),
+                depth=record.depth + shift,
+                start=record.start + offset,
+            ))
+
+    def span(self, name: str, category: str = "", rows_in: Optional[int] = None,
+             **attributes: Any) -> Span:
+        """
+        Open a span around a block of code.
+
+        Args:
+            name: Stage name
+            category: Grouping label, usually the package name
+            rows_in: Optional number of input rows
+            **attributes: Extra values stored with the span
+
+        Returns:
+            Span context manager
+        """
+        return Span(self, name, category, rows_in, **attributes)
+
+    def traced(self, name: Optional[str] = None, category: Optional[str] = None) -> Callable:
+        """
+        Decorate a function so each call is recorded as a span.
+
+        Rows in are counted from the first positional argument and rows out
+        from the return value when they are DataFrames, Series or arrays.
+
+        Args:
+            name: Span name. Defaults to the function name
+            category: Span category. Defaults to the function's top-level package
+
+        Returns:
+            Decorator
+        """
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__name__
+            span_category = category or func.__module__.split(".")[0]
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                rows_in = count_rows(args[0]) if args else None
+                with self.span(span_name, span_category, rows_in) as active:
+                    result = func(*args, **kwargs)
+                    active.rows_out = count_rows(result)
+                return result
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        """Drop all recorded spans and restart the clock."""
+        with self._lock:
+            self.records = deque(maxlen=self.max_records)
+            self.dropped = 0
+            self.origin = time.perf_counter()
+            self.origin_epoch = time.time()
+
+
+_TRACER = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer used by span() and traced()."""
+    return _TRACER
+
+
+def span(name: str, category: str = "", rows_in: Optional[int] = None, **attributes: Any) -> Span:
+    """Open a span on the process-wide tracer. See Tracer.span."""
+    return _TRACER.span(name, category, rows_in, **attributes)
+
+
+def traced(name: Optional[str] = None, category: Optional[str] = None) -> Callable:
+    """Decorate a function with a span on the process-wide tracer. See Tracer.traced."""
+    return _TRACER.traced(name, category)
@@ -4,27 +4,26 @@ import seaborn as sns
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 
+from transaction_store import (
+    TEMPORAL_COLUMNS, assign_visits, attach_calendar, parse_transaction_times, read_transactions
+)
+
 # Set global plot style
 sns.set_style("whitegrid")
 
-def load_and_preprocess_data(file_path):
+def load_and_preprocess_data(file_path, stores=None, start=None, end=None):
     try:
-        df = pd.read_csv(file_path)
+        df = read_transactions(file_path, stores=stores, start=start, end=end)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         return None
 
-    # Convert columns to datetime objects
-    df['datetime'] = pd.to_datetime(df['datetime'])
-    df['date'] = pd.to_datetime(df['date'])
-
-    # Feature Engineering: Extract time components
-    df['hour'] = df['datetime'].dt.hour
-    df['day_of_week_num'] = df['datetime'].dt.dayofweek
-    df['month_num'] = df['datetime'].dt.month
-    df['day_of_week_name'] = df['datetime'].dt.day_name()
-    # Create binary weekend flag (1 if weekend, 0 if not)
-    df['is_weekend'] = df['day_of_week_name'].isin(['Saturday', 'Sunday']).astype(int)
+    # Convert columns to datetime objects ('date' is derived from 'datetime')
+    parse_transaction_times(df)
+
+    # Feature Engineering: hour, day of week, month, day name and binary weekend flag,
+    # gathered from the shared calendar/hour dimensions
+    attach_calendar(df, TEMPORAL_COLUMNS)
     
     print("Data loaded and preprocessed successfully.")
     return df
@@ -34,10 +33,12 @@ def create_rfm_features(df):
     # Filter for card transactions only (as they have unique IDs)
     card_df = df[df['cash_type'] == 'card'].dropna(subset=['card']).copy()
     max_date = card_df['datetime'].max()
+    # Drinks bought minutes apart are one visit, not several
+    card_df['visit_id'] = assign_visits(card_df)
 
     # Aggregate data by card ID
     customer_summary = card_df.groupby('card').agg(
-        total_visits=pd.NamedAgg(column='datetime', aggfunc='count'), # Frequency
+        total_visits=pd.NamedAgg(column='visit_id', aggfunc='nunique'), # Frequency
         total_spent=pd.NamedAgg(column='money', aggfunc='sum'),       # Monetary
         last_visit=pd.NamedAgg(column='datetime', aggfunc='max')      # Used for Recency
     ).reset_index()
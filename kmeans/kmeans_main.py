@@ -1,18 +1,24 @@
 import pandas as pd
 import os
 
+from instrumentation import span, traced
+
 try:
     from .kmeans import create_rfm_features, load_and_preprocess_data, perform_clustering, plot_elbow_method
 except ImportError:
     from kmeans import create_rfm_features, load_and_preprocess_data, perform_clustering, plot_elbow_method
 
-def kmeans_main(data_path: str = None):
+@traced(category='kmeans')
+def kmeans_main(data_path: str = None, stores: list = None, start: str = None, end: str = None):
     '''
     Main execution for K-Means Clustering Analysis.
 
     Args:
-        data_path: Path to the CSV file (relative to project root). 
+        data_path: Path to the CSV file or partitioned dataset root (relative to project root). 
                    If None, uses default path 'index_1.csv'.
+        stores: Optional list of store ids to analyze. If None, uses the union of all stores.
+        start: Optional inclusive start of the time window (e.g. '2024-06-01').
+        end: Optional exclusive end of the time window.
     
     Returns:
     None
@@ -25,17 +31,23 @@ def kmeans_main(data_path: str = None):
     print(f"Target data file: {data_path}")
 
     # Load and Preprocess Data
-    df = load_and_preprocess_data(data_path)
+    with span('load_and_preprocess_data', 'kmeans') as stage:
+        df = load_and_preprocess_data(data_path, stores=stores, start=start, end=end)
+        stage.rows_out = None if df is None else len(df)
     
     if df is not None:
         # RFM Feature Engineering
-        rfm_df, X_scaled, features = create_rfm_features(df)
+        with span('create_rfm_features', 'kmeans', rows_in=len(df)) as stage:
+            rfm_df, X_scaled, features = create_rfm_features(df)
+            stage.rows_out = len(rfm_df)
         
         # Elbow Method (Visualize to choose k)
-        plot_elbow_method(X_scaled)
+        with span('plot_elbow_method', 'kmeans', rows_in=len(X_scaled)):
+            plot_elbow_method(X_scaled)
         
         # Final Clustering (Assuming k=3 based on Elbow plot)
-        perform_clustering(rfm_df, X_scaled, features, k=3)
+        with span('perform_clustering', 'kmeans', rows_in=len(X_scaled)):
+            perform_clustering(rfm_df, X_scaled, features, k=3)
 
 if __name__ == "__main__":
     kmeans_main()
\ No newline at end of file
@@ -0,0 +1,16 @@
+"""Staffing and inventory planning from hourly demand forecasts and drink recipes."""
+
+from .recipes import recipe_matrix
+from .demand import DrinkDemand, forecast_drink_demand, hour_of_day_mix
+from .plan import build_plan, plan_ingredients, plan_staffing, planning_main
+
+__all__ = [
+    "recipe_matrix",
+    "DrinkDemand",
+    "forecast_drink_demand",
+    "hour_of_day_mix",
+    "build_plan",
+    "plan_ingredients",
+    "plan_staffing",
+    "planning_main",
+]
@@ -0,0 +1,23 @@
+"""Command line entry point: python -m planning."""
+from __future__ import annotations
+
+import argparse
+
+from .config import HORIZON_DAYS
+from .plan import planning_main
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Plan baristas per hour and milk/beans per day.")
+    parser.add_argument("--data-path", default=None)
+    parser.add_argument("--stores", nargs="+", default=None)
+    parser.add_argument("--start", default=None, help="Only use transactions at or after this time")
+    parser.add_argument("--end", default=None, help="Only use transactions before this time")
+    parser.add_argument("--days", type=int, default=HORIZON_DAYS, help="Days to plan")
+    parser.add_argument("--output-dir", default=None, help="Write staffing.csv and ingredients.csv here")
+    args = parser.parse_args()
+    planning_main(args.data_path, args.stores, args.start, args.end, args.days, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Centralized configuration for the staffing and inventory planner."""
+from __future__ import annotations
+
+from typing import Dict
+
+# Demand forecast (see promotional_analysis.hourly_forecast)
+HORIZON_DAYS = 7
+TRAINING_DAYS = 28
+DAILY_ORDER = 4
+WEEKLY_ORDER = 3
+
+# Pseudo-orders of the store-wide drink mix blended into each hour-of-day mix,
+# so hours with few past orders do not get an extreme mix
+MIX_PRIOR_WEIGHT = 5.0
+
+# Staffing: orders one barista serves per hour, and the minimum crew while open
+ORDERS_PER_BARISTA_HOUR = 20
+MIN_STAFF_OPEN = 1
+STAFF_SERVICE_LEVEL = 0.95
+
+# Ingredients: probability that one day's stock covers that day's demand
+STOCK_SERVICE_LEVEL = 0.95
+
+# Recipe sizes. Milk is the drink volume times its milk share (MILK_MAP in
+# eda_milk_ratio); every drink with a coffee share uses one dose of beans.
+DEFAULT_DRINK_VOLUME_ML = 240.0
+DRINK_VOLUME_ML: Dict[str, float] = {
+    "Espresso": 60.0,
+    "Cortado": 120.0,
+    "Flat White": 160.0,
+    "Cappuccino": 180.0,
+}
+BEANS_PER_DOSE_G = 18.0
+INGREDIENTS = ("milk_ml", "beans_g")
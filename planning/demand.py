@@ -0,0 +1,106 @@
+"""Hourly per-drink demand: store order forecasts split by each store's hour-of-day drink mix."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from promotional_analysis.hourly_forecast import HOURS_PER_DAY, forecast_hourly_counts
+from transaction_store import DEFAULT_STORE, STORE_COLUMN
+
+from .config import DAILY_ORDER, HORIZON_DAYS, MIX_PRIOR_WEIGHT, TRAINING_DAYS, WEEKLY_ORDER
+
+
+@dataclass
+class DrinkDemand:
+    """Expected orders per store and forecast hour, in total and per drink."""
+    stores: List[str]
+    hours: np.ndarray  # (n_stores, n_hours) datetime64, from midnight after each store's last day
+    drinks: List[str]
+    orders: np.ndarray  # (n_stores, n_hours)
+    by_drink: np.ndarray  # (n_stores, n_hours, n_drinks)
+
+
+def store_ids(df: pd.DataFrame) -> pd.Series:
+    """Store id of each row as a string, DEFAULT_STORE when there is no store column."""
+    if STORE_COLUMN in df.columns:
+        return df[STORE_COLUMN].astype(str)
+    return pd.Series(DEFAULT_STORE, index=df.index)
+
+
+def hour_of_day_mix(
+    df: pd.DataFrame,
+    stores: List[str],
+    drinks: List[str],
+    prior_weight: float = MIX_PRIOR_WEIGHT,
+) -> np.ndarray:
+    """
+    Share of each drink among a store's orders in each hour of the day.
+
+    Each hour's counts are blended with prior_weight pseudo-orders of the
+    store's overall mix.
+
+    Args:
+        df: Transactions with datetime and coffee_name columns
+        stores: Store ids, fixing the first axis order
+        drinks: Drink names, fixing the last axis order
+        prior_weight: Pseudo-orders of the store-wide mix per hour
+
+    Returns:
+        Array of shape (n_stores, 24, n_drinks) whose last axis sums to 1
+    """
+    store_codes = pd.Index(stores).get_indexer(store_ids(df))
+    drink_codes = pd.Index(drinks).get_indexer(df["coffee_name"])
+    hours = df["datetime"].dt.hour.to_numpy()
+    keep = (store_codes >= 0) & (drink_codes >= 0)
+    flat = (store_codes[keep] * HOURS_PER_DAY + hours[keep]) * len(drinks) + drink_codes[keep]
+    counts = np.bincount(flat, minlength=len(stores) * HOURS_PER_DAY * len(drinks)).astype(float)
+    counts = counts.reshape(len(stores), HOURS_PER_DAY, len(drinks))
+
+    store_totals = counts.sum(axis=1)
+    store_mix = store_totals / np.maximum(store_totals.sum(axis=1, keepdims=True), 1.0)
+    blended = counts + prior_weight * store_mix[:, None, :]
+    return blended / np.maximum(blended.sum(axis=2, keepdims=True), 1e-12)
+
+
+def forecast_drink_demand(
+    df: pd.DataFrame,
+    horizon_days: int = HORIZON_DAYS,
+    training_days: int = TRAINING_DAYS,
+    daily_order: int = DAILY_ORDER,
+    weekly_order: int = WEEKLY_ORDER,
+    prior_weight: float = MIX_PRIOR_WEIGHT,
+) -> DrinkDemand:
+    """
+    Forecast hourly orders for every store and split them across drinks.
+
+    Args:
+        df: Transactions with parsed datetime and coffee_name (and optionally store)
+        horizon_days: Whole days to plan, starting after each store's last day in df
+        training_days: Days of each store's history for the order forecast and the drink mix
+        daily_order: Daily Fourier pairs of the hourly forecaster
+        weekly_order: Weekly Fourier pairs of the hourly forecaster
+        prior_weight: Pseudo-orders of the store-wide mix per hour
+
+    Returns:
+        DrinkDemand for horizon_days * 24 hours
+    """
+    df = df.assign(**{STORE_COLUMN: store_ids(df)})
+    steps = horizon_days * HOURS_PER_DAY
+    table = forecast_hourly_counts(df, steps=steps, group_cols=(STORE_COLUMN,), training_days=training_days,
+                                   daily_order=daily_order, weekly_order=weekly_order)
+    stores = table[STORE_COLUMN].iloc[::steps].tolist()
+    orders = table["forecast"].to_numpy().reshape(len(stores), steps)
+    hours = table["datetime"].to_numpy().reshape(len(stores), steps)
+
+    # Same window as the forecaster: each store's own last training_days
+    last_day = df.groupby(STORE_COLUMN)["datetime"].transform("max").dt.normalize()
+    cutoff = last_day - pd.Timedelta(days=training_days - 1)
+    recent = df[df["datetime"] >= cutoff]
+    drinks = sorted(df["coffee_name"].unique())
+    mix = hour_of_day_mix(recent, stores, drinks, prior_weight)
+    hour_of_day = table["datetime"].dt.hour.to_numpy().reshape(len(stores), steps)
+    by_drink = orders[:, :, None] * mix[np.arange(len(stores))[:, None], hour_of_day, :]
+    return DrinkDemand(stores=stores, hours=hours, drinks=drinks, orders=orders, by_drink=by_drink)
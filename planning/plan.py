@@ -0,0 +1,161 @@
+"""Per-hour staffing and per-day ingredient requirements for every store in one batch."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from instrumentation import span, traced
+from promotional_analysis.hourly_forecast import HOURS_PER_DAY
+from transaction_store import parse_transaction_times, read_transactions
+
+from .config import (
+    HORIZON_DAYS,
+    INGREDIENTS,
+    MIN_STAFF_OPEN,
+    ORDERS_PER_BARISTA_HOUR,
+    STAFF_SERVICE_LEVEL,
+    STOCK_SERVICE_LEVEL,
+)
+from .demand import DrinkDemand, forecast_drink_demand
+from .recipes import recipe_matrix
+
+
+def plan_staffing(
+    orders: np.ndarray,
+    capacity: float = ORDERS_PER_BARISTA_HOUR,
+    service_level: float = STAFF_SERVICE_LEVEL,
+    min_staff: int = MIN_STAFF_OPEN,
+) -> np.ndarray:
+    """
+    Fewest baristas per hour whose capacity covers demand with the given probability.
+
+    Hourly orders are taken as Poisson with the forecast mean, so the
+    smallest feasible crew is ceil(Poisson quantile / capacity). Hours with
+    expected orders get at least min_staff; closed hours get none. Each hour
+    is independent (no shift-length constraints), so the whole (stores x
+    hours) array is solved elementwise.
+
+    Args:
+        orders: Expected orders, any shape (e.g. (n_stores, n_hours))
+        capacity: Orders one barista serves per hour
+        service_level: Probability that the crew covers an hour's demand
+        min_staff: Crew size while open
+
+    Returns:
+        Integer array of the same shape as orders
+    """
+    needed = np.nan_to_num(stats.poisson.ppf(service_level, orders))
+    staff = np.ceil(needed / capacity).astype(np.int64)
+    return np.where(orders > 0, np.maximum(staff, min_staff), 0)
+
+
+def plan_ingredients(
+    by_drink: np.ndarray, recipes: np.ndarray, service_level: float = STOCK_SERVICE_LEVEL
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expected daily ingredient use and the safety stock covering its variability.
+
+    Drink counts are Poisson, so an ingredient's daily variance is the sum of
+    each drink's expected count times its recipe quantity squared.
+
+    Args:
+        by_drink: Expected drinks of shape (n_stores, n_hours, n_drinks), whole days from midnight
+        recipes: Ingredient quantity per drink, shape (n_drinks, n_ingredients)
+        service_level: Probability that expected use plus safety stock covers a day
+
+    Returns:
+        Tuple of (expected, safety_stock), each of shape (n_stores, n_days, n_ingredients)
+    """
+    n_stores, n_hours, n_drinks = by_drink.shape
+    daily = by_drink.reshape(n_stores, n_hours // HOURS_PER_DAY, HOURS_PER_DAY, n_drinks).sum(axis=2)
+    expected = daily @ recipes
+    safety = stats.norm.ppf(service_level) * np.sqrt(daily @ recipes ** 2)
+    return expected, safety
+
+
+def build_plan(df: pd.DataFrame, horizon_days: int = HORIZON_DAYS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Staffing and ingredient plan for every store over the next horizon_days.
+
+    Args:
+        df: Transactions with parsed datetime and coffee_name (and optionally store)
+        horizon_days: Whole days to plan after each store's last day in df
+
+    Returns:
+        Tuple of (staffing table with store, datetime, expected_orders, staff;
+        ingredient table with store, date, ingredient, expected, safety_stock, stock)
+    """
+    demand: DrinkDemand = forecast_drink_demand(df, horizon_days=horizon_days)
+    n_stores, n_hours = demand.orders.shape
+    staff = plan_staffing(demand.orders)
+    staffing = pd.DataFrame({
+        "store": np.repeat(demand.stores, n_hours),
+        "datetime": demand.hours.ravel(),
+        "expected_orders": demand.orders.ravel(),
+        "staff": staff.ravel(),
+    })
+
+    recipes = recipe_matrix(demand.drinks)
+    expected, safety = plan_ingredients(demand.by_drink, recipes.to_numpy())
+    days = demand.hours[:, ::HOURS_PER_DAY]
+    n_days, n_ingredients = days.shape[1], len(INGREDIENTS)
+    ingredients = pd.DataFrame({
+        "store": np.repeat(demand.stores, n_days * n_ingredients),
+        "date": np.repeat(days.ravel(), n_ingredients),
+        "ingredient": np.tile(INGREDIENTS, n_stores * n_days),
+        "expected": expected.ravel(),
+        "safety_stock": safety.ravel(),
+    })
+    ingredients["stock"] = ingredients["expected"] + ingredients["safety_stock"]
+    return staffing, ingredients
+
+
+@traced("planning_main", "planning")
+def planning_main(
+    data_path: str | Path | None = None,
+    stores: List[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    horizon_days: int = HORIZON_DAYS,
+    output_dir: str | Path | None = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Plan baristas per hour and milk/beans per day for the days after the data.
+
+    Args:
+        data_path: Optional path to CSV file or partitioned dataset root
+        stores: Optional store ids to plan. If None, plans every store
+        start: Optional inclusive start of the history window
+        end: Optional exclusive end of the history window
+        horizon_days: Whole days to plan
+        output_dir: Optional directory for staffing.csv and ingredients.csv
+
+    Returns:
+        Tuple of (staffing, ingredients) tables from build_plan
+    """
+    with span("load_transactions", "planning") as stage:
+        df = parse_transaction_times(read_transactions(data_path, stores=stores, start=start, end=end))
+        stage.rows_out = len(df)
+    with span("build_plan", "planning", rows_in=len(df)) as stage:
+        staffing, ingredients = build_plan(df, horizon_days)
+        stage.rows_out = len(staffing)
+
+    peak = staffing.groupby("store")["staff"].max()
+    hours = staffing.groupby("store")["staff"].sum()
+    print(f"Staffing plan for {horizon_days} days: barista-hours per store {hours.to_dict()}, "
+          f"peak crew {peak.to_dict()}")
+    daily = ingredients.pivot_table(index=["store", "date"], columns="ingredient", values="stock")
+    print("Daily stock to hold (expected use plus safety stock):")
+    print(daily.round(0).to_string())
+
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        staffing.to_csv(output_dir / "staffing.csv", index=False)
+        ingredients.to_csv(output_dir / "ingredients.csv", index=False)
+        print(f"Plans written to {output_dir}")
+    return staffing, ingredients
@@ -0,0 +1,33 @@
+"""Per-drink ingredient quantities derived from the milk/coffee recipe ratios."""
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from eda_milk_ratio.eda_milk_ratio_deps.milk_ratio_calculations import DEFAULT_MILK_COFFEE, MILK_MAP
+
+from .config import BEANS_PER_DOSE_G, DEFAULT_DRINK_VOLUME_ML, DRINK_VOLUME_ML, INGREDIENTS
+
+
+def recipe_matrix(drinks: Sequence[str]) -> pd.DataFrame:
+    """
+    Ingredient quantities per drink sold.
+
+    Args:
+        drinks: Drink names as they appear in 'coffee_name'
+
+    Returns:
+        DataFrame indexed by drink with one column per ingredient (milk_ml, beans_g)
+    """
+    ratios = np.array([MILK_MAP.get(drink, DEFAULT_MILK_COFFEE) for drink in drinks], dtype=float).reshape(-1, 2)
+    milk_share = ratios[:, 0] / ratios.sum(axis=1)
+    volume = np.array([DRINK_VOLUME_ML.get(drink, DEFAULT_DRINK_VOLUME_ML) for drink in drinks], dtype=float)
+    return pd.DataFrame(
+        {
+            "milk_ml": volume * milk_share,
+            "beans_g": np.where(ratios[:, 1] > 0, BEANS_PER_DOSE_G, 0.0),
+        },
+        index=pd.Index(drinks, name="coffee_name"),
+    )[list(INGREDIENTS)]
@@ -0,0 +1,18 @@
+"""Live POS event ingestion into incrementally updated rolling aggregates."""
+
+from .state import Event, IncrementalSES, RollingState, normalize_coffee_name, parse_event
+from .sources import LineDecoder, consume_stream, tail_file
+from .service import StreamService, serve
+
+__all__ = [
+    "Event",
+    "IncrementalSES",
+    "RollingState",
+    "normalize_coffee_name",
+    "parse_event",
+    "LineDecoder",
+    "consume_stream",
+    "tail_file",
+    "StreamService",
+    "serve",
+]
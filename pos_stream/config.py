@@ -0,0 +1,36 @@
+"""Centralized configuration for the live POS ingestion package."""
+from __future__ import annotations
+
+import pandas as pd
+
+from transaction_store import DEFAULT_DATA_PATH, DEFAULT_STORE
+from transaction_store.config import VISIT_GAP
+
+# Event schema: same columns (and order) as the transactions csv, plus an optional store
+EVENT_COLUMNS = ("date", "datetime", "cash_type", "card", "money", "coffee_name")
+# Columns every row must carry; date is redundant with datetime and may be missing
+EVENT_FIELDS = ("datetime", "cash_type", "card", "money", "coffee_name")
+STORE_COLUMN = "store"
+
+# Network endpoints (newline-delimited csv rows in, one JSON reply per query line out)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_INGEST_PORT = 8765
+DEFAULT_QUERY_PORT = 8766
+
+# File tail polling interval when no new lines are available
+TAIL_POLL_SECONDS = 0.2
+
+# Replay harness defaults: 3600x plays one hour of transactions per second, and idle
+# stretches (nights, closed days) are capped so a full replay stays short
+REPLAY_DATA_PATH = DEFAULT_DATA_PATH
+DEFAULT_REPLAY_SPEED = 3600.0
+DEFAULT_MAX_GAP_SECONDS = 0.5
+
+# Most recent anomaly alerts kept per store for the 'alerts' query
+ALERT_HISTORY = 100
+
+# Card purchases at most this far apart are one visit, as in transaction_store.sessions
+CARD_VISIT_GAP = pd.Timedelta(VISIT_GAP).to_pytimedelta()
+
+# Store used for events without a store field
+DEFAULT_EVENT_STORE = DEFAULT_STORE
@@ -0,0 +1,271 @@
+"""Replay a transactions csv as a live event stream, and check the live state against batch results."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from promotional_analysis.batch_forecast import batch_forecast
+from promotional_analysis.config_loader import load_config
+from promotional_analysis.data_loader import normalize_coffee_names, prepare_daily_coffee_sales
+from promotional_analysis.promotion_recommendation import recommend_daily_promotions
+from transaction_store import assign_visits
+
+from .config import DEFAULT_HOST, DEFAULT_INGEST_PORT, DEFAULT_MAX_GAP_SECONDS, DEFAULT_REPLAY_SPEED, REPLAY_DATA_PATH
+from .service import StreamService
+
+# Rows written between drains of the socket buffer when replaying without delays
+DRAIN_EVERY = 500
+
+
+def iter_rows(path: str | Path, limit: int | None = None) -> Iterator[Tuple[datetime, str]]:
+    """
+    Yield (timestamp, raw csv line) for each data row, header first with no timestamp.
+
+    Args:
+        path: Transactions csv
+        limit: Optional maximum number of data rows
+
+    Yields:
+        Tuples of (timestamp or None for the header, line including newline)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline()
+        columns = header.strip().split(",")
+        position = columns.index("datetime")
+        yield None, header
+        for count, line in enumerate(f):
+            if limit is not None and count >= limit:
+                return
+            yield datetime.fromisoformat(line.split(",")[position]), line
+
+
+async def replay(
+    path: str | Path,
+    send: Callable[[str], Awaitable[None]],
+    speed: float = DEFAULT_REPLAY_SPEED,
+    max_gap: float = DEFAULT_MAX_GAP_SECONDS,
+    limit: int | None = None,
+) -> int:
+    """
+    Send csv rows in order, spaced by their original timestamps divided by speed.
+
+    Args:
+        path: Transactions csv
+        send: Coroutine function receiving each line
+        speed: Time compression factor. 0 sends as fast as possible
+        max_gap: Longest wait between two rows, in wall seconds
+        limit: Optional maximum number of data rows
+
+    Returns:
+        Number of data rows sent
+    """
+    start = time.perf_counter()
+    offset = 0.0
+    previous = None
+    sent = 0
+    for stamp, line in iter_rows(path, limit):
+        if stamp is not None:
+            if speed > 0 and previous is not None:
+                offset += min((stamp - previous).total_seconds() / speed, max_gap)
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            previous = stamp
+            sent += 1
+        await send(line)
+    return sent
+
+
+async def replay_to_socket(path: str | Path, host: str, port: int, **kwargs) -> int:
+    """Replay a csv into an ingest socket. Keyword arguments are passed to replay."""
+    _, writer = await asyncio.open_connection(host, port)
+    written = 0
+
+    async def send(line: str) -> None:
+        nonlocal written
+        writer.write(line.encode("utf-8"))
+        written += 1
+        if written % DRAIN_EVERY == 0 or kwargs.get("speed", DEFAULT_REPLAY_SPEED) > 0:
+            await writer.drain()
+
+    try:
+        return await replay(path, send, **kwargs)
+    finally:
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+
+async def replay_to_file(path: str | Path, target: str | Path, **kwargs) -> int:
+    """Replay a csv by appending to a file another process tails."""
+    with open(target, "a", encoding="utf-8") as out:
+        async def send(line: str) -> None:
+            out.write(line)
+            out.flush()
+        return await replay(path, send, **kwargs)
+
+
+def verify_state(service: StreamService, path: str | Path, limit: int | None = None) -> Dict[str, Any]:
+    """
+    Compare the live aggregates with the batch functions on the same rows.
+
+    Args:
+        service: Service that ingested the replay
+        path: Replayed csv
+        limit: Row limit used for the replay
+
+    Returns:
+        Dictionary of check name to {'ok', 'live', 'batch'}
+    """
+    df = pd.read_csv(path, nrows=limit)
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    df = normalize_coffee_names(df)
+    state = service.state()
+    checks = {}
+
+    def record(name, live, batch, ok):
+        checks[name] = {"ok": bool(ok), "live": live, "batch": batch}
+
+    last_day = df["datetime"].dt.date.max()
+    today_sales = df.loc[df["datetime"].dt.date == last_day, "money"].sum()
+    record("today_sales", state.today_sales, today_sales, np.isclose(state.today_sales, today_sales))
+
+    promotions = recommend_daily_promotions(
+        prepare_daily_coffee_sales(df), service.profit_margins, service.rolling_window, service.default_margin
+    )
+    record("promotion", state.current_promotion(), promotions.iloc[-1],
+           state.current_promotion() == promotions.iloc[-1])
+
+    live = state.forecast()
+    sales = batch_forecast(df, group_cols=(), value_col="money")["forecast"].iloc[0]
+    record("sales_forecast", live["sales"], sales, np.isclose(live["sales"], sales))
+    coffees = batch_forecast(df).set_index("new_coffee_name")["forecast"]
+    live_coffees = pd.Series(live["coffees"]).reindex(coffees.index)
+    record("coffee_forecast", float(live_coffees.sum()), float(coffees.sum()),
+           np.allclose(live_coffees, coffees))
+
+    cards = df[(df["cash_type"] == "card") & df["card"].notna()]
+    cards = cards.assign(visit_id=assign_visits(cards))
+    summary = cards.groupby("card").agg(total_visits=("visit_id", "nunique"), total_spent=("money", "sum"),
+                                        last_visit=("datetime", "max"))
+    summary["days_since_last_visit"] = (cards["datetime"].max() - summary["last_visit"]).dt.days
+    live_rfm = pd.DataFrame([state.card_rfm(card) for card in summary.index]).set_index("card")
+    rfm_ok = (
+        (live_rfm["total_visits"] == summary["total_visits"]).all()
+        and np.allclose(live_rfm["total_spent"], summary["total_spent"])
+        and (live_rfm["days_since_last_visit"] == summary["days_since_last_visit"]).all()
+    )
+    record("card_rfm", len(live_rfm), len(summary), rfm_ok)
+    return checks
+
+
+def query_latency(service: StreamService, command: str = "snapshot", repeat: int = 200) -> Dict[str, float]:
+    """
+    Time in-process query answers.
+
+    Args:
+        service: Service to query
+        command: Query command
+        repeat: Number of calls
+
+    Returns:
+        Dictionary with p50 and p99 latency in microseconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        service.query(command)
+        timings.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(timings, [50, 99]) * 1e6
+    return {"p50_us": float(p50), "p99_us": float(p99)}
+
+
+async def run_harness(
+    path: str | Path,
+    speed: float,
+    max_gap: float,
+    limit: int | None,
+    config_path: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Replay into an in-process service over a local socket, then verify it.
+
+    Args:
+        path: Transactions csv
+        speed: Time compression factor (0 for no delays)
+        max_gap: Longest wait between two rows, in wall seconds
+        limit: Optional maximum number of data rows
+        config_path: Optional config.json path
+
+    Returns:
+        Dictionary with rows sent, malformed rows, elapsed seconds, checks and query latency
+    """
+    service = StreamService(load_config(config_path))
+    ingest_server, query_server = await service.start(DEFAULT_HOST, 0, 0)
+    port = ingest_server.sockets[0].getsockname()[1]
+
+    start = time.perf_counter()
+    sent = await replay_to_socket(path, DEFAULT_HOST, port, speed=speed, max_gap=max_gap, limit=limit)
+    # Every sent row is either ingested or counted as malformed
+    while service.events + service.decode_errors < sent:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    for server in (ingest_server, query_server):
+        server.close()
+        await server.wait_closed()
+
+    return {
+        "rows": sent,
+        "decode_errors": service.decode_errors,
+        "elapsed_seconds": elapsed,
+        "checks": verify_state(service, path, limit),
+        "latency": {command: query_latency(service, command) for command in ("snapshot", "promotion", "forecast")},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay transactions as a live POS stream.")
+    parser.add_argument("--data-path", default=str(REPLAY_DATA_PATH))
+    parser.add_argument("--speed", type=float, default=DEFAULT_REPLAY_SPEED,
+                        help="Time compression factor; 0 replays without delays")
+    parser.add_argument("--max-gap", type=float, default=DEFAULT_MAX_GAP_SECONDS,
+                        help="Longest wall-clock wait between rows, in seconds")
+    parser.add_argument("--limit", type=int, default=None, help="Only replay the first N rows")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=None,
+                        help=f"Send to a running service's ingest port (usually {DEFAULT_INGEST_PORT})")
+    parser.add_argument("--file", default=None, help="Append rows to this file instead of a socket")
+    parser.add_argument("--config-path", default=None)
+    args = parser.parse_args()
+    options = {"speed": args.speed, "max_gap": args.max_gap, "limit": args.limit}
+
+    if args.file is not None:
+        sent = asyncio.run(replay_to_file(args.data_path, args.file, **options))
+        print(f"Appended {sent} rows to {args.file}")
+        return
+    if args.port is not None:
+        sent = asyncio.run(replay_to_socket(args.data_path, args.host, args.port, **options))
+        print(f"Sent {sent} rows to {args.host}:{args.port}")
+        return
+
+    result = asyncio.run(run_harness(args.data_path, args.speed, args.max_gap, args.limit, args.config_path))
+    print(f"Replayed {result['rows']} rows in {result['elapsed_seconds']:.2f}s "
+          f"({result['decode_errors']} malformed)")
+    for name, check in result["checks"].items():
+        status = "ok" if check["ok"] else "MISMATCH"
+        print(f"  {name:<16} {status:<9} live={check['live']} batch={check['batch']}")
+    for command, timing in result["latency"].items():
+        print(f"  query {command:<10} p50={timing['p50_us']:.0f}us p99={timing['p99_us']:.0f}us")
+    if not all(check["ok"] for check in result["checks"].values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Ingestion service: per-store rolling state behind an ingest socket and a query socket."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from promotional_analysis.anomaly_detection import AlertSink
+from promotional_analysis.config_loader import load_config
+
+from .config import DEFAULT_EVENT_STORE, DEFAULT_HOST, DEFAULT_INGEST_PORT, DEFAULT_QUERY_PORT
+from .sources import consume_stream, tail_file
+from .state import Event, RollingState
+
+
+class StreamService:
+    """
+    Routes events to one RollingState per store and answers queries.
+
+    Query protocol: one command per line, one JSON object per reply line.
+
+    - ``snapshot [store]``: today's totals, promotion and forecast
+    - ``promotion [store]``: the drink to promote today
+    - ``forecast [store]``: next-day sales and per-coffee forecast
+    - ``card <id> [store]``: RFM values and hour histogram of a card
+    - ``alerts [store]``: recent anomaly alerts on closed days
+    - ``stores``: stores seen so far, events ingested and malformed rows skipped
+
+    Queries for a store that has not sent any events return an error.
+
+    Alerts are also appended to the ``alert_target`` of the
+    ``anomaly_detection`` config section (a file, or tcp://host:port).
+    """
+
+    def __init__(self, config: Dict[str, Any] | None = None) -> None:
+        config = load_config() if config is None else config
+        margins = dict(config.get("profit_margins", {}))
+        self.default_margin = margins.pop("default", 2.0)
+        self.profit_margins = margins
+        self.rolling_window = config.get("promotion", {}).get("rolling_window", 7)
+        self.anomaly_settings = config.get("anomaly_detection")
+        self.alert_target = None if self.anomaly_settings is None else self.anomaly_settings.get("alert_target")
+        self.alert_sink: AlertSink | None = None
+        self.states: Dict[str, RollingState] = {}
+        self.events = 0
+        self.decode_errors = 0
+
+    def state(self, store: str = DEFAULT_EVENT_STORE) -> RollingState:
+        """Return the rolling state of a store, creating it on first use."""
+        state = self.states.get(store)
+        if state is None:
+            state = RollingState(
+                self.profit_margins, self.rolling_window, self.default_margin,
+                self.anomaly_settings, lambda alert: self.emit_alert({**alert, "store": store}),
+            )
+            self.states[store] = state
+        return state
+
+    def emit_alert(self, alert: Dict[str, Any]) -> None:
+        """Send one alert to the configured sink, opening it on first use."""
+        if not self.alert_target:
+            return
+        if self.alert_sink is None:
+            self.alert_sink = AlertSink(self.alert_target)
+        self.alert_sink.emit([alert])
+
+    def ingest(self, event: Event) -> None:
+        """Apply one event to its store's state."""
+        self.state(event.store).ingest(event)
+        self.events += 1
+
+    def reject(self, line: str) -> None:
+        """Count a row that did not match the event schema."""
+        self.decode_errors += 1
+
+    def query(self, command: str) -> Dict[str, Any]:
+        """
+        Answer one query command.
+
+        Args:
+            command: Command line, e.g. 'snapshot' or 'card ANON-0000-0000-0001'
+
+        Returns:
+            JSON-serialisable reply; contains 'error' for unknown commands and stores
+        """
+        parts = command.split()
+        if not parts:
+            return {"error": "empty command"}
+        name, args = parts[0].lower(), parts[1:]
+        if name == "stores":
+            return {"stores": sorted(self.states), "events": self.events, "decode_errors": self.decode_errors}
+        if name == "card":
+            if not args:
+                return {"error": "usage: card <id> [store]"}
+            store = args[1] if len(args) > 1 else DEFAULT_EVENT_STORE
+            if store not in self.states:
+                return {"error": f"unknown store {store}"}
+            rfm = self.states[store].card_rfm(args[0])
+            return rfm if rfm is not None else {"error": f"unknown card {args[0]}"}
+
+        if name not in ("snapshot", "promotion", "forecast", "alerts"):
+            return {"error": f"unknown command {name}"}
+        store = args[0] if args else DEFAULT_EVENT_STORE
+        state = self.states.get(store)
+        if state is None:
+            return {"error": f"unknown store {store}"}
+        if name == "snapshot":
+            return state.snapshot()
+        if name == "promotion":
+            return {"today": state.current_day, "promotion": state.current_promotion()}
+        if name == "forecast":
+            return state.forecast()
+        return {"alerts": list(state.alerts)}
+
+    async def handle_ingest(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Connection handler that ingests newline-delimited csv rows until EOF."""
+        try:
+            await consume_stream(reader, self.ingest, self.reject)
+        finally:
+            writer.close()
+
+    async def handle_query(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Connection handler that answers one JSON line per command line."""
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                reply = self.query(raw.decode("utf-8"))
+                writer.write(json.dumps(reply, default=str).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(
+        self,
+        host: str = DEFAULT_HOST,
+        ingest_port: int | None = DEFAULT_INGEST_PORT,
+        query_port: int = DEFAULT_QUERY_PORT,
+    ) -> List[asyncio.AbstractServer]:
+        """
+        Start the socket servers.
+
+        Args:
+            host: Interface to bind
+            ingest_port: Port for event producers. If None, no ingest socket is opened
+            query_port: Port for queries. Use 0 to pick a free port
+
+        Returns:
+            Started servers, query server last
+        """
+        servers = []
+        if ingest_port is not None:
+            servers.append(await asyncio.start_server(self.handle_ingest, host, ingest_port))
+        servers.append(await asyncio.start_server(self.handle_query, host, query_port))
+        return servers
+
+
+async def serve(
+    host: str = DEFAULT_HOST,
+    ingest_port: int | None = DEFAULT_INGEST_PORT,
+    query_port: int = DEFAULT_QUERY_PORT,
+    tail_path: str | None = None,
+    config_path: str | None = None,
+) -> None:
+    """
+    Run the ingestion service until cancelled.
+
+    Args:
+        host: Interface to bind
+        ingest_port: Port for event producers. If None, only the tailed file is ingested
+        query_port: Port for queries
+        tail_path: Optional csv file to follow
+        config_path: Optional config.json path for margins and the rolling window
+    """
+    service = StreamService(load_config(config_path))
+    servers = await service.start(host, ingest_port, query_port)
+    for server in servers:
+        for sock in server.sockets:
+            print(f"Listening on {sock.getsockname()[0]}:{sock.getsockname()[1]}")
+    tasks = [asyncio.create_task(server.serve_forever()) for server in servers]
+    if tail_path is not None:
+        print(f"Tailing {tail_path}")
+        tasks.append(asyncio.create_task(tail_file(tail_path, service.ingest, on_error=service.reject)))
+    await asyncio.gather(*tasks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Live POS ingestion into rolling aggregates.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--ingest-port", type=int, default=DEFAULT_INGEST_PORT)
+    parser.add_argument("--no-ingest-socket", action="store_true",
+                        help="Only ingest from --tail")
+    parser.add_argument("--query-port", type=int, default=DEFAULT_QUERY_PORT)
+    parser.add_argument("--tail", default=None, help="Csv file to follow")
+    parser.add_argument("--config-path", default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(
+            args.host,
+            None if args.no_ingest_socket else args.ingest_port,
+            args.query_port,
+            args.tail,
+            args.config_path,
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
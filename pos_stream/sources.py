@@ -0,0 +1,125 @@
+"""Asyncio event sources: newline-delimited csv over a socket, or a tailed file."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Callable, List, Sequence
+
+from .config import EVENT_COLUMNS, TAIL_POLL_SECONDS
+from .state import Event, parse_event
+
+# Events processed between yields to the event loop while catching up on a file
+YIELD_EVERY = 1000
+
+
+class LineDecoder:
+    """
+    Turns csv lines into events, honouring an optional header row.
+
+    A line starting with the first schema column name is treated as a header
+    and sets the column order for the following rows. Malformed rows are
+    counted in ``errors``, passed to ``on_error`` if given, and skipped.
+    """
+
+    def __init__(self, columns: Sequence[str] = EVENT_COLUMNS, on_error: Callable[[str], None] | None = None) -> None:
+        self.columns: List[str] = list(columns)
+        self.errors = 0
+        self.on_error = on_error
+
+    def decode(self, line: str) -> Event | None:
+        line = line.strip()
+        if not line:
+            return None
+        if line.startswith(EVENT_COLUMNS[0] + ","):
+            self.columns = line.split(",")
+            return None
+        try:
+            return parse_event(line, self.columns)
+        except ValueError:
+            self.errors += 1
+            if self.on_error is not None:
+                self.on_error(line)
+            return None
+
+
+async def consume_stream(
+    reader: asyncio.StreamReader,
+    sink: Callable[[Event], None],
+    on_error: Callable[[str], None] | None = None,
+) -> int:
+    """
+    Feed every event read from a stream to a sink until EOF.
+
+    Args:
+        reader: Stream of newline-delimited csv rows
+        sink: Callable applied to each parsed event
+        on_error: Optional callable receiving each malformed row
+
+    Returns:
+        Number of events delivered
+    """
+    decoder = LineDecoder(on_error=on_error)
+    delivered = 0
+    while True:
+        raw = await reader.readline()
+        if not raw:
+            return delivered
+        event = decoder.decode(raw.decode("utf-8"))
+        if event is not None:
+            sink(event)
+            delivered += 1
+
+
+async def tail_file(
+    path: str | Path,
+    sink: Callable[[Event], None],
+    from_start: bool = True,
+    poll_interval: float = TAIL_POLL_SECONDS,
+    stop: asyncio.Event | None = None,
+    on_error: Callable[[str], None] | None = None,
+) -> int:
+    """
+    Follow a growing csv file and feed appended rows to a sink.
+
+    Partial lines (a writer mid-append) are kept until their newline arrives.
+
+    Args:
+        path: File to follow; waits for it to appear
+        sink: Callable applied to each parsed event
+        from_start: Replay existing rows first. If False, starts at the end of the file
+        poll_interval: Seconds to sleep when no new data is available
+        stop: Optional event that ends the tail once set
+        on_error: Optional callable receiving each malformed row
+
+    Returns:
+        Number of events delivered
+    """
+    path = Path(path)
+    while not path.exists():
+        if stop is not None and stop.is_set():
+            return 0
+        await asyncio.sleep(poll_interval)
+
+    decoder = LineDecoder(on_error=on_error)
+    delivered = 0
+    pending = ""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if not from_start:
+            f.seek(0, 2)
+        while True:
+            chunk = f.readline()
+            if chunk:
+                pending += chunk
+                if not pending.endswith("\n"):
+                    continue
+                event = decoder.decode(pending)
+                pending = ""
+                if event is not None:
+                    sink(event)
+                    delivered += 1
+                    if delivered % YIELD_EVERY == 0:
+                        await asyncio.sleep(0)  # let queries run during a large backlog
+                continue
+            if stop is not None and stop.is_set():
+                return delivered
+            await asyncio.sleep(poll_interval)
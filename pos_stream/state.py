@@ -0,0 +1,371 @@
+"""Incrementally maintained rolling aggregates over a stream of POS transactions."""
+from __future__ import annotations
+
+import csv
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+from promotional_analysis.anomaly_detection import RollingRobustDetector
+from promotional_analysis.batch_forecast import SES_ALPHA_GRID
+from promotional_analysis.data_loader import COFFEE_NAME_MERGES
+
+from .config import ALERT_HISTORY, CARD_VISIT_GAP, DEFAULT_EVENT_STORE, EVENT_COLUMNS, EVENT_FIELDS, STORE_COLUMN
+
+
+@dataclass(slots=True)
+class Event:
+    """One parsed transaction."""
+    timestamp: datetime
+    cash_type: str
+    card: str | None
+    money: float
+    coffee_name: str
+    store: str = DEFAULT_EVENT_STORE
+
+    @property
+    def day(self) -> date:
+        return self.timestamp.date()
+
+
+def normalize_coffee_name(name: str) -> str:
+    """Single-value counterpart of promotional_analysis.normalize_coffee_names."""
+    for variant, merged in COFFEE_NAME_MERGES:
+        name = name.replace(variant, merged)
+    return name
+
+
+def parse_event(line: str, columns: Sequence[str] = EVENT_COLUMNS) -> Event:
+    """
+    Parse one csv row of the transactions schema.
+
+    Args:
+        line: Csv-formatted row without the trailing newline
+        columns: Column names in row order (the stream's header, if it sent one)
+
+    Returns:
+        Parsed Event
+
+    Raises:
+        ValueError: If the row does not match the schema
+    """
+    values = next(csv.reader([line]))
+    if len(values) != len(columns):
+        raise ValueError(f"Expected {len(columns)} fields, got {len(values)}: {line!r}")
+    row = dict(zip(columns, values))
+    missing = [col for col in EVENT_FIELDS if col not in row]
+    if missing:
+        raise ValueError(f"Missing schema columns {missing}: {line!r}")
+    return Event(
+        timestamp=datetime.fromisoformat(row["datetime"]),
+        cash_type=row["cash_type"],
+        card=row["card"] or None,
+        money=float(row["money"]),
+        coffee_name=row["coffee_name"],
+        store=row.get(STORE_COLUMN) or DEFAULT_EVENT_STORE,
+    )
+
+
+class IncrementalSES:
+    """
+    exponential_smoothing from batch_forecast, updated one period at a time.
+
+    Keeps the level and one-step squared error for every (series, alpha) pair,
+    so adding a period costs O(n_series x n_alphas) and the forecast always
+    equals a full refit on the history seen so far. Series added later start
+    at zero, as stack_series zero-fills them before their first sale.
+    """
+
+    def __init__(self, alphas: Sequence[float] = SES_ALPHA_GRID) -> None:
+        self.alphas = np.asarray(alphas, dtype=float)
+        self.level = np.zeros((0, len(self.alphas)))
+        self.sse = np.zeros((0, len(self.alphas)))
+        self.n_periods = 0
+
+    def grow(self, n_series: int) -> None:
+        """Add zero-valued series so there are n_series in total."""
+        extra = n_series - len(self.level)
+        if extra > 0:
+            pad = np.zeros((extra, len(self.alphas)))
+            self.level = np.vstack([self.level, pad])
+            self.sse = np.vstack([self.sse, pad])
+
+    def _step(self, level: np.ndarray, sse: np.ndarray, values: np.ndarray, first: bool):
+        if first:
+            return np.repeat(values[:, None], len(self.alphas), axis=1), sse
+        error = values[:, None] - level
+        return level + self.alphas[None, :] * error, sse + error ** 2
+
+    def update(self, values: np.ndarray) -> None:
+        """Append one period of observations (one value per series)."""
+        self.grow(len(values))
+        self.level, self.sse = self._step(self.level, self.sse, values, self.n_periods == 0)
+        self.n_periods += 1
+
+    def forecast(self, pending: np.ndarray | None = None) -> np.ndarray:
+        """
+        One-step forecast per series, as batch exponential_smoothing would give.
+
+        Args:
+            pending: Optional values of a period still in progress, included
+                without being committed
+
+        Returns:
+            Array with one forecast per series
+        """
+        level, sse = self.level, self.sse
+        if pending is not None:
+            self.grow(len(pending))
+            level, sse = self._step(self.level, self.sse, pending, self.n_periods == 0)
+        if len(level) == 0:
+            return np.zeros(0)
+        return level[np.arange(len(level)), sse.argmin(axis=1)]
+
+
+class RollingState:
+    """
+    Live aggregates for one store, updated per event in O(1) amortised time.
+
+    Tracks today's sales, the per-coffee daily counts of the last
+    ``rolling_window`` trading days (the input of recommend_daily_promotions),
+    per-card RFM and hour histograms, and SES state for the next-day sales and
+    per-coffee forecasts. A day is closed when the first event of a later day
+    arrives. Events for an already closed day still update the card
+    aggregates but not the daily ones, and are counted in ``late_events``.
+
+    With anomaly settings (the ``anomaly_detection`` section of config.json),
+    each closed day's sales and hourly counts are also scored by rolling
+    median/MAD detectors, as detect_anomalies and detect_hourly_anomalies
+    score the batch history; alerts are kept in ``alerts`` and passed to
+    ``on_alert``.
+    """
+
+    def __init__(
+        self,
+        profit_margins: Dict[str, float] | None = None,
+        rolling_window: int = 7,
+        default_margin: float = 2.0,
+        anomaly_settings: Dict[str, Any] | None = None,
+        on_alert: Callable[[Dict[str, Any]], None] | None = None,
+    ) -> None:
+        self.profit_margins = dict(profit_margins or {})
+        self.rolling_window = rolling_window
+        self.default_margin = default_margin
+
+        self.coffees: List[str] = []
+        self._coffee_index: Dict[str, int] = {}
+        self.current_day: date | None = None
+        self.today_sales = 0.0
+        self.today_transactions = 0
+        self.today_counts = np.zeros(0)
+        self.today_hours = np.zeros(24, dtype=np.int64)
+        self.recent_counts: deque = deque(maxlen=rolling_window - 1)
+
+        self.sales_model = IncrementalSES()
+        self.coffee_model = IncrementalSES()
+
+        self.sales_detector: RollingRobustDetector | None = None
+        self.hourly_detector: RollingRobustDetector | None = None
+        if anomaly_settings is not None:
+            threshold = anomaly_settings.get("threshold", 3.5)
+            self.sales_detector = RollingRobustDetector(
+                anomaly_settings.get("window", 28), threshold,
+                anomaly_settings.get("daily_period", 1), anomaly_settings.get("min_scale", 1.0),
+            )
+            self.hourly_detector = RollingRobustDetector(
+                anomaly_settings.get("hourly_window", 28), threshold, 24,
+                anomaly_settings.get("hourly_min_scale", 2.0),
+            )
+        self.alerts: deque = deque(maxlen=ALERT_HISTORY)
+        self.on_alert = on_alert
+
+        self.cards: Dict[str, List[Any]] = {}  # card -> [visits, spent, last_visit]
+        self.card_hours: Dict[str, np.ndarray] = {}
+        self.last_card_visit: datetime | None = None
+
+        self.events = 0
+        self.late_events = 0
+        self.last_event: datetime | None = None
+
+    def _coffee_slot(self, name: str) -> int:
+        slot = self._coffee_index.get(name)
+        if slot is None:
+            slot = len(self.coffees)
+            self._coffee_index[name] = slot
+            self.coffees.append(name)
+            self.today_counts = np.append(self.today_counts, 0.0)
+        return slot
+
+    def _check_day(self, day: date, sales: float, hours: np.ndarray) -> None:
+        """Score a closed day's sales and hourly counts and raise alerts for anomalies."""
+        if self.sales_detector is None:
+            return
+        scored = [("daily_sales", day.isoformat(), self.sales_detector.score(sales))]
+        for hour, count in enumerate(hours):
+            timestamp = datetime.combine(day, time(hour)).isoformat()
+            scored.append(("hourly_transactions", timestamp, self.hourly_detector.score(float(count))))
+        for series, timestamp, result in scored:
+            if result is None or not result["is_anomaly"]:
+                continue
+            alert = {"series": series, "method": "rolling_mad", "timestamp": timestamp,
+                     "value": result["value"], "expected": result["expected"], "score": result["score"]}
+            self.alerts.append(alert)
+            if self.on_alert is not None:
+                self.on_alert(alert)
+
+    def _close_day(self) -> None:
+        """Commit today's aggregates to the forecasters and the rolling window."""
+        self._check_day(self.current_day, self.today_sales, self.today_hours)
+        self.sales_model.update(np.array([self.today_sales]))
+        self.coffee_model.update(self.today_counts)
+        self.recent_counts.append(self.today_counts)
+        self.today_counts = np.zeros(len(self.coffees))
+        self.today_sales = 0.0
+        self.today_transactions = 0
+        self.today_hours[:] = 0
+
+    def _advance_to(self, day: date) -> None:
+        if self.current_day is None:
+            self.current_day = day
+            return
+        self._close_day()
+        # Days without sales are zeros in the forecast series (as in stack_series) but
+        # have no row in the daily pivot, so they do not enter the rolling window
+        gap_days = (day - self.current_day).days - 1
+        for offset in range(1, gap_days + 1):
+            self._check_day(self.current_day + timedelta(days=offset), 0.0, np.zeros(24))
+            self.sales_model.update(np.zeros(1))
+            self.coffee_model.update(np.zeros(len(self.coffees)))
+        self.current_day = day
+
+    def ingest(self, event: Event) -> None:
+        """
+        Apply one event to every aggregate.
+
+        Args:
+            event: Parsed transaction
+        """
+        self.events += 1
+        self.last_event = event.timestamp if self.last_event is None else max(self.last_event, event.timestamp)
+        hour = event.timestamp.hour
+
+        if event.cash_type == "card" and event.card:
+            stats = self.cards.get(event.card)
+            if stats is None:
+                self.cards[event.card] = [1, event.money, event.timestamp]
+                self.card_hours[event.card] = np.zeros(24, dtype=np.int64)
+            else:
+                # A purchase within CARD_VISIT_GAP of the card's last one continues that visit
+                stats[0] += event.timestamp - stats[2] > CARD_VISIT_GAP
+                stats[1] += event.money
+                stats[2] = max(stats[2], event.timestamp)
+            self.card_hours[event.card][hour] += 1
+            if self.last_card_visit is None or event.timestamp > self.last_card_visit:
+                self.last_card_visit = event.timestamp
+
+        day = event.day
+        if self.current_day is not None and day < self.current_day:
+            self.late_events += 1
+            return
+        if day != self.current_day:
+            self._advance_to(day)
+        slot = self._coffee_slot(normalize_coffee_name(event.coffee_name))
+        self.today_counts[slot] += 1
+        self.today_sales += event.money
+        self.today_transactions += 1
+        self.today_hours[hour] += 1
+
+    def current_promotion(self) -> str | None:
+        """
+        Drink to promote today, as recommend_daily_promotions would pick for the last day.
+
+        Returns:
+            Coffee name, or None before the first event
+        """
+        if self.current_day is None:
+            return None
+        width = len(self.coffees)
+        window = np.zeros((len(self.recent_counts) + 1, width))
+        for row, counts in enumerate(self.recent_counts):
+            window[row, :len(counts)] = counts
+        window[-1] = self.today_counts
+
+        # The daily pivot's columns are sorted names and idxmax keeps the first maximum
+        order = np.argsort(self.coffees, kind="stable")
+        window = window[:, order]
+        names = [self.coffees[i] for i in order]
+        margins = np.array([self.profit_margins.get(name, self.default_margin) for name in names])
+
+        trend = window.mean(axis=0)
+        score = (trend.max() - window[-1]) * margins
+        if (score <= 0).all():
+            score = margins
+        return names[int(score.argmax())]
+
+    def forecast(self) -> Dict[str, Any]:
+        """
+        Next-day SES forecast of total sales and per-coffee transactions.
+
+        Today's partial aggregates are included, so the result equals
+        batch_forecast on every event received so far.
+
+        Returns:
+            Dictionary with the forecast date, sales and per-coffee counts
+        """
+        if self.current_day is None:
+            return {"date": None, "sales": None, "coffees": {}}
+        sales = self.sales_model.forecast(np.array([self.today_sales]))
+        coffees = self.coffee_model.forecast(self.today_counts)
+        return {
+            "date": (self.current_day + timedelta(days=1)).isoformat(),
+            "sales": float(max(sales[0], 0.0)),
+            "coffees": {name: float(max(value, 0.0)) for name, value in zip(self.coffees, coffees)},
+        }
+
+    def card_rfm(self, card: str) -> Dict[str, Any] | None:
+        """
+        RFM values and hour histogram of one card, as in create_rfm_features.
+
+        Visits are counted as in transaction_store.sessions when events arrive in time order.
+
+        Args:
+            card: Card id
+
+        Returns:
+            Dictionary, or None for an unknown card
+        """
+        stats = self.cards.get(card)
+        if stats is None:
+            return None
+        visits, spent, last_visit = stats
+        return {
+            "card": card,
+            "days_since_last_visit": (self.last_card_visit - last_visit).days,
+            "total_visits": visits,
+            "total_spent": round(spent, 2),
+            "last_visit": last_visit.isoformat(),
+            "hour_histogram": self.card_hours[card].tolist(),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current view of the live aggregates.
+
+        Returns:
+            JSON-serialisable dictionary with today's totals, promotion and forecast
+        """
+        return {
+            "today": None if self.current_day is None else self.current_day.isoformat(),
+            "today_sales": round(self.today_sales, 2),
+            "today_transactions": self.today_transactions,
+            "today_hours": self.today_hours.tolist(),
+            "promotion": self.current_promotion(),
+            "forecast": self.forecast(),
+            "known_cards": len(self.cards),
+            "events": self.events,
+            "late_events": self.late_events,
+            "last_event": None if self.last_event is None else self.last_event.isoformat(),
+        }
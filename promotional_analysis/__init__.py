@@ -11,9 +11,46 @@ from .data_loader import (
 )
 from .sales_prediction import (
     predict_next_day_sales,
-    calculate_moving_average
+    calculate_moving_average,
+    fit_sales_model,
+    forecast_horizon
+)
+from .hourly_forecast import (
+    stack_hourly_counts,
+    fourier_design,
+    fit_fourier,
+    forecast_hourly_counts,
+    predict_next_day_hourly
+)
+from .anomaly_detection import (
+    RollingRobustDetector,
+    ResidualStream,
+    AlertSink,
+    detect_anomalies,
+    detect_hourly_anomalies,
+    residual_anomalies,
+    to_alerts
+)
+from .coffee_prediction import (
+    predict_most_sold_coffee_month,
+    predict_most_sold_coffee_week,
+    predict_most_sold_from_models,
+    fit_coffee_models,
+    forecast_coffee_horizon
+)
+from .order_selection import (
+    candidate_orders,
+    search_orders,
+    select_order,
+    series_fingerprint,
+    auto_order_settings
+)
+from .batch_forecast import (
+    stack_series,
+    seasonal_naive_drift,
+    exponential_smoothing,
+    batch_forecast
 )
-from .coffee_prediction import predict_most_sold_coffee_month
 from .promotion_recommendation import (
     get_default_profit_margins,
     recommend_daily_promotions,
@@ -21,11 +58,30 @@ from .promotion_recommendation import (
 )
 from .visualization import (
     plot_sales_prediction,
+    plot_sales_horizon,
     plot_coffee_predictions,
     plot_promotion_frequency,
     plot_scenario_analysis
 )
 from .config_loader import load_config, get_profit_margins
+from .backtest import (
+    rolling_origins,
+    summarize_backtest,
+    backtest_sales,
+    backtest_coffee_predictions
+)
+from .promotion_optimizer import (
+    daily_demand_and_price,
+    estimate_elasticities,
+    optimize_promotions,
+    benchmark_against_heuristic
+)
+from .scenario_runner import (
+    build_scenario_grid,
+    stack_daily_units,
+    run_scenarios,
+    to_impact_results
+)
 
 __all__ = [
     'load_data',
@@ -35,15 +91,55 @@ __all__ = [
     'prepare_daily_coffee_sales',
     'predict_next_day_sales',
     'calculate_moving_average',
+    'fit_sales_model',
+    'forecast_horizon',
+    'stack_hourly_counts',
+    'fourier_design',
+    'fit_fourier',
+    'forecast_hourly_counts',
+    'predict_next_day_hourly',
+    'RollingRobustDetector',
+    'ResidualStream',
+    'AlertSink',
+    'detect_anomalies',
+    'detect_hourly_anomalies',
+    'residual_anomalies',
+    'to_alerts',
     'predict_most_sold_coffee_month',
+    'predict_most_sold_coffee_week',
+    'predict_most_sold_from_models',
+    'fit_coffee_models',
+    'forecast_coffee_horizon',
+    'candidate_orders',
+    'search_orders',
+    'select_order',
+    'series_fingerprint',
+    'auto_order_settings',
+    'stack_series',
+    'seasonal_naive_drift',
+    'exponential_smoothing',
+    'batch_forecast',
     'load_config',
     'get_profit_margins',
     'get_default_profit_margins',
     'recommend_daily_promotions',
     'analyze_promotion_scenarios',
     'plot_sales_prediction',
+    'plot_sales_horizon',
     'plot_coffee_predictions',
     'plot_promotion_frequency',
     'plot_scenario_analysis',
+    'rolling_origins',
+    'summarize_backtest',
+    'backtest_sales',
+    'backtest_coffee_predictions',
+    'daily_demand_and_price',
+    'estimate_elasticities',
+    'optimize_promotions',
+    'benchmark_against_heuristic',
+    'build_scenario_grid',
+    'stack_daily_units',
+    'run_scenarios',
+    'to_impact_results',
 ]
 
@@ -0,0 +1,353 @@
+"""
+Anomaly detection over daily sales and hourly transaction counts.
+
+Each observation is scored against a window of earlier observations of the
+same phase (the same hour of day for hourly counts) with a robust z-score,
+(value - median) / (1.4826 * MAD), so a handful of outliers in the window
+does not hide the next one. SARIMAX residuals are scored the same way, which
+removes the trend and seasonality the model already explains.
+
+The streaming detectors keep a fixed-size window per phase, so an update
+costs the same no matter how long the stream has run; the batch functions
+score a whole history with the same definition in vectorised form.
+"""
+
+import json
+import os
+import socket
+from bisect import bisect_left, insort
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from .hourly_forecast import HOURS_PER_DAY, stack_hourly_counts
+except ImportError:
+    # Fallback for direct execution
+    from hourly_forecast import HOURS_PER_DAY, stack_hourly_counts
+
+# Makes the MAD a consistent estimate of the standard deviation for normal data
+MAD_SCALE = 1.4826
+
+
+def _robust_scores(values, medians, mads, min_scale: float):
+    """Robust z-scores with the scale floored at min_scale (MAD is 0 on flat windows)."""
+    return (values - medians) / np.maximum(MAD_SCALE * mads, min_scale)
+
+
+class RollingRobustDetector:
+    """
+    Streaming robust z-score detector with a fixed window per phase.
+
+    With period p, observation t is compared with observations t - p,
+    t - 2p, ..., t - window * p. An update inserts into a sorted window of
+    fixed size, so its cost does not grow with the length of the stream.
+
+    Args:
+        window: Earlier observations of the same phase to compare against
+        threshold: Absolute robust z-score above which an observation is flagged
+        period: Season length in observations (1 for none, 24 for hour of day)
+        min_scale: Lower bound of the robust scale
+    """
+
+    def __init__(self, window: int = 28, threshold: float = 3.5, period: int = 1,
+                 min_scale: float = 1.0):
+        self.window = window
+        self.threshold = threshold
+        self.period = period
+        self.min_scale = min_scale
+        self.position = 0
+        self._recent = [deque() for _ in range(period)]
+        self._sorted = [[] for _ in range(period)]
+
+    def score(self, value: float) -> Optional[Dict[str, float]]:
+        """
+        Score the next observation and add it to its phase's window.
+
+        Args:
+            value: Next observation of the series
+
+        Returns:
+            Dictionary with value, expected (window median), score and
+            is_anomaly, or None while the phase has fewer than window
+            earlier observations
+        """
+        phase = self.position % self.period
+        self.position += 1
+        recent, ordered = self._recent[phase], self._sorted[phase]
+
+        result = None
+        if len(recent) == self.window:
+            median = float(np.median(ordered))
+            mad = float(np.median(np.abs(np.asarray(ordered) - median)))
+            score = float(_robust_scores(value, median, mad, self.min_scale))
+            result = {'value': float(value), 'expected': median, 'score': score,
+                      'is_anomaly': abs(score) > self.threshold}
+            ordered.pop(bisect_left(ordered, recent.popleft()))
+
+        recent.append(value)
+        insort(ordered, value)
+        return result
+
+
+def detect_anomalies(series: pd.Series, window: int = 28, threshold: float = 3.5,
+                     period: int = 1, min_scale: float = 1.0) -> pd.DataFrame:
+    """
+    Score every observation of a series against its earlier window.
+
+    Gives the same scores as feeding the series through
+    RollingRobustDetector one value at a time.
+
+    Args:
+        series: Regularly spaced series (e.g. daily_sales from prepare_daily_sales)
+        window: Earlier observations of the same phase to compare against
+        threshold: Absolute robust z-score above which an observation is flagged
+        period: Season length in observations
+        min_scale: Lower bound of the robust scale
+
+    Returns:
+        DataFrame indexed like the scored part of series with 'value',
+        'expected', 'score' and 'is_anomaly' columns
+    """
+    values = series.to_numpy(dtype=float)
+    lag = window * period
+    if len(values) <= lag:
+        return pd.DataFrame(columns=['value', 'expected', 'score', 'is_anomaly'])
+
+    # Row i of the view holds values[i], values[i + period], ..., the window of values[i + lag]
+    history = sliding_window_view(values[:len(values) - period], lag - period + 1)[:, ::period]
+    medians = np.median(history, axis=1)
+    mads = np.median(np.abs(history - medians[:, None]), axis=1)
+    current = values[lag:]
+    scores = _robust_scores(current, medians, mads, min_scale)
+    return pd.DataFrame({
+        'value': current,
+        'expected': medians,
+        'score': scores,
+        'is_anomaly': np.abs(scores) > threshold,
+    }, index=series.index[lag:])
+
+
+def detect_hourly_anomalies(df: pd.DataFrame, group_cols: Sequence[str] = ('store',),
+                            window: int = 28, threshold: float = 3.5,
+                            min_scale: float = 2.0) -> pd.DataFrame:
+    """
+    Flag hours whose transaction count is unusual for that hour of the day.
+
+    Each hour is compared with the same hour on the previous window days
+    of the same series; hours outside a series' own days are not scored.
+
+    Args:
+        df: Transactions with a parsed 'datetime' column
+        group_cols: Columns identifying a series (missing ones are ignored)
+        window: Earlier days to compare against
+        threshold: Absolute robust z-score above which an hour is flagged
+        min_scale: Lower bound of the robust scale, in transactions
+
+    Returns:
+        Tidy DataFrame of flagged hours with the group columns, 'datetime',
+        'value', 'expected' and 'score'
+    """
+    values, keys, hours = stack_hourly_counts(df, group_cols)
+    frames = []
+    for row, counts in enumerate(values):
+        observed = ~np.isnan(counts)
+        scored = detect_anomalies(pd.Series(counts[observed], index=hours[observed]), window, threshold,
+                                  period=HOURS_PER_DAY, min_scale=min_scale)
+        flagged = scored[scored['is_anomaly']].drop(columns='is_anomaly')
+        flagged = flagged.rename_axis('datetime').reset_index()
+        for col in keys.columns:
+            flagged.insert(0, col, keys.at[row, col])
+        frames.append(flagged)
+    columns = list(keys.columns) + ['datetime', 'value', 'expected', 'score']
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)[columns]
+
+
+def residual_anomalies(model_fit, window: int = 28, threshold: float = 3.5,
+                       min_scale: float = 1.0) -> pd.DataFrame:
+    """
+    Score the one-step-ahead residuals of a fitted SARIMAX model.
+
+    The first residuals come from the diffuse initialisation of the state
+    and are skipped, as are days excluded from training (missing values).
+
+    Args:
+        model_fit: Fitted SARIMAX results object (e.g. from fit_sales_model)
+        window: Earlier residuals to compare against
+        threshold: Absolute robust z-score above which a day is flagged
+        min_scale: Lower bound of the robust scale
+
+    Returns:
+        DataFrame like detect_anomalies, with 'value' the observed series and
+        'expected' the one-step-ahead prediction
+    """
+    resid = model_fit.resid.iloc[model_fit.loglikelihood_burn:].dropna()
+    scored = detect_anomalies(resid, window, threshold, min_scale=min_scale)
+    scored['expected'] = model_fit.fittedvalues.loc[scored.index]
+    scored['value'] = scored['expected'] + resid.loc[scored.index]
+    return scored
+
+
+class ResidualStream:
+    """
+    Streaming SARIMAX residual detector.
+
+    Each new observation is compared with the model's one-step-ahead
+    prediction, the residual is scored against the recent residuals, and the
+    model state is extended by the observation without refitting, which
+    runs the Kalman filter over that one observation only.
+
+    Args:
+        model_fit: Fitted SARIMAX results object with a dated index
+        window: Earlier residuals to compare against
+        threshold: Absolute robust z-score above which an observation is flagged
+        min_scale: Lower bound of the robust scale
+    """
+
+    def __init__(self, model_fit, window: int = 28, threshold: float = 3.5,
+                 min_scale: float = 1.0):
+        self.model_fit = model_fit
+        self.detector = RollingRobustDetector(window, threshold, min_scale=min_scale)
+        for resid in model_fit.resid.iloc[model_fit.loglikelihood_burn:].dropna().iloc[-window:]:
+            self.detector.score(float(resid))
+
+    def score(self, value: float) -> Optional[Dict[str, Any]]:
+        """
+        Score the next observation and extend the model state with it.
+
+        Args:
+            value: Next observation of the modelled series
+
+        Returns:
+            Dictionary with timestamp, value, expected, score and is_anomaly,
+            or None while fewer than window residuals are known
+        """
+        expected = self.model_fit.forecast(1)
+        result = self.detector.score(float(value) - float(expected.iloc[0]))
+        self.model_fit = self.model_fit.extend(pd.Series([float(value)], index=expected.index))
+        if result is None:
+            return None
+        result.update(timestamp=expected.index[0], value=float(value),
+                      expected=float(expected.iloc[0]))
+        return result
+
+
+ALERT_KEY_FIELDS = ('series', 'method', 'store')
+
+
+class AlertSink:
+    """
+    Writes alerts as JSON lines to a local file or a TCP socket.
+
+    emit_new remembers the latest timestamp sent per series, method and store
+    in a small JSON file (state_path), so re-running a batch detection over
+    the whole history only sends the alerts that are new.
+
+    Args:
+        target: File path, or 'tcp://host:port' to send to a socket
+        state_path: Watermark file for emit_new. Defaults to '<file>.state.json'
+                    beside a file target, or '.cache/alerts_<host>_<port>.state.json'
+    """
+
+    def __init__(self, target: str, state_path: Optional[str] = None):
+        self.target = str(target)
+        self._socket = None
+        self._path = None
+        if self.target.startswith('tcp://'):
+            host, port = self.target[len('tcp://'):].rsplit(':', 1)
+            self._socket = socket.create_connection((host, int(port)))
+            default_state = Path('.cache') / f'alerts_{host}_{port}.state.json'
+        else:
+            self._path = Path(self.target)
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            default_state = self._path.with_name(self._path.name + '.state.json')
+        self.state_path = Path(state_path) if state_path else default_state
+
+    def emit(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        """
+        Send alerts, one JSON object per line.
+
+        Args:
+            alerts: Alert dictionaries; timestamps are written as ISO strings
+
+        Returns:
+            Number of alerts written
+        """
+        lines = [json.dumps(alert, default=str) + '\n' for alert in alerts]
+        if not lines:
+            return 0
+        payload = ''.join(lines)
+        if self._socket is not None:
+            self._socket.sendall(payload.encode('utf-8'))
+        else:
+            with open(self._path, 'a') as f:
+                f.write(payload)
+        return len(lines)
+
+    def emit_new(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        """
+        Send only the alerts newer than the last one sent for the same series, method and store.
+
+        Args:
+            alerts: Alert dictionaries with a timestamp
+
+        Returns:
+            Number of alerts written
+        """
+        watermarks = {}
+        if self.state_path.exists():
+            with open(self.state_path) as f:
+                watermarks = json.load(f)
+        fresh = []
+        latest = dict(watermarks)
+        for alert in alerts:
+            key = '|'.join(str(alert.get(field, '')) for field in ALERT_KEY_FIELDS)
+            timestamp = pd.Timestamp(alert['timestamp'])
+            if key in watermarks and timestamp <= pd.Timestamp(watermarks[key]):
+                continue
+            fresh.append(alert)
+            if key not in latest or timestamp > pd.Timestamp(latest[key]):
+                latest[key] = timestamp.isoformat()
+        written = self.emit(fresh)
+        if written:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_name(f'.{self.state_path.name}.{os.getpid()}.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(latest, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.state_path)
+        return written
+
+    def close(self):
+        """Close the socket, if any."""
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+def to_alerts(flagged: pd.DataFrame, series: str, method: str) -> List[Dict[str, Any]]:
+    """
+    Convert flagged rows into alert dictionaries.
+
+    Args:
+        flagged: Rows from detect_anomalies, residual_anomalies or
+                 detect_hourly_anomalies; an index of timestamps is used when
+                 there is no 'datetime' column
+        series: Name of the monitored series (e.g. 'daily_sales')
+        method: Detector name (e.g. 'rolling_mad' or 'sarimax_residual')
+
+    Returns:
+        List of dictionaries with series, method, timestamp, value, expected
+        and score, plus any group columns
+    """
+    if 'is_anomaly' in flagged.columns:
+        flagged = flagged[flagged['is_anomaly']].drop(columns='is_anomaly')
+    if 'datetime' not in flagged.columns:
+        flagged = flagged.rename_axis('datetime').reset_index()
+    records = flagged.rename(columns={'datetime': 'timestamp'}).to_dict('records')
+    return [{'series': series, 'method': method, **record} for record in records]
@@ -0,0 +1,337 @@
+"""
+Rolling-origin backtesting of the SARIMAX sales and coffee predictors.
+"""
+
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+import numpy as np
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+try:
+    from .coffee_prediction import predict_most_sold_coffee_month, predict_most_sold_coffee_week
+    from .config_loader import load_config
+    from .data_loader import load_data, preprocess_datetime, normalize_coffee_names, prepare_daily_sales
+except ImportError:
+    # Fallback for direct execution
+    from coffee_prediction import predict_most_sold_coffee_month, predict_most_sold_coffee_week
+    from config_loader import load_config
+    from data_loader import load_data, preprocess_datetime, normalize_coffee_names, prepare_daily_sales
+
+warnings.filterwarnings("ignore")
+
+
+def rolling_origins(n_obs: int, initial: int, step: int = 1, horizon: int = 1) -> List[int]:
+    """
+    List forecast origins for a rolling-origin evaluation.
+
+    An origin ``i`` means the model is trained on observations before index
+    ``i`` and forecasts observations ``i .. i + horizon - 1``.
+
+    Args:
+        n_obs: Number of observations in the series
+        initial: Index of the first origin (minimum history length)
+        step: Spacing between consecutive origins
+        horizon: Number of steps forecast from each origin
+
+    Returns:
+        List of origin indices
+    """
+    return list(range(initial, n_obs - horizon + 1, step))
+
+
+def _split_chunks(items: list, n_chunks: int) -> List[list]:
+    """Split a list into at most n_chunks contiguous, non-empty pieces."""
+    n_chunks = max(1, min(n_chunks, len(items)))
+    return [chunk.tolist() for chunk in np.array_split(np.asarray(items), n_chunks) if len(chunk)]
+
+
+def _backtest_sales_chunk(daily_sales: pd.Series, origins: List[int], training_days: int,
+                          horizon: int, order: tuple, seasonal_order: tuple,
+                          refit_every: int) -> List[dict]:
+    """
+    Evaluate one contiguous block of origins, reusing fitted state between them.
+
+    The model is refitted every ``refit_every`` origins, warm-started from the
+    previous parameters; in between, the previous parameters are re-applied to
+    the shifted training window without running the optimizer.
+    """
+    rows = []
+    model_fit = None
+    for position, origin in enumerate(origins):
+        training_data = daily_sales.iloc[max(0, origin - training_days):origin]
+        actual = daily_sales.iloc[origin:origin + horizon]
+
+        started = time.perf_counter()
+        try:
+            if model_fit is not None and position % refit_every != 0:
+                model_fit = model_fit.apply(training_data, refit=False)
+            else:
+                start_params = None if model_fit is None else model_fit.params
+                model = SARIMAX(training_data, order=order, seasonal_order=seasonal_order)
+                model_fit = model.fit(start_params=start_params, disp=False)
+            forecast = model_fit.forecast(steps=horizon).to_numpy()
+        except Exception:
+            model_fit = None
+            forecast = np.full(horizon, np.nan)
+        elapsed = time.perf_counter() - started
+
+        for step, (date, value) in enumerate(actual.items(), start=1):
+            rows.append({
+                'origin': daily_sales.index[origin],
+                'date': date,
+                'step': step,
+                'actual': value,
+                'forecast': forecast[step - 1],
+                'seconds': elapsed / len(actual),
+            })
+    return rows
+
+
+def summarize_backtest(predictions: pd.DataFrame,
+                       group_col: str = 'config') -> pd.DataFrame:
+    """
+    Aggregate per-origin predictions into MAE, MAPE and runtime per configuration.
+
+    MAPE ignores periods whose actual value is zero.
+
+    Args:
+        predictions: DataFrame with group_col, 'actual', 'forecast' and 'seconds' columns
+        group_col: Column identifying the configuration
+
+    Returns:
+        DataFrame indexed by configuration, sorted by MAE
+    """
+    df = predictions.copy()
+    df['abs_error'] = (df['actual'] - df['forecast']).abs()
+    nonzero = df['actual'] != 0
+    df['ape'] = np.where(nonzero, df['abs_error'] / df['actual'].abs().where(nonzero), np.nan)
+
+    summary = df.groupby(group_col).agg(
+        mae=('abs_error', 'mean'),
+        mape=('ape', 'mean'),
+        n_forecasts=('forecast', 'count'),
+        failed=('forecast', lambda values: int(values.isna().sum())),
+        total_seconds=('seconds', 'sum'),
+    )
+    summary['mape'] = summary['mape'] * 100
+    summary['seconds_per_forecast'] = summary['total_seconds'] / summary['n_forecasts'].clip(lower=1)
+    return summary.sort_values('mae')
+
+
+def backtest_sales(daily_sales: pd.Series, configs: Dict[str, dict],
+                   initial: int = 180, step: int = 7, horizon: int = 1,
+                   training_days: int = 365, refit_every: int = 1,
+                   n_jobs: Optional[int] = None) -> tuple:
+    """
+    Rolling-origin evaluation of next-day sales forecasts for several SARIMAX configurations.
+
+    Each origin trains on the last ``training_days`` days before it, matching
+    predict_next_day_sales. Origins are split into contiguous blocks that run in
+    parallel; within a block, fitted parameters are carried to the next origin.
+
+    Args:
+        daily_sales: Series with daily sales data (from prepare_daily_sales)
+        configs: Dictionary mapping a label to {'order': ..., 'seasonal_order': ...}
+        initial: Minimum number of days before the first origin
+        step: Days between consecutive origins
+        horizon: Number of days forecast from each origin
+        training_days: Number of days used for training at each origin
+        refit_every: Refit the model every N origins (1 refits at every origin)
+        n_jobs: Number of worker processes. If None, uses the CPU count
+
+    Returns:
+        Tuple of (summary DataFrame per configuration, per-origin predictions DataFrame)
+    """
+    origins = rolling_origins(len(daily_sales), initial, step, horizon)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    chunks = _split_chunks(origins, n_jobs)
+
+    tasks = []
+    for label, params in configs.items():
+        order = tuple(params.get('order', (1, 1, 1)))
+        seasonal_order = tuple(params.get('seasonal_order', (1, 1, 1, 12)))
+        for chunk in chunks:
+            tasks.append((label, (daily_sales, chunk, training_days, horizon,
+                                  order, seasonal_order, refit_every)))
+
+    rows = []
+    if n_jobs == 1:
+        for label, args in tasks:
+            rows.extend(dict(row, config=label) for row in _backtest_sales_chunk(*args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [(label, pool.submit(_backtest_sales_chunk, *args)) for label, args in tasks]
+            for label, future in futures:
+                rows.extend(dict(row, config=label) for row in future.result())
+
+    predictions = pd.DataFrame(rows)
+    return summarize_backtest(predictions), predictions
+
+
+def _backtest_coffee_origin(df: pd.DataFrame, predictor: Callable, period_start: pd.Timestamp,
+                            period_end: pd.Timestamp, predictor_kwargs: dict,
+                            datetime_col: str, coffee_col: str) -> List[dict]:
+    """Train a coffee predictor on data before period_start and score it on the following period."""
+    history = df[df[datetime_col] < period_start]
+    future = df[(df[datetime_col] >= period_start) & (df[datetime_col] < period_end)]
+    actual_counts = future[coffee_col].value_counts()
+
+    started = time.perf_counter()
+    most_sold, _, predictions = predictor(history, datetime_col=datetime_col,
+                                          coffee_col=coffee_col, **predictor_kwargs)
+    elapsed = time.perf_counter() - started
+
+    actual_top = actual_counts.idxmax() if not actual_counts.empty else None
+    return [{
+        'origin': period_start,
+        'coffee': coffee,
+        'actual': actual_counts.get(coffee, 0),
+        'forecast': predicted,
+        'top_hit': most_sold == actual_top,
+        'seconds': elapsed / len(predictions),
+    } for coffee, predicted in predictions.items()]
+
+
+def backtest_coffee_predictions(df: pd.DataFrame, configs: Dict[str, dict],
+                                period: str = 'M', n_origins: int = 6,
+                                datetime_col: str = 'datetime',
+                                coffee_col: str = 'coffee_name',
+                                n_jobs: Optional[int] = None) -> tuple:
+    """
+    Rolling-origin evaluation of predict_most_sold_coffee_month / _week.
+
+    Origins are the starts of the last ``n_origins`` complete periods; each one
+    runs in its own worker process.
+
+    Args:
+        df: Input DataFrame with sales data
+        configs: Dictionary mapping a label to predictor keyword arguments
+                 (e.g. {'order': ..., 'seasonal_order': ..., 'months_back': 12})
+        period: 'M' to evaluate the monthly predictor, 'W' for the weekly one
+        n_origins: Number of most recent complete periods to evaluate
+        datetime_col: Name of the datetime column
+        coffee_col: Name of the coffee name column
+        n_jobs: Number of worker processes. If None, uses the CPU count
+
+    Returns:
+        Tuple of (summary DataFrame per configuration including 'top_hit_rate',
+        per-origin predictions DataFrame)
+    """
+    df = preprocess_datetime(df, datetime_col)
+    if period == 'M':
+        predictor = predict_most_sold_coffee_month
+        offset = pd.offsets.MonthBegin(1)
+        first = df[datetime_col].min().normalize() + offset
+    elif period == 'W':
+        predictor = predict_most_sold_coffee_week
+        offset = pd.offsets.Week(1, weekday=0)
+        first = df[datetime_col].min().normalize() + offset
+    else:
+        raise ValueError(f"Unknown backtest period: {period}")
+
+    # Period starts whose whole period lies inside the data
+    starts = pd.date_range(first, df[datetime_col].max(), freq=offset)
+    starts = [start for start in starts if start + offset <= df[datetime_col].max()]
+    starts = starts[-n_origins:]
+
+    tasks = [(label, (df, predictor, start, start + offset, dict(kwargs), datetime_col, coffee_col))
+             for label, kwargs in configs.items() for start in starts]
+
+    rows = []
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1:
+        for label, args in tasks:
+            rows.extend(dict(row, config=label) for row in _backtest_coffee_origin(*args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [(label, pool.submit(_backtest_coffee_origin, *args)) for label, args in tasks]
+            for label, future in futures:
+                rows.extend(dict(row, config=label) for row in future.result())
+
+    predictions = pd.DataFrame(rows)
+    summary = summarize_backtest(predictions)
+    hits = predictions.drop_duplicates(['config', 'origin']).groupby('config')['top_hit'].mean()
+    summary['top_hit_rate'] = hits
+    return summary, predictions
+
+
+def backtest_main(data_path: str = None, config_path: str = None, stores: list = None,
+                  start: str = None, end: str = None):
+    """
+    Backtest the configured SARIMAX orders against a weekly-seasonal alternative.
+
+    Args:
+        data_path: Path to the CSV file or partitioned dataset root.
+                  If None, uses path from config.json
+        config_path: Path to config file. If None, uses default config.json
+        stores: Optional list of store ids to evaluate. If None, uses all stores
+        start: Optional inclusive start of the time window (e.g. '2024-06-01')
+        end: Optional exclusive end of the time window
+    """
+    config = load_config(config_path)
+    if data_path is None:
+        data_path = config.get('data_path', 'upload/index_1.csv')
+
+    df = load_data(data_path, stores=stores, start=start, end=end)
+    df = preprocess_datetime(df)
+    df = normalize_coffee_names(df)
+
+    sales_config = config.get('sales_prediction', {})
+    coffee_config = config.get('coffee_prediction', {})
+    backtest_config = config.get('backtest', {})
+
+    sales_configs = {
+        'configured': {
+            'order': sales_config.get('order', [1, 1, 1]),
+            'seasonal_order': sales_config.get('seasonal_order', [1, 1, 1, 12]),
+        },
+        'weekly_seasonal': {
+            'order': sales_config.get('order', [1, 1, 1]),
+            'seasonal_order': [1, 1, 1, 7],
+        },
+    }
+
+    print("=" * 60)
+    print("Sales Prediction Backtest")
+    print("=" * 60)
+    summary, _ = backtest_sales(
+        prepare_daily_sales(df),
+        sales_configs,
+        initial=backtest_config.get('initial_days', 180),
+        step=backtest_config.get('step_days', 7),
+        horizon=backtest_config.get('horizon', 1),
+        training_days=sales_config.get('training_days', 365),
+        refit_every=backtest_config.get('refit_every', 1),
+        n_jobs=backtest_config.get('n_jobs'),
+    )
+    print(summary.to_string())
+
+    coffee_configs = {
+        'configured': {
+            'order': tuple(coffee_config.get('order', [1, 1, 1])),
+            'seasonal_order': tuple(coffee_config.get('seasonal_order', [1, 1, 1, 12])),
+        },
+    }
+    for period, window_key, window_default in [('M', 'months_back', 12), ('W', 'weeks_back', 4)]:
+        print("\n" + "=" * 60)
+        print(f"Most Sold Coffee Backtest ({'monthly' if period == 'M' else 'weekly'})")
+        print("=" * 60)
+        period_configs = {
+            label: dict(kwargs, **{window_key: coffee_config.get(window_key, window_default)})
+            for label, kwargs in coffee_configs.items()
+        }
+        summary, _ = backtest_coffee_predictions(
+            df, period_configs, period=period,
+            n_origins=backtest_config.get('coffee_origins', 6),
+            n_jobs=backtest_config.get('n_jobs'),
+        )
+        print(summary.to_string())
+
+
+if __name__ == "__main__":
+    backtest_main()
@@ -0,0 +1,208 @@
+"""
+Batched forecasting of many aligned series (stores x coffees) in one NumPy pass.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Iterable, Optional, Sequence, Tuple
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+SES_ALPHA_GRID = (0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+
+
+def stack_series(df: pd.DataFrame, group_cols: Sequence[str] = ('store', 'new_coffee_name'),
+                 datetime_col: str = 'datetime',
+                 value_col: Optional[str] = None,
+                 span_cols: Sequence[str] = ('store',)) -> Tuple[np.ndarray, pd.DataFrame, pd.DatetimeIndex]:
+    """
+    Stack per-group daily series into a 2-D array with a shared date axis.
+
+    Group columns that are missing from df are ignored, so a single-store
+    frame without a 'store' column yields one row per coffee. A series is
+    observed from the first to the last day of its span group (its store):
+    days inside that range without sales are zeros, days outside it (before
+    the store opened or after its data ends) are NaN.
+
+    Args:
+        df: Input DataFrame with transaction rows
+        group_cols: Columns identifying a series (e.g. store and coffee)
+        datetime_col: Name of the datetime column
+        value_col: Column to sum per day. If None, counts transactions
+        span_cols: Group columns whose rows share one observed date range
+
+    Returns:
+        Tuple of (values array of shape (n_series, n_days), keys DataFrame
+        with one row per series, DatetimeIndex of the days)
+    """
+    group_cols = [col for col in group_cols if col in df.columns]
+    if df.empty:
+        return np.zeros((0, 0)), pd.DataFrame(columns=group_cols), pd.DatetimeIndex([])
+    days = pd.to_datetime(df[datetime_col]).dt.normalize()
+    dates = pd.date_range(days.min(), days.max(), freq='D')
+    day_codes = (days - dates[0]).dt.days.to_numpy()
+
+    if group_cols:
+        series_codes, keys = pd.MultiIndex.from_frame(df[group_cols].astype(str)).factorize()
+        keys = keys.to_frame(index=False)
+        keys.columns = group_cols
+    else:
+        series_codes = np.zeros(len(df), dtype=np.int64)
+        keys = pd.DataFrame(index=[0])
+
+    n_series, n_days = len(keys), len(dates)
+    weights = None if value_col is None else df[value_col].to_numpy(dtype=float)
+    flat = np.bincount(series_codes * n_days + day_codes, weights=weights,
+                       minlength=n_series * n_days)
+    values = flat.reshape(n_series, n_days).astype(float)
+
+    span_cols = [col for col in span_cols if col in group_cols]
+    if span_cols:
+        span_codes = pd.MultiIndex.from_frame(df[span_cols].astype(str)).factorize()[0]
+        span_days = pd.Series(day_codes).groupby(span_codes).agg(['min', 'max'])
+        series_span = np.empty(n_series, dtype=np.int64)
+        series_span[series_codes] = span_codes
+        first = span_days['min'].to_numpy()[series_span]
+        last = span_days['max'].to_numpy()[series_span]
+        columns = np.arange(n_days)
+        values[(columns < first[:, None]) | (columns > last[:, None])] = np.nan
+    return values, keys, dates
+
+
+def seasonal_naive_drift(values: np.ndarray, steps: int = 1,
+                         season_length: int = 7) -> np.ndarray:
+    """
+    Forecast every series with the seasonal-naive method plus a linear drift.
+
+    Args:
+        values: Array of shape (n_series, n_periods)
+        steps: Number of periods to forecast
+        season_length: Seasonal period (7 for weekly pattern on daily data)
+
+    Returns:
+        Array of shape (n_series, steps) with forecasts
+    """
+    n_periods = values.shape[1]
+    season_length = min(season_length, n_periods)
+    horizon = np.arange(1, steps + 1)
+
+    # Value observed one season before each forecast step
+    lag_index = n_periods - season_length + (horizon - 1) % season_length
+    seasonal = values[:, lag_index]
+
+    # The seasonal value is season_length * k periods old, so drift is added for that many periods
+    drift = (values[:, -1] - values[:, 0]) / max(n_periods - 1, 1)
+    seasons_ahead = (horizon - 1) // season_length + 1
+    return seasonal + drift[:, None] * (season_length * seasons_ahead)[None, :]
+
+
+def exponential_smoothing(values: np.ndarray, steps: int = 1,
+                          alphas: Iterable[float] = SES_ALPHA_GRID) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit simple exponential smoothing to all series at once.
+
+    The smoothing constant is chosen per series from a grid by minimising the
+    one-step-ahead squared error; all series and grid values share one pass
+    over the time axis.
+
+    Args:
+        values: Array of shape (n_series, n_periods)
+        steps: Number of periods to forecast
+        alphas: Candidate smoothing constants
+
+    Returns:
+        Tuple of (forecast array of shape (n_series, steps), chosen alpha per series)
+    """
+    alphas = np.asarray(list(alphas), dtype=float)
+    level = np.repeat(values[:, :1], len(alphas), axis=1)
+    sse = np.zeros_like(level)
+    for t in range(1, values.shape[1]):
+        error = values[:, t:t + 1] - level
+        sse += error ** 2
+        level = level + alphas[None, :] * error
+
+    best = sse.argmin(axis=1)
+    final_level = level[np.arange(len(values)), best]
+    return np.repeat(final_level[:, None], steps, axis=1), alphas[best]
+
+
+def batch_forecast(df: pd.DataFrame, steps: int = 1, method: str = 'ses',
+                   group_cols: Sequence[str] = ('store', 'new_coffee_name'),
+                   datetime_col: str = 'datetime', value_col: Optional[str] = None,
+                   season_length: int = 7,
+                   important: Optional[Iterable[Tuple]] = None,
+                   order: tuple = (1, 1, 1),
+                   seasonal_order: tuple = (1, 1, 1, 12),
+                   clip_negative: bool = True) -> pd.DataFrame:
+    """
+    Forecast every (store, coffee) series with a cheap vectorized model.
+
+    Series listed in ``important`` are additionally fitted with SARIMAX and
+    their cheap forecasts are replaced. Each series is fitted on its own
+    observed days from stack_series and forecast from its own last day;
+    series with the same observed range share one vectorized pass.
+
+    Args:
+        df: Input DataFrame with transaction rows
+        steps: Number of days to forecast
+        method: Cheap model family, 'ses' or 'snaive_drift'
+        group_cols: Columns identifying a series
+        datetime_col: Name of the datetime column
+        value_col: Column to sum per day (e.g. 'money'). If None, counts transactions
+        season_length: Seasonal period for 'snaive_drift'
+        important: Optional iterable of keys (in group_cols order) to fit with SARIMAX; a
+            key is a tuple or list, or a bare value when only one group column is present
+        order: ARIMA order (p, d, q) for important series
+        seasonal_order: Seasonal ARIMA order (P, D, Q, s) for important series
+        clip_negative: Whether to clip forecasts at zero
+
+    Returns:
+        Tidy DataFrame with the group columns plus 'date', 'step', 'forecast' and 'model'
+    """
+    if method not in ('ses', 'snaive_drift'):
+        raise ValueError(f"Unknown batch forecast method: {method}")
+    values, keys, dates = stack_series(df, group_cols, datetime_col, value_col)
+    if not len(keys):
+        return pd.DataFrame(columns=list(keys.columns) + ['date', 'step', 'forecast', 'model'])
+
+    observed = ~np.isnan(values)
+    start = observed.argmax(axis=1)
+    stop = values.shape[1] - observed[:, ::-1].argmax(axis=1)
+    forecasts = np.empty((len(keys), steps))
+    windows, window_codes = np.unique(np.column_stack([start, stop]), axis=0, return_inverse=True)
+    for code, (lo, hi) in enumerate(windows):
+        members = np.flatnonzero(window_codes.ravel() == code)
+        window = values[members, lo:hi]
+        if method == 'ses':
+            forecasts[members], _ = exponential_smoothing(window, steps)
+        else:
+            forecasts[members] = seasonal_naive_drift(window, steps, season_length)
+    models = np.full(len(keys), method, dtype=object)
+
+    if important:
+        key_tuples = list(keys.itertuples(index=False, name=None))
+        row_of = {key: row for row, key in enumerate(key_tuples)}
+        for key in important:
+            key = tuple(str(part) for part in (key if isinstance(key, (tuple, list)) else (key,)))
+            row = row_of.get(key)
+            if row is None:
+                continue
+            series = pd.Series(values[row, start[row]:stop[row]], index=dates[start[row]:stop[row]])
+            try:
+                model_fit = SARIMAX(series, order=order, seasonal_order=seasonal_order).fit(disp=False)
+                forecasts[row] = model_fit.forecast(steps=steps).to_numpy()
+                models[row] = 'sarimax'
+            except Exception:
+                pass  # Keep the cheap forecast for series SARIMAX cannot fit
+
+    if clip_negative:
+        forecasts = np.maximum(forecasts, 0)
+
+    last_dates = dates.to_numpy()[stop - 1]
+    future_dates = last_dates[:, None] + np.arange(1, steps + 1) * np.timedelta64(1, 'D')
+    n_series = len(keys)
+    table = keys.loc[np.repeat(np.arange(n_series), steps)].reset_index(drop=True)
+    table['date'] = future_dates.ravel()
+    table['step'] = np.tile(np.arange(1, steps + 1), n_series)
+    table['forecast'] = forecasts.ravel()
+    table['model'] = np.repeat(models, steps)
+    return table
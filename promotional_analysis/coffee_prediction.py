@@ -4,56 +4,122 @@ Predicting most popular coffee types using time series models.
 
 import pandas as pd
 import numpy as np
+from typing import Dict, Optional
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+try:
+    from .order_selection import select_order
+    from .sales_prediction import forecast_horizon
+except ImportError:
+    # Fallback for direct execution
+    from order_selection import select_order
+    from sales_prediction import forecast_horizon
 
-def predict_most_sold_coffee_month(df: pd.DataFrame, datetime_col: str = 'datetime',
-                            coffee_col: str = 'coffee_name', 
-                            months_back: int = 12,
-                            order: tuple = (1, 1, 1),
-                            seasonal_order: tuple = (1, 1, 1, 12)) -> tuple:
+
+def _resolve_order(series: pd.Series, full_series: pd.Series, name: str,
+                   order: tuple, seasonal_order: tuple,
+                   auto_order: Optional[Dict]) -> tuple:
     """
-    Predict which coffee will be most sold in the next month.
+    Return the (order, seasonal_order) to fit for one coffee series.
+    
+    Args:
+        series: Training window of the coffee's sales
+        full_series: Full history of the coffee's sales, used as the cache key
+        name: Logical series name for the order cache
+        order: Configured ARIMA order, used when auto_order is None or the search fails
+        seasonal_order: Configured seasonal order, used when auto_order is None or the search fails
+        auto_order: Optional select_order settings
+        
+    Returns:
+        Tuple of (order, seasonal_order)
+    """
+    if auto_order is None:
+        return order, seasonal_order
+    selection = select_order(series, name=name, key_series=full_series,
+                             default_order=order, default_seasonal_order=seasonal_order,
+                             **auto_order)
+    return selection['order'], selection['seasonal_order']
+
+
+def fit_coffee_models(df: pd.DataFrame, freq: str = 'M',
+                      periods_back: int = 12,
+                      datetime_col: str = 'datetime',
+                      coffee_col: str = 'coffee_name',
+                      order: tuple = (1, 1, 1),
+                      seasonal_order: tuple = (1, 1, 1, 12),
+                      auto_order: Optional[Dict] = None) -> Dict[str, object]:
+    """
+    Fit one SARIMA model per coffee type on monthly or weekly sales counts.
     
     Args:
         df: Input DataFrame with sales data
+        freq: Aggregation frequency, 'M' for months or 'W' for weeks
+        periods_back: Number of most recent periods to use for training
         datetime_col: Name of the datetime column
         coffee_col: Name of the coffee name column
-        months_back: Number of months to use for training
         order: ARIMA order (p, d, q)
         seasonal_order: Seasonal ARIMA order (P, D, Q, s)
+        auto_order: Optional select_order settings. If given, the order of each
+                    coffee's model is chosen by a cached AIC/BIC search
         
     Returns:
-        Tuple of (most_sold_coffee_name, predicted_sales, all_predictions_dict)
+        Dictionary mapping coffee names to fitted SARIMAX results, or None for
+        coffees without enough data or whose model failed to fit
     """
- 
     df = df.copy()
     if not pd.api.types.is_datetime64_any_dtype(df[datetime_col]):
         df[datetime_col] = pd.to_datetime(df[datetime_col])
     
-    monthly_coffee_sales = df.groupby([pd.Grouper(key=datetime_col, freq='M'), 
-                                       coffee_col]).size().unstack(fill_value=0)
+    period_coffee_sales = df.groupby([pd.Grouper(key=datetime_col, freq=freq), 
+                                      coffee_col]).size().unstack(fill_value=0)
     
-    # Take the last N months as training data
-    last_months_coffee = monthly_coffee_sales.tail(months_back)
+    # Take the last N periods as training data
+    last_periods_coffee = period_coffee_sales.tail(periods_back)
+    cache_prefix = 'coffee_month' if freq == 'M' else 'coffee_week'
     
-    # Fit SARIMA for each coffee type and predict next month's sales
-    predictions = {}
-    for coffee in last_months_coffee.columns:
-        series = last_months_coffee[coffee]
+    models = {}
+    for coffee in last_periods_coffee.columns:
+        series = last_periods_coffee[coffee]
         
         # Handle all-zero columns or insufficient data
         if series.sum() == 0 or series.count() < 2:
-            predictions[coffee] = 0
+            models[coffee] = None
             continue
         
+        coffee_order, coffee_seasonal_order = _resolve_order(
+            series, period_coffee_sales[coffee], f'{cache_prefix}:{coffee}',
+            order, seasonal_order, auto_order
+        )
+        
+        try:
+            model = SARIMAX(series, order=coffee_order, seasonal_order=coffee_seasonal_order)
+            models[coffee] = model.fit(disp=False)
+        except Exception:
+            models[coffee] = None  # Fallback for failed models
+    
+    return models
+
+
+def predict_most_sold_from_models(models: Dict[str, object]) -> tuple:
+    """
+    Forecast one period ahead for each fitted coffee model and pick the top coffee.
+    
+    Args:
+        models: Dictionary mapping coffee names to fitted results or None
+        
+    Returns:
+        Tuple of (most_sold_coffee_name, predicted_sales, all_predictions_dict)
+    """
+    predictions = {}
+    for coffee, model_fit in models.items():
+        if model_fit is None:
+            predictions[coffee] = 0
+            continue
         try:
-            model = SARIMAX(series, order=order, seasonal_order=seasonal_order)
-            model_fit = model.fit(disp=False)
-            pred = model_fit.forecast(steps=1).iloc[0]
+            pred = forecast_horizon(model_fit, steps=1)['mean'].iloc[0]
             predictions[coffee] = max(pred, 0)  # Ensure non-negative
         except Exception:
-            predictions[coffee] = 0  # Fallback for failed models
+            predictions[coffee] = 0
     
     # Find the coffee with the highest predicted sales
     most_sold_coffee = max(predictions, key=predictions.get)
@@ -61,40 +127,87 @@ def predict_most_sold_coffee_month(df: pd.DataFrame, datetime_col: str = 'dateti
     return most_sold_coffee, predictions[most_sold_coffee], predictions
 
 
-def predict_most_sold_coffee_week(df: pd.DataFrame, datetime_col: str = 'datetime',
-                            coffee_col: str = 'coffee_name', 
-                            weeks_back: int = 4,
-                            order: tuple = (1, 1, 1),
-                            seasonal_order: tuple = (1, 1, 1, 12)) -> tuple:
+def forecast_coffee_horizon(models: Dict[str, object], steps: int = 3,
+                            alpha: float = 0.05) -> pd.DataFrame:
     """
-    Predict which coffee will be most sold in the next week.
-    """
-    df = df.copy()  
-    if not pd.api.types.is_datetime64_any_dtype(df[datetime_col]):
-        df[datetime_col] = pd.to_datetime(df[datetime_col])
-    
-    weekly_coffee_sales = df.groupby([pd.Grouper(key=datetime_col, freq='W'), 
-                                          coffee_col]).size().unstack(fill_value=0)
+    Multi-period forecasts with confidence bands for every fitted coffee model.
     
-    # Take the last N weeks as training data
-    last_weeks_coffee = weekly_coffee_sales.tail(weeks_back)
+    Uses the cached forecast state of each fitted model, so different
+    horizons can be requested repeatedly without refitting.
     
-    # Fit SARIMA for each coffee type and predict next week's sales
-    predictions = {}
-    for coffee in last_weeks_coffee.columns:
-        series = last_weeks_coffee[coffee]
-        if series.sum() == 0 or series.count() < 2:
-            predictions[coffee] = 0
+    Args:
+        models: Dictionary mapping coffee names to fitted results (from fit_coffee_models)
+        steps: Number of periods to forecast
+        alpha: Significance level of the bands (0.05 gives 95% intervals)
+        
+    Returns:
+        Tidy DataFrame with 'coffee', 'date', 'step', 'mean', 'lower' and 'upper' columns.
+        Coffees without a model are reported with zero forecasts
+    """
+    frames = []
+    for coffee, model_fit in models.items():
+        if model_fit is None:
             continue
         try:
-            model = SARIMAX(series, order=order, seasonal_order=seasonal_order)
-            model_fit = model.fit(disp=False)
-            pred = model_fit.forecast(steps=1).iloc[0]
-            predictions[coffee] = max(pred, 0)
+            horizon = forecast_horizon(model_fit, steps=steps, alpha=alpha, clip_negative=True)
         except Exception:
-            predictions[coffee] = 0
+            continue
+        horizon = horizon.rename_axis('date').reset_index()
+        horizon.insert(0, 'coffee', coffee)
+        horizon.insert(2, 'step', np.arange(1, len(horizon) + 1))
+        frames.append(horizon)
     
-    # Find the coffee with the highest predicted sales
-    most_sold_coffee = max(predictions, key=predictions.get)
+    fitted = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=['coffee', 'date', 'step', 'mean', 'lower', 'upper'])
+    missing = [coffee for coffee in models if coffee not in set(fitted['coffee'])]
+    if missing and len(fitted):
+        dates = fitted.drop_duplicates('step').sort_values('step')['date'].to_numpy()
+        zeros = pd.DataFrame({
+            'coffee': np.repeat(missing, len(dates)),
+            'date': np.tile(dates, len(missing)),
+            'step': np.tile(np.arange(1, len(dates) + 1), len(missing)),
+            'mean': 0.0, 'lower': 0.0, 'upper': 0.0,
+        })
+        fitted = pd.concat([fitted, zeros], ignore_index=True)
+    return fitted
+
+
+def predict_most_sold_coffee_month(df: pd.DataFrame, datetime_col: str = 'datetime',
+                            coffee_col: str = 'coffee_name', 
+                            months_back: int = 12,
+                            order: tuple = (1, 1, 1),
+                            seasonal_order: tuple = (1, 1, 1, 12),
+                            auto_order: Optional[Dict] = None) -> tuple:
+    """
+    Predict which coffee will be most sold in the next month.
     
-    return most_sold_coffee, predictions[most_sold_coffee], predictions
\ No newline at end of file
+    Args:
+        df: Input DataFrame with sales data
+        datetime_col: Name of the datetime column
+        coffee_col: Name of the coffee name column
+        months_back: Number of months to use for training
+        order: ARIMA order (p, d, q)
+        seasonal_order: Seasonal ARIMA order (P, D, Q, s)
+        auto_order: Optional select_order settings. If given, the order of each
+                    coffee's model is chosen by a cached AIC/BIC search
+        
+    Returns:
+        Tuple of (most_sold_coffee_name, predicted_sales, all_predictions_dict)
+    """
+    models = fit_coffee_models(df, 'M', months_back, datetime_col, coffee_col,
+                               order, seasonal_order, auto_order)
+    return predict_most_sold_from_models(models)
+
+
+def predict_most_sold_coffee_week(df: pd.DataFrame, datetime_col: str = 'datetime',
+                            coffee_col: str = 'coffee_name', 
+                            weeks_back: int = 4,
+                            order: tuple = (1, 1, 1),
+                            seasonal_order: tuple = (1, 1, 1, 12),
+                            auto_order: Optional[Dict] = None) -> tuple:
+    """
+    Predict which coffee will be most sold in the next week.
+    """
+    models = fit_coffee_models(df, 'W', weeks_back, datetime_col, coffee_col,
+                               order, seasonal_order, auto_order)
+    return predict_most_sold_from_models(models)
@@ -3,23 +3,35 @@ Data loading and preprocessing utilities for coffee sales analysis.
 """
 
 import pandas as pd
-import numpy as np
 import warnings
+from typing import Optional
+
+from transaction_store import parse_transaction_times, read_transactions
 
 warnings.filterwarnings("ignore")
 
+# Variants merged into one drink by normalize_coffee_names, applied in order
+COFFEE_NAME_MERGES = (
+    ('Americano with Milk', 'Americano'),
+    ('Cocoa', 'Hot Chocolate'),
+)
+
 
-def load_data(file_path: str) -> pd.DataFrame:
+def load_data(file_path: str, stores: Optional[list] = None,
+              start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
     """
-    Load coffee sales data from CSV file.
+    Load coffee sales data from a CSV file or partitioned dataset directory.
     
     Args:
-        file_path: Path to the CSV file
+        file_path: Path to the CSV file or store=/year=/month= dataset root
+        stores: Optional list of store ids to load. If None, loads all stores
+        start: Optional inclusive start of the time window (e.g. '2024-06-01')
+        end: Optional exclusive end of the time window
         
     Returns:
         DataFrame with coffee sales data
     """
-    df = pd.read_csv(file_path)
+    df = read_transactions(file_path, stores=stores, start=start, end=end)
     return df
 
 
@@ -27,6 +39,9 @@ def preprocess_datetime(df: pd.DataFrame, datetime_col: str = 'datetime') -> pd.
     """
     Convert datetime column to pandas datetime type if needed.
     
+    Uses the shared fixed-layout parser; a raw 'date' column is derived from
+    the parsed datetimes rather than parsed again.
+    
     Args:
         df: Input DataFrame
         datetime_col: Name of the datetime column
@@ -35,9 +50,7 @@ def preprocess_datetime(df: pd.DataFrame, datetime_col: str = 'datetime') -> pd.
         DataFrame with converted datetime column
     """
     df = df.copy()
-    if not np.issubdtype(df[datetime_col].dtype, np.datetime64):
-        df[datetime_col] = pd.to_datetime(df[datetime_col])
-    return df
+    return parse_transaction_times(df, datetime_col)
 
 
 def normalize_coffee_names(df: pd.DataFrame, coffee_col: str = 'coffee_name') -> pd.DataFrame:
@@ -52,8 +65,9 @@ def normalize_coffee_names(df: pd.DataFrame, coffee_col: str = 'coffee_name') ->
         DataFrame with normalized coffee names in 'new_coffee_name' column
     """
     df = df.copy()
-    df['new_coffee_name'] = df[coffee_col].str.replace('Americano with Milk', 'Americano')
-    df['new_coffee_name'] = df['new_coffee_name'].str.replace('Cocoa', 'Hot Chocolate')
+    df['new_coffee_name'] = df[coffee_col]
+    for variant, name in COFFEE_NAME_MERGES:
+        df['new_coffee_name'] = df['new_coffee_name'].str.replace(variant, name)
     return df
 
 
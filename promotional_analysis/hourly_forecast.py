@@ -0,0 +1,193 @@
+"""
+Hourly transaction-count forecasts with daily and weekly seasonality, for staffing.
+
+Counts are regressed on Fourier terms of the hour of day (period 24) and the
+hour of week (period 168) plus a linear trend. The design matrix depends only
+on the clock, so all series covering the same hours are fitted by one
+least-squares solve.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence, Tuple
+
+NS_PER_HOUR = 3_600_000_000_000
+HOURS_PER_DAY = 24
+HOURS_PER_WEEK = 168
+
+
+def stack_hourly_counts(df: pd.DataFrame, group_cols: Sequence[str] = ('store',),
+                        datetime_col: str = 'datetime',
+                        value_col: Optional[str] = None) -> Tuple[np.ndarray, pd.DataFrame, pd.DatetimeIndex]:
+    """
+    Stack per-group hourly series into a 2-D array covering whole days.
+
+    Group columns that are missing from df are ignored, so a single-store
+    frame without a 'store' column yields one series. Each series is
+    observed from midnight of its own first day to 23:00 of its own last
+    day; hours outside that range (before a store opened or after its data
+    ends) are NaN rather than zero.
+
+    Args:
+        df: Input DataFrame with transaction rows
+        group_cols: Columns identifying a series
+        datetime_col: Name of the datetime column
+        value_col: Column to sum per hour. If None, counts transactions
+
+    Returns:
+        Tuple of (values array of shape (n_series, n_hours), keys DataFrame
+        with one row per series, hourly DatetimeIndex from midnight of the
+        earliest first day to 23:00 of the latest last day)
+    """
+    group_cols = [col for col in group_cols if col in df.columns]
+    hour_numbers = pd.to_datetime(df[datetime_col]).to_numpy().view(np.int64) // NS_PER_HOUR
+    first = hour_numbers.min() // HOURS_PER_DAY * HOURS_PER_DAY
+    n_hours = (hour_numbers.max() // HOURS_PER_DAY + 1) * HOURS_PER_DAY - first
+    hour_codes = hour_numbers - first
+
+    if group_cols:
+        series_codes, keys = pd.MultiIndex.from_frame(df[group_cols].astype(str)).factorize()
+        keys = keys.to_frame(index=False)
+        keys.columns = group_cols
+    else:
+        series_codes = np.zeros(len(df), dtype=np.int64)
+        keys = pd.DataFrame(index=[0])
+
+    flat_codes = series_codes * n_hours + hour_codes
+    counts = np.bincount(flat_codes, minlength=len(keys) * n_hours).reshape(len(keys), n_hours)
+    if value_col is None:
+        values = counts.astype(float)
+    else:
+        values = np.bincount(flat_codes, weights=df[value_col].to_numpy(dtype=float),
+                             minlength=len(keys) * n_hours).reshape(len(keys), n_hours)
+
+    # Blank out the days before each series' first row and after its last
+    present = counts > 0
+    series_first = present.argmax(axis=1) // HOURS_PER_DAY * HOURS_PER_DAY
+    series_end = (n_hours - 1 - present[:, ::-1].argmax(axis=1)) // HOURS_PER_DAY * HOURS_PER_DAY + HOURS_PER_DAY
+    columns = np.arange(n_hours)
+    outside = (columns < series_first[:, None]) | (columns >= series_end[:, None])
+    values[outside] = np.nan
+    hours = pd.DatetimeIndex((first + columns) * NS_PER_HOUR, dtype='datetime64[ns]')
+    return values, keys, hours
+
+
+def fourier_design(hour_numbers: np.ndarray, origin: int, daily_order: int = 4,
+                   weekly_order: int = 3, trend: bool = True) -> np.ndarray:
+    """
+    Regression design of intercept, trend and daily/weekly Fourier terms.
+
+    Args:
+        hour_numbers: Integer hours since the epoch
+        origin: Hour number where the trend is zero (e.g. start of training)
+        daily_order: Number of sin/cos pairs with period 24 hours
+        weekly_order: Number of sin/cos pairs with period 168 hours
+        trend: Whether to include a linear trend (in weeks)
+
+    Returns:
+        Array of shape (len(hour_numbers), n_terms)
+    """
+    hour_numbers = np.asarray(hour_numbers, dtype=np.int64)
+    columns = [np.ones(len(hour_numbers))]
+    if trend:
+        columns.append((hour_numbers - origin) / HOURS_PER_WEEK)
+    for period, order in ((HOURS_PER_DAY, daily_order), (HOURS_PER_WEEK, weekly_order)):
+        # Phase from the hour within the period keeps the terms exact for large hour numbers
+        angle = 2 * np.pi * (hour_numbers % period)[:, None] * np.arange(1, order + 1)[None, :] / period
+        columns.extend([np.sin(angle), np.cos(angle)])
+    return np.column_stack(columns)
+
+
+def fit_fourier(values: np.ndarray, design: np.ndarray) -> np.ndarray:
+    """
+    Least-squares coefficients for many series sharing one design matrix.
+
+    Args:
+        values: Array of shape (n_series, n_hours)
+        design: Array of shape (n_hours, n_terms)
+
+    Returns:
+        Coefficient array of shape (n_terms, n_series)
+    """
+    coefficients, *_ = np.linalg.lstsq(design, values.T, rcond=None)
+    return coefficients
+
+
+def forecast_hourly_counts(df: pd.DataFrame, steps: int = 24,
+                           group_cols: Sequence[str] = ('store',),
+                           training_days: int = 28, daily_order: int = 4,
+                           weekly_order: int = 3, datetime_col: str = 'datetime',
+                           value_col: Optional[str] = None) -> pd.DataFrame:
+    """
+    Forecast per-hour transaction counts for every store after its own last full day.
+
+    Each series is fitted on its own most recent training_days (fewer if it
+    has less history), so a store that opened late is not padded with
+    zeros and one whose data ends early is forecast from its own last day.
+    Series with the same training hours share one least-squares solve.
+    Forecasts are clipped at zero, and hours of day with no transactions in
+    the training window (closed hours) are forecast as zero.
+
+    Args:
+        df: Input DataFrame with transaction rows
+        steps: Number of hours to forecast, starting at midnight after each series' last day
+        group_cols: Columns identifying a series
+        training_days: Number of most recent days to fit on
+        daily_order: Number of daily Fourier pairs
+        weekly_order: Number of weekly Fourier pairs
+        datetime_col: Name of the datetime column
+        value_col: Column to sum per hour. If None, counts transactions
+
+    Returns:
+        Tidy DataFrame with the group columns plus 'datetime', 'step' and 'forecast'
+    """
+    values, keys, hours = stack_hourly_counts(df, group_cols, datetime_col, value_col)
+    observed = ~np.isnan(values)
+    n_series, n_hours = values.shape
+    last = n_hours - 1 - observed[:, ::-1].argmax(axis=1)
+    start = np.maximum(observed.argmax(axis=1), last + 1 - training_days * HOURS_PER_DAY)
+    all_hour_numbers = hours.asi8 // NS_PER_HOUR
+
+    forecasts = np.empty((n_series, steps))
+    future = np.empty((n_series, steps), dtype=np.int64)
+    windows, window_codes = np.unique(np.column_stack([start, last]), axis=0, return_inverse=True)
+    for code, (lo, hi) in enumerate(windows):
+        members = np.flatnonzero(window_codes.ravel() == code)
+        window = values[members, lo:hi + 1]
+        hour_numbers = all_hour_numbers[lo:hi + 1]
+        origin = int(hour_numbers[0])
+
+        design = fourier_design(hour_numbers, origin, daily_order, weekly_order)
+        coefficients = fit_fourier(window, design)
+
+        ahead = hour_numbers[-1] + np.arange(1, steps + 1)
+        predicted = (fourier_design(ahead, origin, daily_order, weekly_order) @ coefficients).T
+        open_hours = window.reshape(len(members), -1, HOURS_PER_DAY).sum(axis=1) > 0
+        forecasts[members] = np.maximum(predicted, 0) * open_hours[:, ahead % HOURS_PER_DAY]
+        future[members] = ahead
+
+    table = keys.loc[np.repeat(np.arange(n_series), steps)].reset_index(drop=True)
+    table['datetime'] = pd.DatetimeIndex(future.ravel() * NS_PER_HOUR, dtype='datetime64[ns]')
+    table['step'] = np.tile(np.arange(1, steps + 1), n_series)
+    table['forecast'] = forecasts.ravel()
+    return table
+
+
+def predict_next_day_hourly(df: pd.DataFrame, training_days: int = 28,
+                            daily_order: int = 4, weekly_order: int = 3) -> pd.Series:
+    """
+    Predict transactions per hour for the next day, over all stores combined.
+
+    Args:
+        df: Input DataFrame with transaction rows
+        training_days: Number of most recent days to fit on
+        daily_order: Number of daily Fourier pairs
+        weekly_order: Number of weekly Fourier pairs
+
+    Returns:
+        Series of 24 forecast counts indexed by the next day's hours
+    """
+    table = forecast_hourly_counts(df, steps=HOURS_PER_DAY, group_cols=(),
+                                   training_days=training_days, daily_order=daily_order,
+                                   weekly_order=weekly_order)
+    return table.set_index('datetime')['forecast']
@@ -0,0 +1,353 @@
+"""
+Automated SARIMAX order selection with a parallel, time-budgeted search and a
+per-series cache of the winning order.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import numpy as np
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+warnings.filterwarnings("ignore")
+
+# Candidate values for each SARIMAX order component
+DEFAULT_SEARCH_SPACE = {
+    'p': [0, 1, 2],
+    'd': [0, 1],
+    'q': [0, 1, 2],
+    'P': [0, 1],
+    'D': [0, 1],
+    'Q': [0, 1],
+    's': [7],
+}
+DEFAULT_CACHE_PATH = '.cache/sarimax_orders.json'
+FINGERPRINT_LENGTH = 28
+
+
+def candidate_orders(search_space: Optional[Dict[str, list]] = None,
+                     n_obs: Optional[int] = None) -> List[tuple]:
+    """
+    Enumerate (order, seasonal_order) candidates, simplest models first.
+
+    Args:
+        search_space: Dictionary of candidate values for p, d, q, P, D, Q and s.
+                      Missing keys fall back to DEFAULT_SEARCH_SPACE
+        n_obs: Optional series length; candidates needing more history are dropped
+
+    Returns:
+        List of ((p, d, q), (P, D, Q, s)) tuples sorted by number of parameters
+    """
+    space = dict(DEFAULT_SEARCH_SPACE, **(search_space or {}))
+    candidates = set()
+    for p, d, q, P, D, Q, s in itertools.product(
+            space['p'], space['d'], space['q'], space['P'], space['D'], space['Q'], space['s']):
+        if P == D == Q == 0:
+            seasonal_order = (0, 0, 0, 0)
+        else:
+            seasonal_order = (P, D, Q, s)
+        candidate = ((p, d, q), seasonal_order)
+        if n_obs is not None and n_obs <= _min_observations(*candidate) + 2:
+            continue
+        candidates.add(candidate)
+    return sorted(candidates, key=lambda c: (sum(c[0]) + sum(c[1][:3]), c))
+
+
+def _min_observations(order: tuple, seasonal_order: tuple) -> int:
+    """Return the number of observations consumed by differencing and lags."""
+    p, d, q = order
+    P, D, Q, s = seasonal_order
+    return d + D * s + max(p, P * s) + max(q, Q * s) + 1
+
+
+def _dominates(candidate: tuple, failed: tuple) -> bool:
+    """Check whether candidate is at least as complex as a failed model in every component."""
+    (p, d, q), (P, D, Q, s) = candidate
+    (fp, fd, fq), (fP, fD, fQ, fs) = failed
+    same_structure = d == fd and D == fD and (s == fs or fP == fD == fQ == 0)
+    return same_structure and p >= fp and q >= fq and P >= fP and Q >= fQ
+
+
+def series_fingerprint(series: pd.Series, name: str = '') -> str:
+    """
+    Fingerprint a series by its identity rather than its latest values.
+
+    Uses the name, frequency, start date and first observations, so the
+    fingerprint is stable while new observations are appended.
+
+    Args:
+        series: Time series to fingerprint
+        name: Optional logical series name (e.g. 'daily_sales' or a coffee name)
+
+    Returns:
+        Hex digest string
+    """
+    head = np.round(series.iloc[:FINGERPRINT_LENGTH].to_numpy(dtype=float), 6)
+    freq = getattr(series.index, 'freqstr', None)
+    start = str(series.index[0]) if len(series) else ''
+    digest = hashlib.sha1()
+    digest.update(f"{name}|{freq}|{start}|".encode())
+    digest.update(head.tobytes())
+    return digest.hexdigest()
+
+
+def _search_signature(search_space: Optional[Dict[str, list]], criterion: str) -> str:
+    """Return a stable string describing the search settings, used to invalidate cache entries."""
+    space = dict(DEFAULT_SEARCH_SPACE, **(search_space or {}))
+    return json.dumps({'space': space, 'criterion': criterion}, sort_keys=True)
+
+
+def load_order_cache(cache_path: str) -> Dict[str, Any]:
+    """
+    Load the order cache from JSON.
+
+    Args:
+        cache_path: Path to the cache file
+
+    Returns:
+        Dictionary mapping fingerprints to cache entries (empty if the file is missing)
+    """
+    path = Path(cache_path)
+    if not path.exists():
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_order_cache(cache: Dict[str, Any], cache_path: str) -> None:
+    """
+    Atomically write the order cache to JSON.
+
+    Args:
+        cache: Dictionary mapping fingerprints to cache entries
+        cache_path: Path to the cache file
+    """
+    path = Path(cache_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_stale(entry: Dict[str, Any], n_obs: int, signature: str,
+             max_age_days: float = 30, max_new_obs: int = 30,
+             partial_max_age_days: float = 1) -> bool:
+    """
+    Decide whether a cached order must be searched again.
+
+    Args:
+        entry: Cache entry written by select_order
+        n_obs: Current length of the series
+        signature: Current search settings signature
+        max_age_days: Maximum age of the entry in days
+        max_new_obs: Maximum number of observations added since the search
+        partial_max_age_days: Maximum age of an entry whose search ran out of budget
+
+    Returns:
+        True if the entry is too old, too far behind the data, or was searched with other settings
+    """
+    if entry.get('signature') != signature:
+        return True
+    age_days = (time.time() - entry.get('searched_at', 0)) / 86400
+    if not entry.get('complete', True):
+        max_age_days = min(max_age_days, partial_max_age_days)
+    return age_days >= max_age_days or n_obs - entry.get('n_obs', 0) >= max_new_obs
+
+
+def auto_order_settings(section: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Turn an 'auto_order' config section into select_order keyword arguments.
+
+    Args:
+        section: Config dictionary with an 'enabled' flag and select_order settings
+
+    Returns:
+        Keyword arguments for select_order, or None if auto-order mode is disabled
+    """
+    if not section or not section.get('enabled', False):
+        return None
+    return {key: value for key, value in section.items() if key != 'enabled'}
+
+
+def _fit_candidate(series: pd.Series, order: tuple, seasonal_order: tuple,
+                   maxiter: int) -> Dict[str, Any]:
+    """Fit one candidate and report its information criteria and convergence."""
+    started = time.perf_counter()
+    try:
+        model = SARIMAX(series, order=order, seasonal_order=seasonal_order)
+        model_fit = model.fit(disp=False, maxiter=maxiter)
+        converged = bool(model_fit.mle_retvals.get('converged', True))
+        aic, bic = float(model_fit.aic), float(model_fit.bic)
+        converged = converged and np.isfinite(aic) and np.isfinite(bic)
+    except Exception:
+        converged, aic, bic = False, np.inf, np.inf
+    return {
+        'order': order,
+        'seasonal_order': seasonal_order,
+        'aic': aic,
+        'bic': bic,
+        'converged': converged,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def search_orders(series: pd.Series, criterion: str = 'aic',
+                  search_space: Optional[Dict[str, list]] = None,
+                  budget_seconds: float = 60, n_jobs: Optional[int] = None,
+                  maxiter: int = 50) -> pd.DataFrame:
+    """
+    Fit SARIMAX candidates in parallel and rank them by AIC or BIC.
+
+    Candidates are tried simplest first. When a candidate fails to converge,
+    every queued candidate that is at least as complex in all components is
+    pruned. No new fits are started once the wall-clock budget is used up.
+
+    Args:
+        series: Training series
+        criterion: 'aic' or 'bic'
+        search_space: Candidate values for p, d, q, P, D, Q and s
+        budget_seconds: Wall-clock budget for the whole search
+        n_jobs: Number of worker processes. If None, uses the CPU count
+        maxiter: Maximum optimizer iterations per candidate
+
+    Returns:
+        DataFrame of evaluated candidates sorted by the criterion (best first).
+        attrs['complete'] is False when the budget ran out before every
+        candidate was fitted or pruned
+    """
+    if criterion not in ('aic', 'bic'):
+        raise ValueError(f"Unknown information criterion: {criterion}")
+
+    deadline = time.monotonic() + budget_seconds
+    queue = candidate_orders(search_space, n_obs=len(series))
+    n_jobs = n_jobs or os.cpu_count() or 1
+    results = []
+    failed = []
+
+    pool = ProcessPoolExecutor(max_workers=n_jobs)
+    running = set()
+    try:
+        while (queue or running) and time.monotonic() < deadline:
+            while queue and len(running) < n_jobs:
+                order, seasonal_order = queue.pop(0)
+                running.add(pool.submit(_fit_candidate, series, order, seasonal_order, maxiter))
+            done, running = wait(running, timeout=max(deadline - time.monotonic(), 0),
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results.append(result)
+                if not result['converged']:
+                    failed.append((result['order'], result['seasonal_order']))
+                    queue = [c for c in queue if not _dominates(c, failed[-1])]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if not results:
+        ranking = pd.DataFrame(columns=['order', 'seasonal_order', 'aic', 'bic', 'converged', 'seconds'])
+    else:
+        ranking = pd.DataFrame(results)
+        ranking = ranking.sort_values(['converged', criterion], ascending=[False, True], ignore_index=True)
+    ranking.attrs['complete'] = not queue and not running
+    return ranking
+
+
+def select_order(series: pd.Series, name: str = '', key_series: Optional[pd.Series] = None,
+                 criterion: str = 'aic', search_space: Optional[Dict[str, list]] = None,
+                 budget_seconds: float = 60, n_jobs: Optional[int] = None,
+                 cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+                 max_age_days: float = 30, max_new_obs: int = 30,
+                 partial_max_age_days: float = 1,
+                 default_order: tuple = (1, 1, 1),
+                 default_seasonal_order: tuple = (1, 1, 1, 12)) -> Dict[str, Any]:
+    """
+    Return the best SARIMAX order for a series, searching only when the cache is stale.
+
+    Args:
+        series: Training series used for the search
+        name: Logical series name, part of the cache key
+        key_series: Full history identifying the series (defaults to series). Its
+                    fingerprint is the cache key and its length drives staleness
+        criterion: 'aic' or 'bic'
+        search_space: Candidate values for p, d, q, P, D, Q and s
+        budget_seconds: Wall-clock budget for the search
+        n_jobs: Number of worker processes. If None, uses the CPU count
+        cache_path: JSON cache file. If None, the cache is disabled
+        max_age_days: Re-search when the cached entry is older than this
+        max_new_obs: Re-search after this many new observations
+        partial_max_age_days: Re-search after this many days when the search ran out of
+                              budget, so a slow run does not pin a truncated choice
+        default_order: Order returned when the search finds no converged model
+        default_seasonal_order: Seasonal order returned when the search finds no converged model.
+                                Such a fallback is cached too, so the failing search is not
+                                repeated until the entry goes stale
+
+    Returns:
+        Dictionary with 'order', 'seasonal_order', 'score', 'from_cache', 'evaluated'
+        and 'complete' (False if the search behind the order ran out of budget)
+    """
+    key_series = series if key_series is None else key_series
+    fingerprint = series_fingerprint(key_series, name)
+    signature = _search_signature(search_space, criterion)
+
+    cache = load_order_cache(cache_path) if cache_path else {}
+    entry = cache.get(fingerprint)
+    if entry is not None and not is_stale(entry, len(key_series), signature,
+                                          max_age_days, max_new_obs, partial_max_age_days):
+        # A cached fallback means nothing converged; hand back the current defaults
+        fallback = entry.get('fallback', False)
+        return {
+            'order': tuple(default_order if fallback else entry['order']),
+            'seasonal_order': tuple(default_seasonal_order if fallback else entry['seasonal_order']),
+            'score': entry['score'],
+            'from_cache': True,
+            'evaluated': 0,
+            'complete': entry.get('complete', True),
+        }
+
+    ranking = search_orders(series, criterion, search_space, budget_seconds, n_jobs)
+    converged = ranking[ranking['converged']] if len(ranking) else ranking
+    if converged.empty:
+        selection = {
+            'order': tuple(default_order),
+            'seasonal_order': tuple(default_seasonal_order),
+            'score': None,
+            'from_cache': False,
+            'evaluated': len(ranking),
+            'complete': ranking.attrs['complete'],
+        }
+    else:
+        best = converged.iloc[0]
+        selection = {
+            'order': tuple(best['order']),
+            'seasonal_order': tuple(best['seasonal_order']),
+            'score': float(best[criterion]),
+            'from_cache': False,
+            'evaluated': len(ranking),
+            'complete': ranking.attrs['complete'],
+        }
+    if cache_path:
+        # Re-read so concurrent searches for other series are not lost
+        cache = load_order_cache(cache_path)
+        cache[fingerprint] = {
+            'name': name,
+            'order': list(selection['order']),
+            'seasonal_order': list(selection['seasonal_order']),
+            'criterion': criterion,
+            'score': selection['score'],
+            'n_obs': len(key_series),
+            'searched_at': time.time(),
+            'signature': signature,
+            'fallback': converged.empty,
+            'complete': selection['complete'],
+        }
+        save_order_cache(cache, cache_path)
+    return selection
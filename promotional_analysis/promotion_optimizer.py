@@ -0,0 +1,500 @@
+"""
+Promotion optimization by Monte Carlo simulation of price-elastic demand.
+
+Each day, every candidate plan (up to ``max_concurrent`` drinks promoted at
+discounts from a grid) is ranked by its expected incremental profit against
+not promoting. Demand responds to a discount through per-drink price
+elasticities estimated from the historical price/volume variation. The
+expected profit has a closed form, so plans are ranked without sampling
+noise; Monte Carlo draws of the elasticities only guard against promoting on
+an uncertain estimate, and an independent simulation reports the risk.
+"""
+
+import time
+import warnings
+from itertools import combinations, product
+from typing import Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+import numpy as np
+from scipy import special
+
+try:
+    from .config_loader import load_config, get_profit_margins
+    from .data_loader import load_data, preprocess_datetime, normalize_coffee_names, prepare_daily_coffee_sales
+    from .promotion_recommendation import recommend_daily_promotions
+except ImportError:
+    # Fallback for direct execution
+    from config_loader import load_config, get_profit_margins
+    from data_loader import load_data, preprocess_datetime, normalize_coffee_names, prepare_daily_coffee_sales
+    from promotion_recommendation import recommend_daily_promotions
+
+warnings.filterwarnings("ignore")
+
+# Days simulated per vectorized block; bounds the (days, samples, plans) profit array
+DAY_CHUNK = 16
+
+RESULT_COLUMNS = ['plan', 'n_promoted', 'expected_profit', 'profit_p05', 'prob_loss', 'feasible_plans']
+HEURISTIC_COLUMNS = ['heuristic_plan', 'heuristic_expected_profit', 'heuristic_prob_loss']
+
+
+def daily_demand_and_price(df: pd.DataFrame, datetime_col: str = 'datetime',
+                           coffee_col: str = 'new_coffee_name',
+                           price_col: str = 'money') -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Pivot daily units sold and average selling price per drink.
+
+    Args:
+        df: Transactions with datetime, normalized coffee name and price
+        datetime_col: Name of the datetime column
+        coffee_col: Name of the coffee name column
+        price_col: Name of the price column
+
+    Returns:
+        Tuple of (units, price) DataFrames with trading days as index and
+        drinks (sorted) as columns; price is NaN where a drink did not sell
+    """
+    days = pd.to_datetime(df[datetime_col]).dt.normalize()
+    grouped = df.groupby([days, df[coffee_col]])[price_col]
+    units = grouped.size().unstack(fill_value=0).sort_index(axis=1)
+    price = grouped.mean().unstack().reindex(columns=units.columns)
+    units.index.name = price.index.name = 'date'
+    return units, price
+
+
+def estimate_elasticities(units: pd.DataFrame, price: pd.DataFrame, min_days: int = 30,
+                          prior_elasticity: float = -1.0,
+                          prior_se: float = 0.5) -> pd.DataFrame:
+    """
+    Estimate the own-price elasticity of each drink with a log-log regression.
+
+    log(units) is regressed on log(price) with day-of-week dummies over the
+    days the drink sold. Drinks with too few days, no price variation, or a
+    non-negative estimate fall back to the prior.
+
+    Args:
+        units: Daily units per drink from daily_demand_and_price
+        price: Daily average price per drink from daily_demand_and_price
+        min_days: Minimum number of selling days for a fit
+        prior_elasticity: Elasticity used when no fit is possible
+        prior_se: Standard error attached to the prior
+
+    Returns:
+        DataFrame indexed by drink with elasticity, se, n_days and source ('fit' or 'prior')
+    """
+    weekday = pd.get_dummies(units.index.dayofweek).to_numpy(dtype=float)
+    rows = {}
+    for drink in units.columns:
+        sold = (units[drink] > 0).to_numpy() & price[drink].notna().to_numpy()
+        n_days = int(sold.sum())
+        log_price = np.log(price[drink].to_numpy()[sold])
+        estimate = {'elasticity': prior_elasticity, 'se': prior_se, 'n_days': n_days, 'source': 'prior'}
+        if n_days >= min_days and log_price.std() > 1e-6:
+            X = np.column_stack([log_price, weekday[sold]])
+            y = np.log(units[drink].to_numpy()[sold])
+            coef, _, rank, _ = np.linalg.lstsq(X, y, rcond=None)
+            dof = n_days - rank
+            if coef[0] < 0 and dof > 0:
+                resid = y - X @ coef
+                cov = np.linalg.pinv(X.T @ X) * (resid @ resid) / dof
+                estimate.update(elasticity=float(coef[0]), se=float(np.sqrt(cov[0, 0])), source='fit')
+        rows[drink] = estimate
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def enumerate_plans(n_drinks: int, n_levels: int, max_concurrent: int) -> np.ndarray:
+    """
+    List every promotion plan with at most max_concurrent promoted drinks.
+
+    Args:
+        n_drinks: Number of candidate drinks
+        n_levels: Number of discount levels
+        max_concurrent: Maximum number of drinks promoted on the same day
+
+    Returns:
+        Integer array of shape (n_plans, n_drinks) with the discount level of
+        each drink, -1 where not promoted. Row 0 is the empty plan
+    """
+    plans = [np.full(n_drinks, -1)]
+    for size in range(1, min(max_concurrent, n_drinks) + 1):
+        for drinks in combinations(range(n_drinks), size):
+            for levels in product(range(n_levels), repeat=size):
+                plan = np.full(n_drinks, -1)
+                plan[list(drinks)] = levels
+                plans.append(plan)
+    return np.array(plans)
+
+
+def plan_matrix(plans: np.ndarray, n_levels: int) -> np.ndarray:
+    """
+    One-hot encode plans over flattened (drink, level) options.
+
+    Args:
+        plans: Output of enumerate_plans
+        n_levels: Number of discount levels
+
+    Returns:
+        Array of shape (n_drinks * n_levels, n_plans) so that option profits
+        of shape (..., n_drinks * n_levels) times this matrix give plan profits
+    """
+    n_plans, n_drinks = plans.shape
+    matrix = np.zeros((n_drinks * n_levels, n_plans), dtype=np.float32)
+    plan_idx, drink_idx = np.nonzero(plans >= 0)
+    matrix[drink_idx * n_levels + plans[plan_idx, drink_idx], plan_idx] = 1.0
+    return matrix
+
+
+def describe_plan(plan: np.ndarray, drinks: Sequence[str], discounts: Sequence[float]) -> str:
+    """Format a plan row as 'Latte@5% + Cortado@10%' ('none' for the empty plan)."""
+    parts = [f"{drinks[i]}@{discounts[level]:.0%}" for i, level in enumerate(plan) if level >= 0]
+    return ' + '.join(parts) if parts else 'none'
+
+
+def expected_uplift(elasticity: np.ndarray, se: np.ndarray, discounts: np.ndarray) -> np.ndarray:
+    """
+    Mean volume multiplier of each drink at each discount level.
+
+    The multiplier is (1 - discount) ** min(e, 0) with e ~ Normal(elasticity, se),
+    whose mean is P(e >= 0) + exp(a * mu + a**2 * se**2 / 2) * P(e' < 0), where
+    a = log(1 - discount) and e' ~ Normal(mu + a * se**2, se).
+
+    Args:
+        elasticity: Elasticity estimate per drink, shape (n_drinks,)
+        se: Standard error per drink, shape (n_drinks,)
+        discounts: Discount fraction per level, shape (n_levels,)
+
+    Returns:
+        Array of shape (n_drinks, n_levels)
+    """
+    mu = elasticity[:, None]
+    sigma = np.maximum(se, 1e-12)[:, None]
+    a = np.log1p(-discounts)[None, :]
+    return (special.ndtr(mu / sigma)
+            + np.exp(a * mu + 0.5 * (a * sigma) ** 2) * special.ndtr(-(mu + a * sigma ** 2) / sigma))
+
+
+def _option_margins(price: np.ndarray, margins: np.ndarray, discounts: np.ndarray,
+                    cannibalization: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Discount cost per unit and margin per extra unit, both shape (n_days, n_drinks, n_levels)."""
+    n_drinks = margins.shape[1]
+    other_margin = (margins.sum(axis=1, keepdims=True) - margins) / max(n_drinks - 1, 1)
+    discount_cost = discounts[None, None, :] * price[:, :, None]
+    extra_margin = (margins - cannibalization * other_margin)[:, :, None] - discount_cost
+    return discount_cost, extra_margin
+
+
+def expected_option_profits(baseline: np.ndarray, price: np.ndarray, margins: np.ndarray,
+                            uplift: np.ndarray, discounts: np.ndarray,
+                            cannibalization: float) -> np.ndarray:
+    """
+    Expected incremental profit of promoting each drink at each discount level.
+
+    This is the mean of simulate_option_profits over the Poisson demand:
+    baseline * (uplift - 1) * extra margin - baseline * discount cost.
+
+    Args:
+        baseline: Expected units per day and drink, shape (n_days, n_drinks)
+        price: Regular price per day and drink, shape (n_days, n_drinks)
+        margins: Profit per unit at the regular price, shape (n_days, n_drinks)
+        uplift: Volume multiplier, shape (n_drinks, n_levels) or (n_samples, n_drinks, n_levels)
+        discounts: Discount fraction per level, shape (n_levels,)
+        cannibalization: Share of extra units that would otherwise have bought another drink
+
+    Returns:
+        Array of shape (n_days, n_drinks, n_levels), or (n_days, n_samples, n_drinks, n_levels)
+        for sampled uplifts
+    """
+    discount_cost, extra_margin = _option_margins(price, margins, discounts, cannibalization)
+    units = baseline[:, :, None]
+    if uplift.ndim == 3:
+        units, discount_cost, extra_margin = units[:, None], discount_cost[:, None], extra_margin[:, None]
+    return (units * ((uplift - 1.0) * extra_margin - discount_cost)).astype(np.float32)
+
+
+def simulate_option_profits(baseline: np.ndarray, price: np.ndarray, margins: np.ndarray,
+                            uplift: np.ndarray, discounts: np.ndarray, cannibalization: float,
+                            rng: np.random.Generator) -> np.ndarray:
+    """
+    Sample the incremental profit of promoting each drink at each discount level.
+
+    Units without a promotion are Poisson(baseline). A promotion adds
+    Poisson(baseline * (uplift - 1)) units (common random numbers), sells
+    every unit at the discounted price, and takes a ``cannibalization``
+    share of the extra units away from the other drinks at their average margin.
+
+    Args:
+        baseline: Expected units per day and drink, shape (n_days, n_drinks)
+        price: Regular price per day and drink, shape (n_days, n_drinks)
+        margins: Profit per unit at the regular price, shape (n_days, n_drinks)
+        uplift: Volume multiplier per sample, drink and level, shape (n_samples, n_drinks, n_levels)
+        discounts: Discount fraction per level, shape (n_levels,)
+        cannibalization: Share of extra units that would otherwise have bought another drink
+        rng: Random generator
+
+    Returns:
+        Array of shape (n_days, n_samples, n_drinks, n_levels) with incremental profit
+    """
+    base_units = rng.poisson(baseline[:, None, :], size=(len(baseline),) + uplift.shape[:2])
+    extra_units = rng.poisson(baseline[:, None, :, None] * np.maximum(uplift - 1.0, 0.0)[None])
+
+    discount_cost, extra_margin = _option_margins(price, margins, discounts, cannibalization)
+    return (extra_units * extra_margin[:, None]
+            - base_units[..., None] * discount_cost[:, None]).astype(np.float32)
+
+
+def optimize_promotions(units: pd.DataFrame, price: pd.DataFrame, profit_margins: Dict[str, float],
+                        elasticities: pd.DataFrame, discounts: Sequence[float] = (0.02, 0.04, 0.06),
+                        max_concurrent: int = 3, min_unit_margin: float = 0.0,
+                        cannibalization: float = 0.3, rolling_window: int = 7,
+                        n_samples: int = 500, robust_quantile: float = 0.1,
+                        default_margin: float = 2.0,
+                        gross_margin_rate: Optional[float] = None,
+                        heuristic: Optional[pd.Series] = None, heuristic_discount: Optional[float] = None,
+                        seed: int = 42) -> pd.DataFrame:
+    """
+    Choose the plan with the highest expected incremental profit for every day.
+
+    The baseline demand and regular price of a day are the means over the
+    previous ``rolling_window`` trading days, so plans only use information
+    available before the day starts. Plans that promote a drink below
+    ``min_unit_margin`` profit per unit are infeasible; the empty plan is always
+    feasible. Plans are ranked on their closed-form expected profit, and a plan
+    only replaces the empty plan when the ``robust_quantile`` of its expected
+    profit over ``n_samples`` elasticity draws is positive. The reported 5th
+    percentile and loss probability come from an independent simulation, so
+    the statistics of the chosen plan are not inflated by the choice.
+
+    Args:
+        units: Daily units per drink from daily_demand_and_price
+        price: Daily average price per drink from daily_demand_and_price
+        profit_margins: Profit per unit at the regular price, per drink
+        elasticities: Output of estimate_elasticities
+        discounts: Discount fractions a promoted drink can get
+        max_concurrent: Maximum number of drinks promoted on the same day
+        min_unit_margin: Minimum profit per promoted unit after the discount
+        cannibalization: Share of extra units taken from the other drinks
+        rolling_window: Trading days used for the baseline demand and price
+        n_samples: Elasticity draws for the quantile guard and samples per day for the risk statistics
+        robust_quantile: Lower quantile of a plan's expected profit over the elasticity
+            draws that must be positive to promote at all
+        default_margin: Margin for drinks missing from profit_margins
+        gross_margin_rate: If given, the profit per unit is this share of the regular
+            price instead of the absolute profit_margins
+        heuristic: Optional drink per day (recommend_daily_promotions) to score the same way
+        heuristic_discount: Discount assumed for the heuristic's drink; added to the grid if missing
+        seed: Random seed
+
+    Returns:
+        DataFrame indexed by date with the chosen plan, its expected profit,
+        5th percentile and loss probability, the number of feasible plans and,
+        if given, the heuristic's drink and the same statistics for it
+    """
+    discounts = sorted(set(discounts) | ({heuristic_discount} if heuristic is not None else set()))
+    discounts = np.asarray(discounts, dtype=float)
+    drinks = list(units.columns)
+    n_drinks, n_levels = len(drinks), len(discounts)
+    margins = np.array([profit_margins.get(d, default_margin) for d in drinks], dtype=float)
+
+    baseline = units.rolling(rolling_window, min_periods=1).mean().shift(1)
+    regular_price = price.rolling(rolling_window, min_periods=1).mean().shift(1)
+    regular_price = regular_price.ffill().fillna(price.mean())
+    valid = baseline.notna().all(axis=1).to_numpy()
+    dates = units.index[valid]
+    baseline = baseline.to_numpy()[valid]
+    regular_price = regular_price.to_numpy()[valid]
+    if gross_margin_rate is not None:
+        margins = gross_margin_rate * regular_price
+    else:
+        margins = np.broadcast_to(margins, regular_price.shape)
+
+    rng = np.random.default_rng(seed)
+    elasticity = elasticities.reindex(drinks)
+    mean_uplift = expected_uplift(elasticity['elasticity'].to_numpy(), elasticity['se'].to_numpy(), discounts)
+
+    def draw_uplift() -> np.ndarray:
+        draws = rng.normal(elasticity['elasticity'].to_numpy(), elasticity['se'].to_numpy(),
+                           size=(n_samples, n_drinks))
+        draws = np.minimum(draws, 0.0)  # demand never falls when the price drops
+        return (1.0 - discounts[None, None, :]) ** draws[:, :, None]
+
+    guard_uplift = draw_uplift()
+    report_uplift = draw_uplift()
+
+    plans = enumerate_plans(n_drinks, n_levels, max_concurrent)
+    matrix = plan_matrix(plans, n_levels)
+    heuristic_level = int(np.searchsorted(discounts, heuristic_discount)) if heuristic is not None else None
+
+    rows = []
+    for start in range(0, len(dates), DAY_CHUNK):
+        block = slice(start, start + DAY_CHUNK)
+        day_inputs = (baseline[block], regular_price[block], margins[block])
+        mean_options = expected_option_profits(*day_inputs, mean_uplift, discounts, cannibalization)
+        n_days = mean_options.shape[0]
+        expected = mean_options.reshape(n_days, n_drinks * n_levels) @ matrix         # (days, plans)
+
+        unit_margin = margins[block][:, :, None] - discounts[None, None, :] * regular_price[block][:, :, None]
+        blocked = (unit_margin < min_unit_margin).reshape(n_days, -1).astype(np.float32)
+        feasible = (blocked @ matrix) == 0
+
+        # The quantile guard only matters for plans that beat 'none' on average
+        candidate = feasible & (expected > 0)
+        columns = np.flatnonzero(candidate.any(axis=0))
+        if len(columns):
+            guard = expected_option_profits(*day_inputs, guard_uplift, discounts, cannibalization)
+            lower = np.quantile(guard.reshape(n_days, n_samples, -1) @ matrix[:, columns],
+                                robust_quantile, axis=1)
+            candidate[:, columns] &= lower > 0
+        candidate[:, 0] = True
+        best = np.where(candidate, expected, -np.inf).argmax(axis=1)
+
+        options = simulate_option_profits(*day_inputs, report_uplift, discounts, cannibalization, rng)
+        for day in range(n_days):
+            date = dates[start + day]
+            chosen = options[day].reshape(n_samples, -1) @ matrix[:, best[day]]
+            row = {
+                'date': date,
+                'plan': describe_plan(plans[best[day]], drinks, discounts),
+                'n_promoted': int((plans[best[day]] >= 0).sum()),
+                'expected_profit': float(expected[day, best[day]]),
+                'profit_p05': float(np.percentile(chosen, 5)),
+                'prob_loss': float((chosen < 0).mean()),
+                'feasible_plans': int(feasible[day].sum()),
+            }
+            if heuristic is not None and date in heuristic.index and heuristic[date] in drinks:
+                drink = drinks.index(heuristic[date])
+                sampled = options[day, :, drink, heuristic_level]
+                row.update(heuristic_plan=f"{heuristic[date]}@{heuristic_discount:.0%}",
+                           heuristic_expected_profit=float(mean_options[day, drink, heuristic_level]),
+                           heuristic_prob_loss=float((sampled < 0).mean()))
+            rows.append(row)
+    columns = ['date'] + RESULT_COLUMNS + (HEURISTIC_COLUMNS if heuristic is not None else [])
+    return pd.DataFrame(rows, columns=columns).set_index('date')
+
+
+def benchmark_against_heuristic(df: pd.DataFrame, profit_margins: Dict[str, float],
+                                optimizer_config: Optional[Dict] = None, rolling_window: int = 7,
+                                default_margin: float = 2.0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compare the optimizer with recommend_daily_promotions on speed and simulated profit.
+
+    Both are scored on their closed-form expected profit and on the same
+    independent simulation for the loss probability; the heuristic's drink is
+    assumed to get ``heuristic_discount``.
+
+    Args:
+        df: Transactions with datetime, new_coffee_name and money
+        profit_margins: Profit per unit at the regular price, per drink
+        optimizer_config: The 'promotion_optimizer' section of config.json
+        rolling_window: Rolling window of the heuristic and of the baseline demand
+        default_margin: Margin for drinks missing from profit_margins
+
+    Returns:
+        Tuple of (summary with one row per method, per-day optimizer results)
+    """
+    settings = dict(optimizer_config or {})
+
+    start = time.perf_counter()
+    daily_coffee_sales = prepare_daily_coffee_sales(df.assign(date=df['datetime'].dt.normalize()))
+    heuristic = recommend_daily_promotions(daily_coffee_sales, profit_margins,
+                                           rolling_window=rolling_window, default_margin=default_margin)
+    heuristic_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    units, price = daily_demand_and_price(df)
+    elasticities = estimate_elasticities(
+        units, price,
+        min_days=settings.get('min_days', 30),
+        prior_elasticity=settings.get('prior_elasticity', -1.0),
+        prior_se=settings.get('prior_elasticity_se', 0.5),
+    )
+    results = optimize_promotions(
+        units, price, profit_margins, elasticities,
+        discounts=settings.get('discounts', (0.02, 0.04, 0.06)),
+        max_concurrent=settings.get('max_concurrent', 3),
+        min_unit_margin=settings.get('min_unit_margin', 0.0),
+        cannibalization=settings.get('cannibalization', 0.3),
+        rolling_window=rolling_window,
+        n_samples=settings.get('n_samples', 500),
+        robust_quantile=settings.get('robust_quantile', 0.1),
+        default_margin=default_margin,
+        gross_margin_rate=settings.get('gross_margin_rate'),
+        heuristic=heuristic,
+        heuristic_discount=settings.get('heuristic_discount', 0.02),
+        seed=settings.get('seed', 42),
+    )
+    optimizer_seconds = time.perf_counter() - start
+
+    scored = results.dropna(subset=['heuristic_expected_profit'])
+    summary = pd.DataFrame([
+        {
+            'method': 'heuristic',
+            'seconds': heuristic_seconds,
+            'days': len(scored),
+            'promotions_per_day': 1.0,
+            'expected_profit': scored['heuristic_expected_profit'].sum(),
+            'mean_prob_loss': scored['heuristic_prob_loss'].mean(),
+        },
+        {
+            'method': 'optimizer',
+            'seconds': optimizer_seconds,
+            'days': len(scored),
+            'promotions_per_day': scored['n_promoted'].mean(),
+            'expected_profit': scored['expected_profit'].sum(),
+            'mean_prob_loss': scored['prob_loss'].mean(),
+        },
+    ]).set_index('method')
+    summary.attrs['elasticities'] = elasticities
+    summary.attrs['plans_per_day'] = int(results['feasible_plans'].max()) if len(results) else 0
+    return summary, results
+
+
+def optimizer_main(data_path: str = None, config_path: str = None, stores: list = None,
+                   start: str = None, end: str = None):
+    """
+    Optimize daily promotions per store and benchmark against the heuristic.
+
+    Args:
+        data_path: Path to the CSV file or partitioned dataset root.
+                  If None, uses path from config.json
+        config_path: Path to config file. If None, uses default config.json
+        stores: Optional list of store ids to optimize. If None, uses all stores
+        start: Optional inclusive start of the time window (e.g. '2024-06-01')
+        end: Optional exclusive end of the time window
+    """
+    config = load_config(config_path)
+    if data_path is None:
+        data_path = config.get('data_path', 'upload/index_1.csv')
+
+    df = load_data(data_path, stores=stores, start=start, end=end)
+    df = preprocess_datetime(df)
+    df = normalize_coffee_names(df)
+
+    default_margin = config.get('profit_margins', {}).get('default', 2.0)
+    profit_margins = get_profit_margins(config=config, coffee_names=sorted(df['new_coffee_name'].unique()))
+    rolling_window = config.get('promotion', {}).get('rolling_window', 7)
+    optimizer_config = config.get('promotion_optimizer', {})
+
+    groups = df.groupby('store') if 'store' in df.columns else [('all', df)]
+    for store, store_df in groups:
+        print("=" * 60)
+        print(f"Promotion Optimizer vs Heuristic (store: {store})")
+        print("=" * 60)
+        summary, results = benchmark_against_heuristic(
+            store_df, profit_margins, optimizer_config, rolling_window, default_margin
+        )
+        print("Estimated price elasticities:")
+        print(summary.attrs['elasticities'].round(3).to_string())
+        print(f"\nCandidate plans per day: {summary.attrs['plans_per_day']}")
+        print(summary.round(4).to_string())
+        print("\nRecommended plans (last 7 days):")
+        print(results[['plan', 'expected_profit', 'prob_loss']].tail(7).round(3).to_string())
+        if len(results) and not results['n_promoted'].any():
+            print("No promotion is expected to be profitable on any day: the estimated elasticities "
+                  "bring too few extra units to pay for the discount on the units that sell anyway.")
+            if optimizer_config.get('gross_margin_rate') is None:
+                print("With absolute profit_margins a discount can cost more than the margin; set "
+                      "promotion_optimizer.gross_margin_rate in config.json to use a share of the price instead.")
+
+
+if __name__ == "__main__":
+    optimizer_main()
@@ -4,50 +4,79 @@ Main script for coffee sales analysis and predictions.
 
 import pandas as pd
 
+from instrumentation import span, traced
+
 # Import modules 
 try:
     from .data_loader import (
         load_data, preprocess_datetime, normalize_coffee_names,
         prepare_daily_sales, prepare_daily_coffee_sales
     )
-    from .sales_prediction import predict_next_day_sales, calculate_moving_average
-    from .coffee_prediction import predict_most_sold_coffee_month, predict_most_sold_coffee_week
+    from .sales_prediction import (
+        calculate_moving_average, fit_sales_model, forecast_horizon
+    )
+    from .coffee_prediction import (
+        predict_most_sold_coffee_month, predict_most_sold_from_models,
+        fit_coffee_models, forecast_coffee_horizon
+    )
+    from .batch_forecast import batch_forecast
+    from .hourly_forecast import forecast_hourly_counts
+    from .anomaly_detection import (
+        AlertSink, detect_anomalies, detect_hourly_anomalies, residual_anomalies, to_alerts
+    )
     from .promotion_recommendation import (
-        get_default_profit_margins, recommend_daily_promotions,
-        analyze_promotion_scenarios
+        get_default_profit_margins, recommend_daily_promotions
     )
+    from .scenario_runner import build_scenario_grid, run_scenarios, to_impact_results
     from .visualization import (
         plot_sales_prediction, plot_coffee_predictions,
-        plot_promotion_frequency, plot_scenario_analysis
+        plot_promotion_frequency, plot_scenario_analysis, plot_sales_horizon
     )
     from .config_loader import load_config
+    from .order_selection import auto_order_settings
 except ImportError:
     # Fallback for direct execution
     from data_loader import (
         load_data, preprocess_datetime, normalize_coffee_names,
         prepare_daily_sales, prepare_daily_coffee_sales
     )
-    from sales_prediction import predict_next_day_sales, calculate_moving_average
-    from coffee_prediction import predict_most_sold_coffee_month
+    from sales_prediction import (
+        calculate_moving_average, fit_sales_model, forecast_horizon
+    )
+    from coffee_prediction import (
+        predict_most_sold_coffee_month, predict_most_sold_from_models,
+        fit_coffee_models, forecast_coffee_horizon
+    )
+    from batch_forecast import batch_forecast
+    from hourly_forecast import forecast_hourly_counts
+    from anomaly_detection import (
+        AlertSink, detect_anomalies, detect_hourly_anomalies, residual_anomalies, to_alerts
+    )
     from .promotion_recommendation import (
-        get_default_profit_margins, recommend_daily_promotions,
-        analyze_promotion_scenarios
+        get_default_profit_margins, recommend_daily_promotions
     )
+    from scenario_runner import build_scenario_grid, run_scenarios, to_impact_results
     from visualization import (
         plot_sales_prediction, plot_coffee_predictions,
-        plot_promotion_frequency, plot_scenario_analysis
+        plot_promotion_frequency, plot_scenario_analysis, plot_sales_horizon
     )
     from config_loader import load_config
+    from order_selection import auto_order_settings
 
 
-def promotional_analsysis_main(data_path: str = None, config_path: str = None):
+@traced(category='promotional_analysis')
+def promotional_analsysis_main(data_path: str = None, config_path: str = None,
+                               stores: list = None, start: str = None, end: str = None):
     """
     Main execution function.
     
     Args:
-        data_path: Path to the CSV file (relative to project root). 
+        data_path: Path to the CSV file or partitioned dataset root (relative to project root). 
                   If None, uses path from config.json
         config_path: Path to config file. If None, uses default config.json
+        stores: Optional list of store ids to analyze. If None, uses the union of all stores
+        start: Optional inclusive start of the time window (e.g. '2024-06-01')
+        end: Optional exclusive end of the time window
     """
     # Load configuration
     config = load_config(config_path)
@@ -58,9 +87,11 @@ def promotional_analsysis_main(data_path: str = None, config_path: str = None):
     
     # Load and preprocess data
     print("Loading data...")
-    df = load_data(data_path)
-    df = preprocess_datetime(df)
-    df = normalize_coffee_names(df)
+    with span('load_data', 'promotional_analysis') as stage:
+        df = load_data(data_path, stores=stores, start=start, end=end)
+        df = preprocess_datetime(df)
+        df = normalize_coffee_names(df)
+        stage.rows_out = len(df)
     
     print(f"Data loaded: {len(df)} records")
     print(f"Coffee types: {df['new_coffee_name'].value_counts().to_dict()}\n")
@@ -68,6 +99,9 @@ def promotional_analsysis_main(data_path: str = None, config_path: str = None):
     # Get settings from config
     sales_config = config.get('sales_prediction', {})
     coffee_config = config.get('coffee_prediction', {})
+    batch_config = config.get('batch_forecast', {})
+    hourly_config = config.get('hourly_forecast', {})
+    anomaly_config = config.get('anomaly_detection', {})
     promotion_config = config.get('promotion', {})
     scenario_config = config.get('scenario_analysis', {})
     
@@ -75,63 +109,184 @@ def promotional_analsysis_main(data_path: str = None, config_path: str = None):
     print("=" * 60)
     print("1. Sales Prediction")
     print("=" * 60)
-    daily_sales = prepare_daily_sales(df)
-    forecast = predict_next_day_sales(
-        daily_sales,
-        training_days=sales_config.get('training_days', 365),
-        order=tuple(sales_config.get('order', [1, 1, 1])),
-        seasonal_order=tuple(sales_config.get('seasonal_order', [1, 1, 1, 12]))
-    )
+    window = anomaly_config.get('window', 28)
+    threshold = anomaly_config.get('threshold', 3.5)
+    min_scale = anomaly_config.get('min_scale', 1.0)
+    with span('detect_daily_anomalies', 'promotional_analysis', rows_in=len(df)) as stage:
+        daily_sales = prepare_daily_sales(df)
+        daily_scores = detect_anomalies(
+            daily_sales, window=window, threshold=threshold,
+            period=anomaly_config.get('daily_period', 1), min_scale=min_scale
+        )
+        flagged_days = daily_scores.index[daily_scores['is_anomaly']]
+        stage.rows_out = len(flagged_days)
+    exclude_days = flagged_days if anomaly_config.get('exclude_from_training', False) else None
+    
+    with span('fit_sales_model', 'promotional_analysis', rows_in=len(df)) as stage:
+        sales_model = fit_sales_model(
+            daily_sales,
+            training_days=sales_config.get('training_days', 365),
+            order=tuple(sales_config.get('order', [1, 1, 1])),
+            seasonal_order=tuple(sales_config.get('seasonal_order', [1, 1, 1, 12])),
+            auto_order=auto_order_settings(sales_config.get('auto_order')),
+            exclude_dates=exclude_days
+        )
+        forecast = forecast_horizon(sales_model, steps=1)['mean'].iloc[0]
+        stage.rows_out = len(daily_sales)
     moving_avg = calculate_moving_average(daily_sales, window=7)
     next_date = daily_sales.index[-1] + pd.offsets.Day(1)
     
     print(f"Predicted coffee sales for next day: {forecast:.2f}")
     plot_sales_prediction(daily_sales, moving_avg, forecast, next_date)
     
+    horizon_config = sales_config.get('horizon', {})
+    with span('forecast_sales_horizon', 'promotional_analysis') as stage:
+        sales_horizon = forecast_horizon(
+            sales_model,
+            steps=horizon_config.get('steps', 14),
+            alpha=horizon_config.get('alpha', 0.05)
+        )
+        stage.rows_out = len(sales_horizon)
+    print(f"\n{len(sales_horizon)}-day sales forecast with "
+          f"{1 - horizon_config.get('alpha', 0.05):.0%} intervals:")
+    print(sales_horizon.round(2))
+    plot_sales_horizon(daily_sales, sales_horizon)
+    
+    with span('forecast_hourly_counts', 'promotional_analysis', rows_in=len(df)) as stage:
+        hourly_forecast = forecast_hourly_counts(
+            df,
+            steps=hourly_config.get('steps', 24),
+            training_days=hourly_config.get('training_days', 28),
+            daily_order=hourly_config.get('daily_order', 4),
+            weekly_order=hourly_config.get('weekly_order', 3)
+        )
+        stage.rows_out = len(hourly_forecast)
+    open_hours = hourly_forecast[hourly_forecast['forecast'] > 0]
+    print("\nHourly transaction forecast for staffing (open hours):")
+    print(open_hours.round(2).to_string(index=False))
+    
+    with span('detect_anomalies', 'promotional_analysis', rows_in=len(df)) as stage:
+        residual_scores = residual_anomalies(sales_model, window=window, threshold=threshold,
+                                             min_scale=min_scale)
+        hourly_anomalies = detect_hourly_anomalies(
+            df,
+            window=anomaly_config.get('hourly_window', 28),
+            threshold=threshold,
+            min_scale=anomaly_config.get('hourly_min_scale', 2.0)
+        )
+        alerts = (to_alerts(daily_scores, 'daily_sales', 'rolling_mad')
+                  + to_alerts(residual_scores, 'daily_sales', 'sarimax_residual')
+                  + to_alerts(hourly_anomalies, 'hourly_transactions', 'rolling_mad'))
+        stage.rows_out = len(alerts)
+    print(f"\nAnomalous sales days (rolling median/MAD, |z| > {threshold}):")
+    print(daily_scores[daily_scores['is_anomaly']].round(2).to_string())
+    print(f"Anomalous sales days (SARIMAX residuals): "
+          f"{[str(day.date()) for day in residual_scores.index[residual_scores['is_anomaly']]]}")
+    print(f"Anomalous store-hours: {len(hourly_anomalies)}")
+    if exclude_days is not None:
+        print(f"Excluded {len(exclude_days)} anomalous days from sales model training")
+    alert_target = anomaly_config.get('alert_target')
+    if alert_target and alerts:
+        sink = AlertSink(alert_target, anomaly_config.get('alert_state'))
+        try:
+            written = sink.emit_new(alerts)
+        finally:
+            sink.close()
+        print(f"{written} new alerts written to {alert_target} ({len(alerts) - written} already sent)")
+    
     # 2. Predict most sold coffee
     print("\n" + "=" * 60)
     print("2. Most Popular Coffee Prediction")
     print("=" * 60)
-    most_sold, predicted_sales, all_predictions = predict_most_sold_coffee_month(
-        df,
-        months_back=coffee_config.get('months_back', 12),
-        order=tuple(coffee_config.get('order', [1, 1, 1])),
-        seasonal_order=tuple(coffee_config.get('seasonal_order', [1, 1, 1, 12]))
-    )
+    with span('predict_most_sold_coffee_month', 'promotional_analysis', rows_in=len(df)) as stage:
+        most_sold, predicted_sales, all_predictions = predict_most_sold_coffee_month(
+            df,
+            months_back=coffee_config.get('months_back', 12),
+            order=tuple(coffee_config.get('order', [1, 1, 1])),
+            seasonal_order=tuple(coffee_config.get('seasonal_order', [1, 1, 1, 12])),
+            auto_order=auto_order_settings(coffee_config.get('auto_order'))
+        )
+        stage.rows_out = len(all_predictions)
     print(f"Predicted most sold coffee for next month: {most_sold}")
     print(f"Predicted sales: {predicted_sales:.2f}")
     plot_coffee_predictions(all_predictions)
     
-    most_sold, predicted_sales, all_predictions = predict_most_sold_coffee_week(
-        df,
-        weeks_back=coffee_config.get('weeks_back', 4),
-        order=tuple(coffee_config.get('order', [1, 1, 1])),
-        seasonal_order=tuple(coffee_config.get('seasonal_order', [1, 1, 1, 12]))
-    )
+    # Fit the weekly models once; reuse them for the point prediction and the horizon
+    with span('predict_most_sold_coffee_week', 'promotional_analysis', rows_in=len(df)) as stage:
+        weekly_models = fit_coffee_models(
+            df, 'W',
+            periods_back=coffee_config.get('weeks_back', 4),
+            order=tuple(coffee_config.get('order', [1, 1, 1])),
+            seasonal_order=tuple(coffee_config.get('seasonal_order', [1, 1, 1, 12])),
+            auto_order=auto_order_settings(coffee_config.get('auto_order'))
+        )
+        most_sold, predicted_sales, all_predictions = predict_most_sold_from_models(weekly_models)
+        stage.rows_out = len(all_predictions)
     print(f"Predicted most sold coffee for next week: {most_sold}")
     print(f"Predicted sales: {predicted_sales:.2f}")
     plot_coffee_predictions(all_predictions)
     
+    coffee_horizon_config = coffee_config.get('horizon', {})
+    with span('forecast_coffee_horizon', 'promotional_analysis') as stage:
+        coffee_horizon = forecast_coffee_horizon(
+            weekly_models,
+            steps=coffee_horizon_config.get('steps', 2),
+            alpha=coffee_horizon_config.get('alpha', 0.05)
+        )
+        stage.rows_out = len(coffee_horizon)
+    print("\nWeekly coffee forecast with intervals:")
+    print(coffee_horizon.round(2).to_string(index=False))
+    
+    with span('batch_forecast', 'promotional_analysis', rows_in=len(df)) as stage:
+        batch_forecasts = batch_forecast(
+            df,
+            steps=batch_config.get('steps', 1),
+            method=batch_config.get('method', 'ses'),
+            season_length=batch_config.get('season_length', 7),
+            important=batch_config.get('important')
+        )
+        stage.rows_out = len(batch_forecasts)
+    print("\nBatched daily forecast per coffee:")
+    print(batch_forecasts.to_string(index=False))
+    
     # 3. Promotion recommendations
     print("\n" + "=" * 60)
     print("3. Daily Promotion Recommendations")
     print("=" * 60)
-    daily_coffee_sales = prepare_daily_coffee_sales(df)
-    profit_margins = get_default_profit_margins(
-        daily_coffee_sales.columns.tolist(), 
-        config=config
-    )
-    default_margin = config.get('profit_margins', {}).get('default', 2.0)
-    promotion_recommendations = recommend_daily_promotions(
-        daily_coffee_sales, 
-        profit_margins, 
-        rolling_window=promotion_config.get('rolling_window', 7),
-        default_margin=default_margin
-    )
+    with span('recommend_daily_promotions', 'promotional_analysis', rows_in=len(df)) as stage:
+        daily_coffee_sales = prepare_daily_coffee_sales(df)
+        profit_margins = get_default_profit_margins(
+            daily_coffee_sales.columns.tolist(), 
+            config=config
+        )
+        default_margin = config.get('profit_margins', {}).get('default', 2.0)
+        promotion_recommendations = recommend_daily_promotions(
+            daily_coffee_sales, 
+            profit_margins, 
+            rolling_window=promotion_config.get('rolling_window', 7),
+            default_margin=default_margin
+        )
+        stage.rows_out = len(promotion_recommendations)
+    
+    with span('promotion_partners', 'promotional_analysis', rows_in=len(df)) as stage:
+        # Imported here: user_analysis.copurchase imports promotional_analysis.data_loader,
+        # and the user_analysis package pulls in sklearn, the registry and the feature store
+        from user_analysis.copurchase import CoPurchaseIndex, association_rules, promotion_partners
+        rules = association_rules(CoPurchaseIndex.from_transactions(df))
+        latest = promotion_recommendations.iloc[-7:]
+        partners = promotion_partners(rules, latest.unique().tolist()).set_index('antecedent')
+        stage.rows_out = len(partners)
     
     print("Recommended promotion drink per day (top 7 latest):")
-    for day in list(promotion_recommendations.index)[-7:]:
-        print(f"{day.date()}: Promote '{promotion_recommendations[day]}'")
+    for day in latest.index:
+        drink = promotion_recommendations[day]
+        line = f"{day.date()}: Promote '{drink}'"
+        if drink in partners.index:
+            partner = partners.loc[drink]
+            line += f", pair with '{partner['consequent']}' (lift {partner['lift']:.2f})"
+        print(line)
+    if partners.empty:
+        print("No drink is co-purchased with these promotions more often than chance (lift > 1)")
     
     promotion_df = pd.DataFrame({'recommended_drink': promotion_recommendations})
     print("\nLast 14 days recommendations:")
@@ -149,15 +304,20 @@ def promotional_analsysis_main(data_path: str = None, config_path: str = None):
         'raised': 1.2
     })
     profit_margin_scenarios = {
-        'base': profit_margins,
-        'lowered': {k: v * multipliers.get('lowered', 0.8) for k, v in profit_margins.items()},
-        'raised': {k: v * multipliers.get('raised', 1.2) for k, v in profit_margins.items()},
+        label: {k: v * multiplier for k, v in profit_margins.items()}
+        for label, multiplier in multipliers.items()
     }
     rolling_windows = scenario_config.get('rolling_windows', [3, 7, 14, 30])
     
-    impact_results = analyze_promotion_scenarios(
-        df, profit_margin_scenarios, rolling_windows
-    )
+    with span('analyze_promotion_scenarios', 'promotional_analysis', rows_in=len(df),
+              scenarios=len(profit_margin_scenarios) * len(rolling_windows)) as stage:
+        scenarios = build_scenario_grid(profit_margins, multipliers, rolling_windows=rolling_windows)
+        # Stores are pooled, as in the rest of this report; a grid this small runs in-process
+        _, daily_recommendations = run_scenarios(
+            df.drop(columns='store', errors='ignore'), scenarios, n_jobs=1, return_daily=True
+        )
+        impact_results = to_impact_results(scenarios, daily_recommendations)
+        stage.rows_out = sum(len(series) for series in impact_results.values())
     
     print("Example: Most common recommendation under different scenarios (last 12 months)")
     for key, series in impact_results.items():
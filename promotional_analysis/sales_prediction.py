@@ -4,12 +4,106 @@ Sales forecasting using SARIMA models.
 
 import pandas as pd
 import numpy as np
+import weakref
+from typing import Dict, Iterable, Optional
+from scipy import stats
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+try:
+    from .order_selection import select_order
+except ImportError:
+    # Fallback for direct execution
+    from order_selection import select_order
+
+# Fitted model -> cached predicted mean and standard error for the longest horizon so far
+_HORIZON_CACHE = weakref.WeakKeyDictionary()
+
+
+def fit_sales_model(daily_sales: pd.Series, training_days: int = 365,
+                    order: tuple = (1, 1, 1),
+                    seasonal_order: tuple = (1, 1, 1, 12),
+                    auto_order: Optional[Dict] = None,
+                    exclude_dates: Optional[Iterable] = None):
+    """
+    Fit the SARIMA sales model on the last N days of daily sales.
+    
+    Excluded days (e.g. flagged by anomaly_detection) are set to missing; the
+    state-space model skips them in the likelihood instead of learning from them.
+    
+    Args:
+        daily_sales: Series with daily sales data
+        training_days: Number of days to use for training
+        order: ARIMA order (p, d, q)
+        seasonal_order: Seasonal ARIMA order (P, D, Q, s)
+        auto_order: Optional select_order settings. If given, order and seasonal_order
+                    are chosen by a cached AIC/BIC search and only used as fallback
+        exclude_dates: Optional days to leave out of training
+        
+    Returns:
+        Fitted SARIMAX results object
+    """
+    # Use the last N days as training data: a binary search on the sorted index,
+    # equivalent to the deprecated daily_sales.last(f'{training_days}D')
+    cutoff = daily_sales.index[-1] - pd.Timedelta(days=training_days)
+    training_data = daily_sales.iloc[daily_sales.index.searchsorted(cutoff, side='right'):]
+    if exclude_dates is not None:
+        training_data = training_data.mask(training_data.index.isin(pd.DatetimeIndex(exclude_dates)))
+    
+    if auto_order is not None:
+        selection = select_order(training_data, name='daily_sales', key_series=daily_sales,
+                                 default_order=order, default_seasonal_order=seasonal_order,
+                                 **auto_order)
+        order, seasonal_order = selection['order'], selection['seasonal_order']
+    
+    # Fit SARIMA model
+    model = SARIMAX(training_data, order=order, seasonal_order=seasonal_order)
+    return model.fit(disp=False)
+
+
+def forecast_horizon(model_fit, steps: int = 14, alpha: float = 0.05,
+                     clip_negative: bool = False) -> pd.DataFrame:
+    """
+    Forecast several steps ahead with confidence bands from an already-fitted model.
+    
+    The predicted mean and standard error are cached per fitted model for the
+    longest horizon requested so far, so repeated calls with other horizons or
+    confidence levels do not refit or re-run the state-space forecast.
+    
+    Args:
+        model_fit: Fitted SARIMAX results object
+        steps: Number of periods to forecast
+        alpha: Significance level of the bands (0.05 gives 95% intervals)
+        clip_negative: Whether to clip mean and bands at zero (for counts)
+        
+    Returns:
+        DataFrame indexed by forecast date with 'mean', 'lower' and 'upper' columns
+    """
+    cached = _HORIZON_CACHE.get(model_fit)
+    if cached is None or len(cached) < steps:
+        prediction = model_fit.get_forecast(steps=steps)
+        cached = pd.DataFrame({
+            'mean': prediction.predicted_mean,
+            'se': prediction.se_mean,
+        })
+        _HORIZON_CACHE[model_fit] = cached
+    
+    horizon = cached.iloc[:steps]
+    z = stats.norm.ppf(1 - alpha / 2)
+    result = pd.DataFrame({
+        'mean': horizon['mean'],
+        'lower': horizon['mean'] - z * horizon['se'],
+        'upper': horizon['mean'] + z * horizon['se'],
+    })
+    if clip_negative:
+        result = result.clip(lower=0)
+    return result
+
 
 def predict_next_day_sales(daily_sales: pd.Series, training_days: int = 365,
                            order: tuple = (1, 1, 1), 
-                           seasonal_order: tuple = (1, 1, 1, 12)) -> float:
+                           seasonal_order: tuple = (1, 1, 1, 12),
+                           auto_order: Optional[Dict] = None,
+                           exclude_dates: Optional[Iterable] = None) -> float:
     """
     Predict sales for the next day using SARIMA model.
     
@@ -18,20 +112,18 @@ def predict_next_day_sales(daily_sales: pd.Series, training_days: int = 365,
         training_days: Number of days to use for training
         order: ARIMA order (p, d, q)
         seasonal_order: Seasonal ARIMA order (P, D, Q, s)
+        auto_order: Optional select_order settings. If given, order and seasonal_order
+                    are chosen by a cached AIC/BIC search and only used as fallback
+        exclude_dates: Optional days to leave out of training
         
     Returns:
         Predicted sales value for next day
     """
-    # Use the last N days as training data
-    training_data = daily_sales.last(f'{training_days}D')
-    
-    # Fit SARIMA model
-    model = SARIMAX(training_data, order=order, seasonal_order=seasonal_order)
-    model_fit = model.fit(disp=False)
+    model_fit = fit_sales_model(daily_sales, training_days, order, seasonal_order, auto_order,
+                                exclude_dates)
     
     # Forecast next day
-    forecast = model_fit.forecast(steps=1)
-    return forecast.iloc[0]
+    return forecast_horizon(model_fit, steps=1)['mean'].iloc[0]
 
 
 def calculate_moving_average(series: pd.Series, window: int = 7) -> pd.Series:
@@ -0,0 +1,316 @@
+"""
+Parallel what-if runner for promotion scenarios over margin, window and date grids.
+
+Each scenario picks, per day, the drink with the highest rolling profit
+(margin x rolling units), as analyze_promotion_scenarios does; exact ties go
+to the first drink alphabetically. The daily units pivot is built once, placed in shared memory, and every worker
+evaluates its chunk of scenarios against that single copy.
+"""
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import numpy as np
+
+try:
+    from .config_loader import load_config, get_profit_margins
+    from .data_loader import load_data, preprocess_datetime, normalize_coffee_names
+except ImportError:
+    # Fallback for direct execution
+    from config_loader import load_config, get_profit_margins
+    from data_loader import load_data, preprocess_datetime, normalize_coffee_names
+
+warnings.filterwarnings("ignore")
+
+# Shared arrays attached by each worker process (set by _init_worker)
+_SHARED: Dict[str, np.ndarray] = {}
+
+
+def build_scenario_grid(base_margins: Dict[str, float],
+                        multipliers: Optional[Dict[str, float]] = None,
+                        margin_grid: Optional[Dict[str, Sequence[float]]] = None,
+                        rolling_windows: Sequence[int] = (7,),
+                        date_ranges: Optional[Sequence[Tuple]] = None) -> pd.DataFrame:
+    """
+    Expand margin, window and date-range options into one row per scenario.
+
+    Every multiplier scales all base margins; every combination of the
+    per-drink overrides in margin_grid then replaces those drinks' margins.
+
+    Args:
+        base_margins: Profit margin per drink
+        multipliers: Named multipliers of the base margins. If None, {'base': 1.0}
+        margin_grid: Optional candidate margins per drink, e.g. {'Latte': [2.0, 3.0]}
+        rolling_windows: Rolling window sizes in trading days
+        date_ranges: Optional [start, end) pairs (None for open ends). If None, the full history
+
+    Returns:
+        DataFrame with scenario, margin_label, window, start, end and margins (dict per row)
+    """
+    multipliers = multipliers or {'base': 1.0}
+    margin_grid = margin_grid or {}
+    date_ranges = date_ranges or [(None, None)]
+    override_drinks = list(margin_grid)
+    overrides = list(product(*(margin_grid[drink] for drink in override_drinks)))
+
+    rows = []
+    for (label, multiplier), values, window, (start, end) in product(
+            multipliers.items(), overrides, rolling_windows, date_ranges):
+        margins = {drink: margin * multiplier for drink, margin in base_margins.items()}
+        margins.update(zip(override_drinks, values))
+        suffix = ','.join(f"{drink}={value:g}" for drink, value in zip(override_drinks, values))
+        rows.append({
+            'margin_label': f"{label}|{suffix}" if suffix else label,
+            'window': int(window),
+            'start': pd.Timestamp(start) if start is not None else pd.NaT,
+            'end': pd.Timestamp(end) if end is not None else pd.NaT,
+            'margins': margins,
+        })
+    scenarios = pd.DataFrame(rows)
+    scenarios.insert(0, 'scenario', np.arange(len(scenarios)))
+    return scenarios
+
+
+def stack_daily_units(df: pd.DataFrame, date_col: str = 'date',
+                      coffee_col: str = 'new_coffee_name') -> Tuple[np.ndarray, np.ndarray, list, pd.DatetimeIndex, list]:
+    """
+    Build the daily units pivot of every store on a shared date axis.
+
+    Args:
+        df: Transactions with a date column, normalized coffee names and an optional store column
+        date_col: Name of the date column
+        coffee_col: Name of the coffee name column
+
+    Returns:
+        Tuple of (units array of shape (n_stores, n_days, n_drinks), traded mask
+        of shape (n_stores, n_days), store ids, DatetimeIndex of days, sorted drinks)
+    """
+    days = pd.to_datetime(df[date_col]).dt.normalize().rename('day')
+    stores = df['store'].astype(str) if 'store' in df.columns else pd.Series('all', index=df.index)
+    pivot = df.groupby([stores.rename('store'), days, df[coffee_col]]).size().unstack(fill_value=0)
+    pivot = pivot.sort_index(axis=1)
+
+    store_ids = list(pivot.index.get_level_values('store').unique())
+    dates = pd.DatetimeIndex(pivot.index.get_level_values('day').unique()).sort_values()
+    full = pivot.reindex(pd.MultiIndex.from_product([store_ids, dates]))
+    traded = full.notna().all(axis=1).to_numpy().reshape(len(store_ids), len(dates))
+    units = full.fillna(0).to_numpy(dtype=np.float64).reshape(len(store_ids), len(dates), -1)
+    return units, traded, store_ids, dates, list(pivot.columns)
+
+
+def _share(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, tuple]:
+    """Copy an array into a new shared memory block; returns the block and its attach spec."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _init_worker(units_spec: tuple, traded_spec: tuple) -> None:
+    """Pool initializer: attach the shared pivot once per worker process."""
+    for key, (name, shape, dtype) in (('units', units_spec), ('traded', traded_spec)):
+        block = shared_memory.SharedMemory(name=name)
+        _SHARED[key + '_block'] = block
+        _SHARED[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _evaluate(units: np.ndarray, traded: np.ndarray, store_index: int, tasks: List[tuple],
+              dates: pd.DatetimeIndex, return_daily: bool) -> Tuple[list, list]:
+    """
+    Evaluate scenarios for one store.
+
+    Rolling units come from one cumulative sum per distinct window; a
+    scenario then costs one (days x drinks) multiply and an argmax.
+
+    Args:
+        units: Units array from stack_daily_units
+        traded: Traded mask from stack_daily_units
+        store_index: Store to evaluate
+        tasks: Tuples of (scenario id, margin vector, window, start, end)
+        dates: Shared date axis
+        return_daily: Whether to return the per-day recommendations
+
+    Returns:
+        Tuple of (summary rows, daily rows as (scenario, day codes, drink codes))
+    """
+    mask = traded[store_index]
+    values = units[store_index][mask]
+    days = dates[mask]
+    cumulative = np.vstack([np.zeros((1, values.shape[1])), values.cumsum(axis=0)])
+    upper = np.arange(1, len(values) + 1)
+    rolling = {}
+
+    summary, daily = [], []
+    for scenario, margins, window, start, end in tasks:
+        if window not in rolling:
+            rolling[window] = cumulative[upper] - cumulative[np.maximum(upper - window, 0)]
+        lo = 0 if start is None else days.searchsorted(start)
+        hi = len(days) if end is None else days.searchsorted(end)
+        profit = rolling[window][lo:hi] * margins
+        if len(profit) == 0:
+            continue
+        pick = profit.argmax(axis=1)
+        picked_profit = profit[np.arange(len(pick)), pick]
+        recommended = np.bincount(pick, minlength=len(margins))
+        profit_sum = np.bincount(pick, weights=picked_profit, minlength=len(margins))
+        for drink in np.flatnonzero(recommended):
+            summary.append((scenario, store_index, int(drink), int(recommended[drink]),
+                            recommended[drink] / len(pick), profit_sum[drink] / recommended[drink]))
+        if return_daily:
+            daily.append((scenario, store_index, np.flatnonzero(mask)[lo:hi], pick))
+    return summary, daily
+
+
+def _evaluate_shared(store_index: int, tasks: List[tuple], dates: pd.DatetimeIndex,
+                     return_daily: bool) -> Tuple[list, list]:
+    """Worker entry point: _evaluate against the attached shared pivot."""
+    return _evaluate(_SHARED['units'], _SHARED['traded'], store_index, tasks, dates, return_daily)
+
+
+def run_scenarios(df: pd.DataFrame, scenarios: pd.DataFrame, n_jobs: Optional[int] = None,
+                  chunk_size: Optional[int] = None, return_daily: bool = False,
+                  date_col: str = 'date',
+                  coffee_col: str = 'new_coffee_name') -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Run every scenario for every store, across a process pool.
+
+    Rolling windows span trading days and include history before a
+    scenario's start date, so a date range only restricts the days evaluated.
+
+    Args:
+        df: Transactions with a date column, normalized coffee names and an optional store column
+        scenarios: Output of build_scenario_grid
+        n_jobs: Number of worker processes. If None, uses the CPU count; 1 runs in-process
+        chunk_size: Scenarios per task. If None, about four tasks per worker and store
+        return_daily: Also return the per-day recommended drink of every scenario
+        date_col: Name of the date column
+        coffee_col: Name of the coffee name column
+
+    Returns:
+        Tuple of (tidy results with one row per store, scenario and recommended
+        drink, daily recommendations or None)
+    """
+    units, traded, store_ids, dates, drinks = stack_daily_units(df, date_col, coffee_col)
+    tasks = [
+        (row.scenario, np.array([row.margins.get(drink, 0.0) for drink in drinks]), row.window,
+         None if pd.isna(row.start) else row.start, None if pd.isna(row.end) else row.end)
+        for row in scenarios.itertuples(index=False)
+    ]
+    n_jobs = n_jobs or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-len(tasks) // (n_jobs * 4)))
+    chunks = [(store, tasks[i:i + chunk_size])
+              for store in range(len(store_ids)) for i in range(0, len(tasks), chunk_size)]
+
+    if n_jobs == 1:
+        outputs = [_evaluate(units, traded, store, chunk, dates, return_daily) for store, chunk in chunks]
+    else:
+        units_block, units_spec = _share(units)
+        traded_block, traded_spec = _share(traded)
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(units_spec, traded_spec)) as pool:
+                futures = [pool.submit(_evaluate_shared, store, chunk, dates, return_daily)
+                           for store, chunk in chunks]
+                outputs = [future.result() for future in futures]
+        finally:
+            for block in (units_block, traded_block):
+                block.close()
+                block.unlink()
+
+    columns = ['scenario', 'store', 'drink', 'days_recommended', 'share', 'mean_rolling_profit']
+    results = pd.DataFrame([row for summary, _ in outputs for row in summary], columns=columns)
+    results['store'] = np.asarray(store_ids, dtype=object)[results['store'].to_numpy(dtype=int)]
+    results['drink'] = np.asarray(drinks, dtype=object)[results['drink'].to_numpy(dtype=int)]
+    meta = scenarios.drop(columns='margins')
+    results = meta.merge(results, on='scenario').sort_values(
+        ['store', 'scenario', 'days_recommended'], ascending=[True, True, False]
+    ).reset_index(drop=True)
+
+    if not return_daily:
+        return results, None
+    parts = [
+        pd.DataFrame({
+            'scenario': scenario,
+            'store': store_ids[store],
+            'date': dates[day_codes],
+            'recommended_drink': np.asarray(drinks, dtype=object)[pick],
+        })
+        for _, daily in outputs for scenario, store, day_codes, pick in daily
+    ]
+    daily = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        columns=['scenario', 'store', 'date', 'recommended_drink'])
+    return results, daily
+
+
+def to_impact_results(scenarios: pd.DataFrame, daily: pd.DataFrame) -> Dict[str, pd.Series]:
+    """
+    Convert daily runner output to analyze_promotion_scenarios' dictionary format.
+
+    Args:
+        scenarios: Output of build_scenario_grid (single store, full date range)
+        daily: Daily recommendations from run_scenarios(return_daily=True)
+
+    Returns:
+        Dictionary mapping '<label>_profit_margin__<window>d_rolling' to a
+        Series of recommended drinks indexed by date
+    """
+    impact_results = {}
+    for scenario, group in daily.groupby('scenario', sort=False):
+        row = scenarios.loc[scenarios['scenario'] == scenario].iloc[0]
+        key = f"{row['margin_label']}_profit_margin__{row['window']}d_rolling"
+        impact_results[key] = pd.Series(group['recommended_drink'].to_numpy(),
+                                        index=pd.DatetimeIndex(group['date']))
+    return impact_results
+
+
+def scenario_main(data_path: str = None, config_path: str = None, stores: list = None,
+                  output_path: str = None, start: str = None, end: str = None):
+    """
+    Sweep the scenario grid from config.json for every store.
+
+    Args:
+        data_path: Path to the CSV file or partitioned dataset root.
+                  If None, uses path from config.json
+        config_path: Path to config file. If None, uses default config.json
+        stores: Optional list of store ids to include. If None, uses all stores
+        output_path: Optional csv path for the tidy results table
+        start: Optional inclusive start of the time window (e.g. '2024-06-01')
+        end: Optional exclusive end of the time window
+    """
+    config = load_config(config_path)
+    if data_path is None:
+        data_path = config.get('data_path', 'upload/index_1.csv')
+
+    df = load_data(data_path, stores=stores, start=start, end=end)
+    df = preprocess_datetime(df)
+    df = normalize_coffee_names(df)
+
+    scenario_config = config.get('scenario_analysis', {})
+    base_margins = get_profit_margins(config=config, coffee_names=sorted(df['new_coffee_name'].unique()))
+    scenarios = build_scenario_grid(
+        base_margins,
+        multipliers=scenario_config.get('profit_multipliers'),
+        margin_grid=scenario_config.get('margin_grid'),
+        rolling_windows=scenario_config.get('rolling_windows', [3, 7, 14, 30]),
+        date_ranges=scenario_config.get('date_ranges'),
+    )
+    results, _ = run_scenarios(df, scenarios, n_jobs=scenario_config.get('n_jobs'))
+    print(f"Evaluated {len(scenarios)} scenarios")
+
+    top = results.drop_duplicates(['store', 'scenario'])
+    print("\nMost recommended drink per scenario (first 20):")
+    print(top[['store', 'margin_label', 'window', 'start', 'end', 'drink', 'share']].head(20).to_string(index=False))
+    print("\nHow often each drink is the top recommendation across scenarios:")
+    print(top.groupby(['store', 'drink']).size().rename('scenarios').to_string())
+    if output_path is not None:
+        results.to_csv(output_path, index=False)
+        print(f"\nResults written to {output_path}")
+    return results
+
+
+if __name__ == "__main__":
+    scenario_main()
@@ -51,6 +51,37 @@ def plot_sales_prediction(daily_sales: pd.Series, moving_avg: pd.Series,
     plt.show()
 
 
+def plot_sales_horizon(daily_sales: pd.Series, horizon: pd.DataFrame,
+                       history_days: int = 90,
+                       title: str = "Daily Coffee Sales Forecast with Prediction Intervals",
+                       figsize: tuple = (12, 6)) -> None:
+    """
+    Plot recent sales followed by a multi-day forecast and its confidence band.
+    
+    Args:
+        daily_sales: Historical daily sales series
+        horizon: DataFrame with 'mean', 'lower' and 'upper' columns indexed by date
+        history_days: Number of most recent historical days to show
+        title: Plot title
+        figsize: Figure size tuple
+    """
+    recent = daily_sales.iloc[-history_days:]
+    
+    plt.figure(figsize=figsize)
+    plt.plot(recent.index, recent.values, lw=0.8, label='Historical Daily Sales')
+    plt.plot(horizon.index, horizon['mean'], 'r-', lw=1.5, marker='o', 
+             markersize=3, label='Forecast')
+    plt.fill_between(horizon.index, horizon['lower'], horizon['upper'], 
+                     color='red', alpha=0.15, label='Prediction Interval')
+    
+    plt.title(title)
+    plt.xlabel("Date")
+    plt.ylabel("Sales (money)")
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+
 def plot_coffee_predictions(predictions: dict, title: str = "Predicted Coffee Sales by Type",
                            figsize: tuple = (8, 5)) -> None:
     """
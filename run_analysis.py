@@ -3,6 +3,7 @@ Runner script for coffee sales analysis.
 Can be executed from the project root directory.
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -16,12 +17,98 @@ from user_analysis import user_analysis_main
 from eda_weekday_weekend import eda_weekday_weekend_main
 from kmeans.kmeans_main import kmeans_main
 from eda_Hours0fDay.eda_hours_main import eda_hourly_transactions_main 
+from transaction_store import run_per_store
+from instrumentation import (
+    PROFILE_MODES, format_report, format_summary, profile_call, span,
+    write_chrome_trace, write_json_trace, write_profile
+)
+
+ENTRY_POINTS = [
+    eda_hourly_transactions_main,
+    eda_milk_main,
+    eda_weekday_weekend_main,
+    user_analysis_main,
+    kmeans_main,
+    promotional_analsysis_main,
+]
+
+
+def parse_args(argv=None):
+    """
+    Parse command line options for the analysis runner.
+
+    Args:
+        argv: Optional list of arguments. If None, uses sys.argv
+
+    Returns:
+        argparse.Namespace with data_path, stores, start, end, per_store, workers, tracing and profiling options
+    """
+    parser = argparse.ArgumentParser(description="Run all coffee sales analyses.")
+    parser.add_argument("--data-path", default=None,
+                        help="CSV file or store=/year=/month= partitioned dataset root")
+    parser.add_argument("--stores", nargs="+", default=None,
+                        help="Store ids to include (default: all stores)")
+    parser.add_argument("--start", default=None, metavar="DATETIME",
+                        help="Only analyze transactions at or after this time, e.g. 2024-06-01")
+    parser.add_argument("--end", default=None, metavar="DATETIME",
+                        help="Only analyze transactions before this time")
+    parser.add_argument("--per-store", action="store_true",
+                        help="Run every analysis separately for each store instead of on the union")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --per-store runs (ignored with --profile)")
+    parser.add_argument("--trace", default=None, metavar="PATH",
+                        help="Write per-stage timing/memory spans to a JSON trace file")
+    parser.add_argument("--chrome-trace", default=None, metavar="PATH",
+                        help="Also write spans in Chrome trace format (chrome://tracing, Perfetto)")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Run the pipeline under the sampling profiler or cProfile; "
+                             "--per-store runs then stay in this process, one store after another")
+    parser.add_argument("--profile-output", default="profiles", metavar="DIR",
+                        help="Directory for flame-graph input and profile summary (default: profiles)")
+    parser.add_argument("--profile-top", type=int, default=25,
+                        help="Number of functions in the hot-function table")
+    parser.add_argument("--profile-interval", type=float, default=0.005,
+                        help="Sampling interval in seconds for --profile sample")
+    return parser.parse_args(argv)
+
+
+def run_pipeline(args):
+    """
+    Run every analysis entry point once.
+
+    Args:
+        args: Parsed command line options from parse_args
+
+    Returns:
+        None
+    """
+    for entry_point in ENTRY_POINTS:
+        if args.per_store:
+            # Worker stage spans are merged under this span by run_per_store. The
+            # profilers only see this process, so profiled runs skip the pool
+            with span(f"{entry_point.__name__}[per_store]", "run_analysis"):
+                run_per_store(entry_point, args.data_path, stores=args.stores,
+                              parallel=not args.profile, max_workers=args.workers,
+                              start=args.start, end=args.end)
+        else:
+            entry_point(data_path=args.data_path, stores=args.stores,
+                        start=args.start, end=args.end)
+
 
 if __name__ == "__main__":
-    eda_hourly_transactions_main()
-    eda_milk_main()
-    eda_weekday_weekend_main()
-    user_analysis_main()
-    kmeans_main()
-    promotional_analsysis_main()
+    args = parse_args()
+    if args.profile:
+        _, report = profile_call(run_pipeline, args, mode=args.profile,
+                                 interval=args.profile_interval, top=args.profile_top)
+        print(format_report(report))
+        for path in write_profile(report, args.profile_output):
+            print(f"Profile written to {path}")
+    else:
+        run_pipeline(args)
 
+    if args.trace or args.chrome_trace:
+        print(format_summary())
+    if args.trace:
+        print(f"Trace written to {write_json_trace(args.trace)}")
+    if args.chrome_trace:
+        print(f"Chrome trace written to {write_chrome_trace(args.chrome_trace)}")
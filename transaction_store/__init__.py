@@ -0,0 +1,72 @@
+"""Shared transaction storage layer: single csv or store=/year=/month= partitioned datasets."""
+
+from .config import DEFAULT_DATA_PATH, DEFAULT_STORE, STORE_COLUMN, resolve_data_path
+from .loader import read_transactions
+from .index import TransactionIndex, load_index
+from .partitions import (
+    Partition,
+    discover_partitions,
+    is_partitioned,
+    list_stores,
+    load_partitions,
+    prune_partitions,
+    write_partitioned,
+)
+from .parallel import run_per_store
+from .dimensions import (
+    CALENDAR_COLUMNS,
+    CYCLICAL_COLUMNS,
+    HOUR_COLUMNS,
+    TEMPORAL_COLUMNS,
+    attach_calendar,
+    calendar_dimension,
+    hour_dimension,
+)
+from .timestamps import parse_dates, parse_timestamps, parse_transaction_times
+from .sessions import VISIT_COLUMNS, add_visit_ids, assign_visits, visit_table
+from .validation import (
+    TRANSACTION_SCHEMA,
+    ColumnRule,
+    ValidationReport,
+    reset_validation_counters,
+    validate_transactions,
+    validation_counters,
+)
+
+__all__ = [
+    "DEFAULT_DATA_PATH",
+    "DEFAULT_STORE",
+    "STORE_COLUMN",
+    "resolve_data_path",
+    "read_transactions",
+    "TransactionIndex",
+    "load_index",
+    "Partition",
+    "discover_partitions",
+    "is_partitioned",
+    "list_stores",
+    "load_partitions",
+    "prune_partitions",
+    "write_partitioned",
+    "run_per_store",
+    "parse_timestamps",
+    "parse_dates",
+    "parse_transaction_times",
+    "VISIT_COLUMNS",
+    "add_visit_ids",
+    "assign_visits",
+    "visit_table",
+    "CALENDAR_COLUMNS",
+    "CYCLICAL_COLUMNS",
+    "HOUR_COLUMNS",
+    "TEMPORAL_COLUMNS",
+    "attach_calendar",
+    "calendar_dimension",
+    "hour_dimension",
+    "TRANSACTION_SCHEMA",
+    "ColumnRule",
+    "ValidationReport",
+    "validate_transactions",
+    "validation_counters",
+    "reset_validation_counters",
+]
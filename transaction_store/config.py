@@ -0,0 +1,70 @@
+"""Centralized configuration for the shared transaction store package."""
+from __future__ import annotations
+
+from pathlib import Path
+
+# Base paths
+PACKAGE_ROOT = Path(__file__).resolve().parent
+PROJECT_ROOT = PACKAGE_ROOT.parent
+DEFAULT_DATA_PATH = PROJECT_ROOT / "upload" / "index_1.csv"
+
+# Partitioned dataset layout: <root>/store=<id>/year=<yyyy>/month=<mm>/*.csv
+PARTITION_KEYS = ("store", "year", "month")
+STORE_COLUMN = "store"
+DEFAULT_STORE = "default"
+PARTITION_FILE_PATTERN = "*.csv"
+PARTITION_FILE_NAME = "part-0.csv"
+
+# Sorted datetime indexes kept in memory per process, and on disk across runs
+# (see index.load_index)
+INDEX_CACHE_ENTRIES = 4
+INDEX_STORE_DIR = PROJECT_ROOT / ".cache" / "transaction_index"
+INDEX_STORE_MAX_ENTRIES = 8
+
+# Raw timestamp layouts (see timestamps.parse_timestamps)
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+DATE_FORMAT = "%Y-%m-%d"
+# Other layouts accepted for values off the main one; anything else is unparseable
+FALLBACK_FORMATS = {
+    DATETIME_FORMAT: ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S"),
+    DATE_FORMAT: (),
+}
+
+# Calendar and hour dimensions (see dimensions.attach_calendar)
+HOLIDAY_COUNTRY = "US"
+CALENDAR_CACHE_ENTRIES = 8
+
+# Ingest validation (see validation.validate_transactions)
+VALIDATE_ON_LOAD = True
+QUARANTINE_DIR = PROJECT_ROOT / ".cache" / "quarantine"
+CASH_TYPES = ("card", "cash")
+COFFEE_MENU = (
+    "Americano",
+    "Americano with Milk",
+    "Cappuccino",
+    "Cocoa",
+    "Cortado",
+    "Espresso",
+    "Flat White",
+    "Hot Chocolate",
+    "Latte",
+)
+
+# Card visits (see sessions.assign_visits): purchases of one card at most this far apart
+# belong to the same visit
+VISIT_GAP = "30min"
+
+
+def resolve_data_path(path: str | Path | None = None) -> Path:
+    """
+    Return a resolved path to a transactions csv or partitioned dataset root.
+
+    Args:
+        path: Optional path to a csv file or dataset directory. If None, uses DEFAULT_DATA_PATH
+
+    Returns:
+        Resolved Path object pointing to the transactions data
+    """
+    if path is None:
+        return DEFAULT_DATA_PATH
+    return Path(path).expanduser().resolve()
@@ -0,0 +1,163 @@
+"""Calendar (per date) and hour dimension tables, attached to transactions by integer gather."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Iterable
+
+import holidays
+import numpy as np
+import pandas as pd
+
+from .config import CALENDAR_CACHE_ENTRIES, HOLIDAY_COUNTRY
+from .timestamps import parse_timestamps
+
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+HOUR_COLUMNS = ("hour", "hour_sin", "hour_cos")
+CALENDAR_COLUMNS = (
+    "day_of_week_num",
+    "day_of_week_name",
+    "month_num",
+    "is_weekend",
+    "is_holiday",
+    "holiday_name",
+    "day_type",
+    "month_sin",
+    "month_cos",
+    "day_of_week_sin",
+    "day_of_week_cos",
+)
+# Per-row columns of user_analysis' add_temporal_columns / add_cyclical_columns
+TEMPORAL_COLUMNS = ("hour", "day_of_week_num", "month_num", "day_of_week_name", "is_weekend")
+CYCLICAL_COLUMNS = ("hour_sin", "hour_cos", "month_sin", "month_cos", "day_of_week_sin", "day_of_week_cos")
+
+
+@lru_cache(maxsize=1)
+def _hour_table() -> pd.DataFrame:
+    hours = np.arange(24, dtype=np.int32)
+    return pd.DataFrame({
+        "hour": hours,
+        "hour_sin": np.sin(2 * np.pi * hours / 24),
+        "hour_cos": np.cos(2 * np.pi * hours / 24),
+    })
+
+
+def hour_dimension() -> pd.DataFrame:
+    """
+    Hour-of-day dimension: one row per hour 0-23, row position equal to the hour.
+
+    Returns:
+        DataFrame with hour, hour_sin and hour_cos columns
+    """
+    return _hour_table().copy()
+
+
+@lru_cache(maxsize=CALENDAR_CACHE_ENTRIES)
+def _calendar_table(first_day: int, last_day: int, country: str) -> pd.DataFrame:
+    """Calendar rows for every day number (days since the epoch) in [first_day, last_day]."""
+    dates = pd.DatetimeIndex(np.arange(first_day, last_day + 1).astype("datetime64[D]").astype("datetime64[ns]"))
+    dow = dates.dayofweek.to_numpy().astype(np.int32)
+    month = dates.month.to_numpy().astype(np.int32)
+
+    years = range(int(dates.year.min()), int(dates.year.max()) + 1) if len(dates) else []
+    calendar_holidays = holidays.country_holidays(country, years=years)
+    names = pd.Series(
+        list(calendar_holidays.values()),
+        index=pd.DatetimeIndex(list(calendar_holidays.keys()), dtype="datetime64[ns]"),
+        dtype=object,
+    )
+    holiday_name = names.reindex(dates).fillna("").to_numpy()
+    is_holiday = (holiday_name != "").astype(np.int64)
+    is_weekend = (dow >= 5).astype(np.int64)
+
+    return pd.DataFrame({
+        "date": dates,
+        "day_of_week_num": dow,
+        "day_of_week_name": dates.day_name().to_numpy(),
+        "month_num": month,
+        "is_weekend": is_weekend,
+        "is_holiday": is_holiday,
+        "holiday_name": holiday_name,
+        "day_type": np.where(is_holiday == 1, "Holiday", np.where(is_weekend == 1, "Weekend", "Weekday")).astype(object),
+        "month_sin": np.sin(2 * np.pi * month / 12),
+        "month_cos": np.cos(2 * np.pi * month / 12),
+        "day_of_week_sin": np.sin(2 * np.pi * dow / 7),
+        "day_of_week_cos": np.cos(2 * np.pi * dow / 7),
+    })
+
+
+def calendar_dimension(
+    start: str | pd.Timestamp, end: str | pd.Timestamp, country: str = HOLIDAY_COUNTRY
+) -> pd.DataFrame:
+    """
+    Calendar dimension: one row per date in [start, end], both inclusive.
+
+    Holidays come from the holidays library for the given country code, so
+    the table covers any country it supports (e.g. "US", "GB", "DE").
+
+    Args:
+        start: First date
+        end: Last date
+        country: ISO country code for holidays. Defaults to HOLIDAY_COUNTRY
+
+    Returns:
+        DataFrame with date, weekday, month, weekend/holiday flags, day_type
+        ("Holiday", "Weekend" or "Weekday") and cyclical encodings
+    """
+    first = int(np.datetime64(pd.Timestamp(start).normalize(), "D").astype(np.int64))
+    last = int(np.datetime64(pd.Timestamp(end).normalize(), "D").astype(np.int64))
+    return _calendar_table(first, last, country).copy()
+
+
+def attach_calendar(
+    df: pd.DataFrame,
+    columns: Iterable[str] = TEMPORAL_COLUMNS + CYCLICAL_COLUMNS,
+    datetime_col: str = "datetime",
+    country: str = HOLIDAY_COUNTRY,
+) -> pd.DataFrame:
+    """
+    Add calendar and hour attributes to transactions in place.
+
+    Attributes are computed once per distinct date (and per hour) in the
+    dimension tables; each row then only gathers them with an integer key,
+    its day number relative to the first day or its hour.
+
+    Args:
+        df: Transactions with a datetime column (raw strings are parsed)
+        columns: Dimension columns to add, from HOUR_COLUMNS and CALENDAR_COLUMNS
+        datetime_col: Name of the timestamp column
+        country: ISO country code for holidays
+
+    Returns:
+        The same DataFrame with the requested columns
+
+    Raises:
+        ValueError: If a column is not a dimension column, or a timestamp is missing
+    """
+    columns = list(columns)
+    unknown = [col for col in columns if col not in HOUR_COLUMNS and col not in CALENDAR_COLUMNS]
+    if unknown:
+        raise ValueError(f"Not calendar or hour dimension columns: {', '.join(unknown)}")
+
+    stamps = parse_timestamps(df[datetime_col])
+    df[datetime_col] = stamps
+    ticks = stamps.to_numpy(dtype="datetime64[ns]")
+    if np.isnat(ticks).any():
+        raise ValueError(f"'{datetime_col}' has missing timestamps; cannot attach calendar attributes")
+    ticks = ticks.view(np.int64)
+
+    days = ticks // NS_PER_DAY
+    first = int(days.min()) if len(days) else 0
+    last = int(days.max()) if len(days) else -1
+    calendar = _calendar_table(first, last, country)
+    day_rows = days - first
+    hour_rows = (ticks // NS_PER_HOUR) % 24
+
+    hour_table = _hour_table()
+    for col in columns:
+        if col in HOUR_COLUMNS:
+            df[col] = hour_table[col].to_numpy()[hour_rows]
+        else:
+            df[col] = calendar[col].to_numpy()[day_rows]
+    return df
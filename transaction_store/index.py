@@ -0,0 +1,313 @@
+"""Datetime-sorted transactions with binary-searchable time windows and per-day offsets."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    INDEX_CACHE_ENTRIES,
+    INDEX_STORE_DIR,
+    INDEX_STORE_MAX_ENTRIES,
+    VALIDATE_ON_LOAD,
+    resolve_data_path,
+)
+from .partitions import select_stores
+from .timestamps import parse_timestamps
+from .validation import validate_transactions
+
+TimeBound = str | pd.Timestamp | None
+
+_INDEX_CACHE: "OrderedDict[tuple, TransactionIndex]" = OrderedDict()
+
+
+class TransactionIndex:
+    """
+    Transactions sorted once by datetime, answering [start, end) windows in O(log n + k).
+
+    Besides the sorted timestamps, the index keeps a per-day offset table: the
+    distinct days and, for each, the position of its first row. Row windows
+    come from a binary search on the timestamps; per-day aggregates of a
+    window are reductions over contiguous row blocks, with no grouping step.
+    The wrapped frame keeps its original (raw) column values.
+    """
+
+    def __init__(self, df: pd.DataFrame, datetime_col: str = "datetime") -> None:
+        stamps = parse_timestamps(df[datetime_col])
+        if not stamps.is_monotonic_increasing:
+            order = np.argsort(stamps.to_numpy(), kind="stable")
+            df = df.iloc[order]
+            stamps = stamps.iloc[order]
+        self.frame = df.reset_index(drop=True)
+        self.datetime_col = datetime_col
+        self.stamps = stamps.to_numpy(dtype="datetime64[ns]")
+
+        day_stamps = self.stamps.astype("datetime64[D]")
+        boundaries = np.flatnonzero(day_stamps[1:] != day_stamps[:-1]) + 1
+        starts = np.concatenate([[0], boundaries]) if len(day_stamps) else np.zeros(0, dtype=np.int64)
+        self.days = pd.DatetimeIndex(day_stamps[starts])
+        self.day_offsets = np.append(starts, len(day_stamps)).astype(np.int64)
+
+    @classmethod
+    def from_sorted(
+        cls,
+        frame: pd.DataFrame,
+        stamps: np.ndarray,
+        day_offsets: np.ndarray,
+        datetime_col: str = "datetime",
+    ) -> "TransactionIndex":
+        """
+        Rebuild an index from already sorted parts, without parsing or sorting.
+
+        Args:
+            frame: Rows in datetime order with a RangeIndex
+            stamps: Sorted datetime64[ns] timestamps, one per row
+            day_offsets: First row of each day, followed by len(frame)
+            datetime_col: Name of the raw datetime column
+
+        Returns:
+            TransactionIndex over the given parts
+        """
+        index = cls.__new__(cls)
+        index.frame = frame
+        index.datetime_col = datetime_col
+        index.stamps = stamps
+        index.day_offsets = day_offsets
+        index.days = pd.DatetimeIndex(stamps[day_offsets[:-1]].astype("datetime64[D]"))
+        return index
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def start(self) -> pd.Timestamp | None:
+        """Earliest transaction time."""
+        return pd.Timestamp(self.stamps[0]) if len(self) else None
+
+    @property
+    def end(self) -> pd.Timestamp | None:
+        """Latest transaction time."""
+        return pd.Timestamp(self.stamps[-1]) if len(self) else None
+
+    def bounds(self, start: TimeBound = None, end: TimeBound = None) -> Tuple[int, int]:
+        """
+        Row positions of the [start, end) window.
+
+        Args:
+            start: Optional inclusive lower bound
+            end: Optional exclusive upper bound
+
+        Returns:
+            Tuple of (first row, one past the last row)
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.stamps, np.datetime64(pd.Timestamp(start)), "left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.stamps, np.datetime64(pd.Timestamp(end)), "left"))
+        return lo, max(lo, hi)
+
+    def window(self, start: TimeBound = None, end: TimeBound = None, copy: bool = True) -> pd.DataFrame:
+        """
+        Rows in [start, end), in datetime order.
+
+        Args:
+            start: Optional inclusive lower bound
+            end: Optional exclusive upper bound
+            copy: Return an independent frame (safe to add columns to). If False, a slice
+
+        Returns:
+            DataFrame with a fresh RangeIndex
+        """
+        lo, hi = self.bounds(start, end)
+        frame = self.frame.iloc[lo:hi]
+        return frame.copy().reset_index(drop=True) if copy else frame
+
+    def last(self, period: str | pd.Timedelta) -> pd.DataFrame:
+        """
+        Rows in the trailing period, e.g. '7D', relative to the latest transaction.
+
+        Matches pandas' ``last``: rows strictly after (latest - period).
+        """
+        if not len(self):
+            return self.window()
+        cutoff = np.datetime64(self.end - pd.Timedelta(period))
+        lo = int(np.searchsorted(self.stamps, cutoff, "right"))
+        return self.frame.iloc[lo:].copy().reset_index(drop=True)
+
+    def day_window(self, start: TimeBound = None, end: TimeBound = None) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Days overlapping [start, end) and their row offsets within the window.
+
+        Args:
+            start: Optional inclusive lower bound
+            end: Optional exclusive upper bound
+
+        Returns:
+            Tuple of (days, offsets), where rows offsets[i]:offsets[i + 1] of
+            window(start, end) belong to days[i]
+        """
+        lo, hi = self.bounds(start, end)
+        if lo == hi:
+            return self.days[:0], np.zeros(1, dtype=np.int64)
+        first = int(np.searchsorted(self.day_offsets[:-1], lo, "right")) - 1
+        last = int(np.searchsorted(self.day_offsets[:-1], hi, "left"))
+        offsets = np.clip(self.day_offsets[first:last + 1], lo, hi) - lo
+        return self.days[first:last], offsets
+
+    def daily_sum(self, column: str, start: TimeBound = None, end: TimeBound = None) -> pd.Series:
+        """
+        Sum a numeric column per day over [start, end), using the offset table.
+
+        Args:
+            column: Numeric column to sum
+            start: Optional inclusive lower bound
+            end: Optional exclusive upper bound
+
+        Returns:
+            Series indexed by trading day
+        """
+        lo, hi = self.bounds(start, end)
+        days, offsets = self.day_window(start, end)
+        values = self.frame[column].to_numpy(dtype=float)[lo:hi]
+        sums = np.add.reduceat(values, offsets[:-1]) if len(values) else np.zeros(0)
+        return pd.Series(sums, index=days, name=column)
+
+    def daily_count(self, start: TimeBound = None, end: TimeBound = None) -> pd.Series:
+        """
+        Number of transactions per day over [start, end).
+
+        Returns:
+            Series indexed by trading day
+        """
+        days, offsets = self.day_window(start, end)
+        return pd.Series(np.diff(offsets), index=days, name="transactions")
+
+
+def _cache_key(path: Path, stores: Iterable[str] | None, validate: bool) -> tuple:
+    stat = path.stat()
+    store_key = None if stores is None else tuple(sorted(str(s) for s in stores))
+    return str(path), stat.st_mtime_ns, stat.st_size, store_key, validate
+
+
+def _entry_name(key: tuple) -> str:
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+
+def save_index(index: TransactionIndex, key: tuple, store_dir: str | Path = INDEX_STORE_DIR) -> Path:
+    """
+    Persist a built index so later processes can skip the csv parse and sort.
+
+    The sorted frame is pickled; the timestamps and day offsets are saved as
+    int64 arrays. The entry is written to a temporary directory and renamed
+    into place, so readers never see a partial entry.
+
+    Args:
+        index: Index to persist
+        key: Cache key from _cache_key (path, mtime, size, stores, validate)
+        store_dir: Root directory of the on-disk index store
+
+    Returns:
+        Path to the store entry
+    """
+    store_dir = Path(store_dir)
+    name = _entry_name(key)
+    entry = store_dir / name
+    tmp = store_dir / f".{name}.{os.getpid()}.tmp"
+    tmp.mkdir(parents=True, exist_ok=True)
+
+    index.frame.to_pickle(tmp / "frame.pkl")
+    np.save(tmp / "stamps.npy", index.stamps.view(np.int64))
+    np.save(tmp / "day_offsets.npy", index.day_offsets)
+    with open(tmp / "meta.json", "w") as f:
+        json.dump({"key": list(key), "datetime_col": index.datetime_col, "n_rows": len(index)}, f, indent=2)
+
+    if entry.exists():
+        shutil.rmtree(entry)
+    os.replace(tmp, entry)
+    _prune(store_dir, INDEX_STORE_MAX_ENTRIES)
+    return entry
+
+
+def read_saved_index(key: tuple, store_dir: str | Path = INDEX_STORE_DIR) -> TransactionIndex | None:
+    """
+    Open a persisted index; the timestamps are memory-mapped.
+
+    Args:
+        key: Cache key from _cache_key (path, mtime, size, stores, validate)
+        store_dir: Root directory of the on-disk index store
+
+    Returns:
+        TransactionIndex, or None if no entry matches the key
+    """
+    entry = Path(store_dir) / _entry_name(key)
+    meta_path = entry / "meta.json"
+    if not meta_path.exists():
+        return None
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    if meta.get("key") != json.loads(json.dumps(key)):
+        return None
+    stamps = np.load(entry / "stamps.npy", mmap_mode="r").view("datetime64[ns]")
+    day_offsets = np.load(entry / "day_offsets.npy")
+    frame = pd.read_pickle(entry / "frame.pkl")
+    return TransactionIndex.from_sorted(frame, stamps, day_offsets, meta["datetime_col"])
+
+
+def _prune(store_dir: Path, max_entries: int) -> None:
+    """Drop the least recently written entries beyond max_entries."""
+    entries = sorted(
+        (p for p in store_dir.iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for stale in entries[max_entries:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def load_index(
+    data_path: str | Path | None = None,
+    stores: Iterable[str] | None = None,
+    validate: bool = VALIDATE_ON_LOAD,
+) -> TransactionIndex:
+    """
+    Return the TransactionIndex of a csv file, building it on first use.
+
+    Indexes are cached per process, and on disk under INDEX_STORE_DIR, by
+    path, modification time, size, stores and validate. Only the first call
+    for a given file version reads, validates and sorts the whole csv (and
+    writes quarantined rows); later calls, in this or any later process, load
+    the sorted rows and timestamps, so a window costs O(log n + k) after that
+    load.
+
+    Args:
+        data_path: Path to a csv file. If None, uses DEFAULT_DATA_PATH
+        stores: Optional store ids to keep (DEFAULT_STORE for a file without a ``store``
+            column). If None, keeps all rows
+        validate: Whether to drop and quarantine rows failing the schema checks
+
+    Returns:
+        TransactionIndex over the raw transaction columns
+    """
+    path = resolve_data_path(data_path)
+    key = _cache_key(path, stores, validate)
+    index = _INDEX_CACHE.get(key)
+    if index is not None:
+        _INDEX_CACHE.move_to_end(key)
+        return index
+
+    index = read_saved_index(key)
+    if index is None:
+        df = pd.read_csv(path)
+        if validate:
+            df, _ = validate_transactions(df, source=path)
+        index = TransactionIndex(select_stores(df, stores))
+        save_index(index, key)
+    _INDEX_CACHE[key] = index
+    while len(_INDEX_CACHE) > INDEX_CACHE_ENTRIES:
+        _INDEX_CACHE.popitem(last=False)
+    return index
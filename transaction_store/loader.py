@@ -0,0 +1,70 @@
+"""Shared raw-transaction loading path used by every analysis package."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from .config import VALIDATE_ON_LOAD, resolve_data_path
+from .index import load_index
+from .partitions import (
+    check_stores,
+    discover_partitions,
+    is_partitioned,
+    load_partitions,
+    prune_partitions,
+    select_stores,
+)
+from .validation import validate_transactions
+
+
+def read_transactions(
+    data_path: str | Path | None = None,
+    stores: Iterable[str] | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    validate: bool = VALIDATE_ON_LOAD,
+) -> pd.DataFrame:
+    """
+    Load raw transactions from a single csv file or a partitioned dataset.
+
+    For a partitioned dataset only the store-month partitions overlapping the
+    requested stores and [start, end) window are opened. For a csv file, a
+    window is sliced from the file's cached TransactionIndex (binary search on
+    the sorted datetimes), so windowed rows come back in datetime order.
+
+    Unless validate is False, every file read is checked against the declared
+    schema first; failing rows are moved to the quarantine directory (see
+    validation.validate_transactions) instead of reaching the analyses.
+
+    Args:
+        data_path: Path to a csv file or dataset root. If None, uses DEFAULT_DATA_PATH
+        stores: Optional store ids to load. If None, loads the union of all stores.
+            Rows of a csv file without a ``store`` column belong to DEFAULT_STORE
+        start: Optional inclusive lower bound on transaction datetime
+        end: Optional exclusive upper bound on transaction datetime
+        validate: Whether to run the ingest validation stage. Defaults to VALIDATE_ON_LOAD
+
+    Returns:
+        DataFrame with the transaction columns. Validated reads have 'datetime' and
+        'date' already parsed; otherwise they are the raw csv strings
+
+    Raises:
+        ValueError: If a requested store id is not in the dataset
+    """
+    path = resolve_data_path(data_path)
+    if is_partitioned(path):
+        partitions = discover_partitions(path)
+        if stores is not None:
+            check_stores(stores, {p.store for p in partitions})
+        partitions = prune_partitions(partitions, stores, start, end)
+        return load_partitions(partitions, start=start, end=end, validate=validate)
+
+    if start is not None or end is not None:
+        return load_index(path, stores, validate=validate).window(start, end)
+
+    df = pd.read_csv(path)
+    if validate:
+        df, _ = validate_transactions(df, source=path)
+    return select_stores(df, stores).reset_index(drop=True)
@@ -0,0 +1,69 @@
+"""Run analysis entry points once per store, optionally across a process pool."""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from instrumentation import SpanRecord, get_tracer
+
+from .partitions import list_stores
+
+
+def _run_traced(entry_point: Callable[..., Any], **kwargs: Any) -> Tuple[Any, List[SpanRecord], float]:
+    """Run entry_point in a worker and return its result with the spans it recorded."""
+    tracer = get_tracer()
+    # Forked workers inherit the parent's spans; start from an empty trace
+    tracer.reset()
+    result = entry_point(**kwargs)
+    return result, list(tracer.records), tracer.origin_epoch
+
+
+def run_per_store(
+    entry_point: Callable[..., Any],
+    data_path: str | Path | None = None,
+    stores: Iterable[str] | None = None,
+    parallel: bool = True,
+    max_workers: int | None = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Call an analysis entry point separately for each store.
+
+    The entry point must accept ``data_path`` and ``stores`` keyword arguments
+    and be importable at module level so it can be sent to worker processes.
+    Spans recorded inside the workers are returned with each result and
+    merged into the calling process's tracer under its currently open span.
+
+    Args:
+        entry_point: Analysis main function, e.g. kmeans_main
+        data_path: Path to a csv file or partitioned dataset root
+        stores: Optional store ids to run. If None, runs every store in the dataset
+        parallel: Whether to run stores in a process pool. Defaults to True
+        max_workers: Optional cap on worker processes
+        **kwargs: Extra keyword arguments forwarded to the entry point
+
+    Returns:
+        Dictionary mapping store id to the entry point's return value
+    """
+    store_ids = list(stores) if stores is not None else list_stores(data_path)
+    if data_path is not None:
+        data_path = str(data_path)
+
+    if not parallel or len(store_ids) <= 1:
+        return {
+            store: entry_point(data_path=data_path, stores=[store], **kwargs)
+            for store in store_ids
+        }
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            store: pool.submit(_run_traced, entry_point, data_path=data_path, stores=[store], **kwargs)
+            for store in store_ids
+        }
+        results = {}
+        tracer = get_tracer()
+        for store, future in futures.items():
+            results[store], records, origin_epoch = future.result()
+            tracer.merge(records, origin_epoch)
+        return results
@@ -0,0 +1,280 @@
+"""Hive-style partitioned dataset layout (store=/year=/month=) with pruning."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List
+
+import pandas as pd
+
+from .config import (
+    DEFAULT_STORE,
+    PARTITION_FILE_NAME,
+    PARTITION_FILE_PATTERN,
+    STORE_COLUMN,
+    VALIDATE_ON_LOAD,
+    resolve_data_path,
+)
+from .timestamps import parse_timestamps
+from .validation import validate_transactions
+
+
+@dataclass(frozen=True)
+class Partition:
+    """A single store-month directory of the partitioned dataset."""
+    store: str
+    year: int
+    month: int
+    path: Path
+
+    @property
+    def start(self) -> pd.Timestamp:
+        """First instant covered by the partition."""
+        return pd.Timestamp(year=self.year, month=self.month, day=1)
+
+    @property
+    def end(self) -> pd.Timestamp:
+        """First instant after the partition (exclusive bound)."""
+        return self.start + pd.offsets.MonthBegin(1)
+
+    def files(self) -> List[Path]:
+        """Return the data files stored in this partition, in name order."""
+        return sorted(self.path.glob(PARTITION_FILE_PATTERN))
+
+
+def is_partitioned(path: str | Path) -> bool:
+    """
+    Check whether a path points to a partitioned dataset root.
+
+    Args:
+        path: Path to a csv file or a directory
+
+    Returns:
+        True if the path is a directory (store=/year=/month= layout)
+    """
+    return Path(path).is_dir()
+
+
+def _parse_key(name: str, key: str) -> str | None:
+    """Return the value of a ``key=value`` directory name, or None if it does not match."""
+    prefix = f"{key}="
+    return name[len(prefix):] if name.startswith(prefix) else None
+
+
+def discover_partitions(root: str | Path) -> List[Partition]:
+    """
+    List every store-month partition under a dataset root.
+
+    Only directory names are inspected; no data files are opened.
+
+    Args:
+        root: Dataset root directory
+
+    Returns:
+        List of Partition objects sorted by store, year and month
+    """
+    root = Path(root)
+    partitions = []
+    for store_dir in root.iterdir():
+        store = _parse_key(store_dir.name, "store") if store_dir.is_dir() else None
+        if store is None:
+            continue
+        for year_dir in store_dir.iterdir():
+            year = _parse_key(year_dir.name, "year") if year_dir.is_dir() else None
+            if year is None:
+                continue
+            for month_dir in year_dir.iterdir():
+                month = _parse_key(month_dir.name, "month") if month_dir.is_dir() else None
+                if month is None:
+                    continue
+                partitions.append(Partition(store, int(year), int(month), month_dir))
+    return sorted(partitions, key=lambda p: (p.store, p.year, p.month))
+
+
+def prune_partitions(
+    partitions: Iterable[Partition],
+    stores: Iterable[str] | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+) -> List[Partition]:
+    """
+    Keep only partitions that can contain rows for the requested stores and [start, end) window.
+
+    Args:
+        partitions: Candidate partitions
+        stores: Optional store ids to keep. If None, keeps all stores
+        start: Optional inclusive lower bound on transaction datetime
+        end: Optional exclusive upper bound on transaction datetime
+
+    Returns:
+        List of partitions overlapping the requested stores and window
+    """
+    store_set = None if stores is None else {str(s) for s in stores}
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+
+    kept = []
+    for partition in partitions:
+        if store_set is not None and partition.store not in store_set:
+            continue
+        if start is not None and partition.end <= start:
+            continue
+        if end is not None and partition.start >= end:
+            continue
+        kept.append(partition)
+    return kept
+
+
+def store_keys(df: pd.DataFrame, store: str | None = None) -> pd.Series:
+    """Store id of each row as a string; rows of a frame without a ``store`` column belong to store."""
+    if STORE_COLUMN in df.columns:
+        return df[STORE_COLUMN].astype(str)
+    return pd.Series(store or DEFAULT_STORE, index=df.index)
+
+
+def check_stores(stores: Iterable[str], available: Iterable[str]) -> None:
+    """
+    Reject store ids that are not in a dataset.
+
+    Args:
+        stores: Requested store ids
+        available: Store ids present in the dataset
+
+    Raises:
+        ValueError: If any requested id is not available
+    """
+    available = {str(s) for s in available}
+    unknown = sorted({str(s) for s in stores} - available)
+    if unknown:
+        raise ValueError(f"Unknown store ids {unknown}; the dataset has {sorted(available)}")
+
+
+def select_stores(df: pd.DataFrame, stores: Iterable[str] | None) -> pd.DataFrame:
+    """
+    Keep the rows of the requested stores of a single-file dataset.
+
+    Rows of a file without a ``store`` column belong to DEFAULT_STORE, as in
+    list_stores, so they are filtered like any other store.
+
+    Args:
+        df: Transactions, with or without a ``store`` column
+        stores: Store ids to keep. If None, keeps all rows
+
+    Returns:
+        The matching rows
+
+    Raises:
+        ValueError: If a requested id is not in df
+    """
+    if stores is None:
+        return df
+    keys = store_keys(df)
+    check_stores(stores, keys.unique() if STORE_COLUMN in df.columns else [DEFAULT_STORE])
+    return df[keys.isin({str(s) for s in stores}).to_numpy()]
+
+
+def list_stores(root: str | Path | None = None) -> List[str]:
+    """
+    Return the store ids available in a dataset.
+
+    Args:
+        root: Dataset root directory, or a single csv file. If None, uses DEFAULT_DATA_PATH
+
+    Returns:
+        Sorted list of store ids. A single csv file without a ``store`` column
+        is reported as DEFAULT_STORE
+    """
+    root = resolve_data_path(root)
+    if is_partitioned(root):
+        return sorted({p.store for p in discover_partitions(root)})
+    if STORE_COLUMN in pd.read_csv(root, nrows=0).columns:
+        return sorted(pd.read_csv(root, usecols=[STORE_COLUMN])[STORE_COLUMN].astype(str).unique())
+    return [DEFAULT_STORE]
+
+
+def load_partitions(
+    partitions: Iterable[Partition],
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    datetime_col: str = "datetime",
+    validate: bool = VALIDATE_ON_LOAD,
+) -> pd.DataFrame:
+    """
+    Read the given partitions into one DataFrame with a ``store`` column.
+
+    Rows are only filtered against [start, end) in partitions that straddle a
+    window boundary; fully covered partitions are returned as read.
+
+    Args:
+        partitions: Partitions to read (typically the output of prune_partitions)
+        start: Optional inclusive lower bound on transaction datetime
+        end: Optional exclusive upper bound on transaction datetime
+        datetime_col: Name of the datetime column used for boundary filtering
+        validate: Whether to quarantine rows failing the schema checks, per file
+
+    Returns:
+        DataFrame with the partition rows, ordered by datetime when several stores are read
+    """
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+
+    frames = []
+    for partition in partitions:
+        for file in partition.files():
+            frame = pd.read_csv(file)
+            if validate:
+                frame, _ = validate_transactions(frame, source=file)
+            straddles_start = start is not None and partition.start < start
+            straddles_end = end is not None and partition.end > end
+            if straddles_start or straddles_end:
+                stamps = parse_timestamps(frame[datetime_col])
+                mask = pd.Series(True, index=frame.index)
+                if straddles_start:
+                    mask &= stamps >= start
+                if straddles_end:
+                    mask &= stamps < end
+                frame = frame[mask]
+            frame[STORE_COLUMN] = partition.store
+            frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=["date", datetime_col, "cash_type", "card",
+                                     "money", "coffee_name", STORE_COLUMN])
+
+    df = pd.concat(frames, ignore_index=True)
+    if df[STORE_COLUMN].nunique() > 1:
+        # ISO timestamps sort lexicographically; keep the single-file row order semantics.
+        df = df.sort_values(datetime_col, kind="stable", ignore_index=True)
+    return df
+
+
+def write_partitioned(
+    df: pd.DataFrame,
+    root: str | Path,
+    store: str | None = None,
+    datetime_col: str = "datetime",
+) -> List[Partition]:
+    """
+    Write transactions into the store=/year=/month= layout.
+
+    Args:
+        df: Transactions with a datetime column and optionally a ``store`` column
+        root: Dataset root directory (created if needed)
+        store: Store id to use when df has no ``store`` column. Defaults to DEFAULT_STORE
+        datetime_col: Name of the datetime column used to derive year and month
+
+    Returns:
+        List of Partition objects that were written
+    """
+    root = Path(root)
+    stamps = parse_timestamps(df[datetime_col])
+    written = []
+    output = df.drop(columns=[STORE_COLUMN], errors="ignore")
+    for (store_id, year, month), rows in output.groupby(
+        [store_keys(df, store), stamps.dt.year, stamps.dt.month], sort=True
+    ):
+        path = root / f"store={store_id}" / f"year={year}" / f"month={month:02d}"
+        path.mkdir(parents=True, exist_ok=True)
+        rows.to_csv(path / PARTITION_FILE_NAME, index=False)
+        written.append(Partition(str(store_id), int(year), int(month), path))
+    return written
@@ -0,0 +1,120 @@
+"""Card visits reconstructed from transactions: one sort, one diff, gaps above a threshold start a visit."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .config import VISIT_GAP
+
+VISIT_COLUMNS = ("visit_id", "card", "start", "end", "basket_size", "visit_value")
+
+
+def _card_rows(df: pd.DataFrame, card_col: str) -> np.ndarray:
+    mask = df[card_col].notna().to_numpy()
+    if "cash_type" in df.columns:
+        mask &= (df["cash_type"] == "card").to_numpy()
+    return mask
+
+
+def assign_visits(
+    df: pd.DataFrame,
+    gap: pd.Timedelta | str = VISIT_GAP,
+    card_col: str = "card",
+    datetime_col: str = "datetime",
+) -> np.ndarray:
+    """
+    Number the visits of every card holder.
+
+    Rows are sorted once by (card, time); a row starts a new visit when it is
+    a card's first row or follows the card's previous row by more than gap.
+    Visit ids are the running count of visit starts, so they are dense and
+    ordered by card, then time.
+
+    Args:
+        df: Transactions with parsed datetime and card columns (and optionally cash_type)
+        gap: Longest pause between two purchases of the same visit
+        card_col: Name of the card column
+        datetime_col: Name of the datetime column
+
+    Returns:
+        Integer array aligned with df rows: the visit id, or -1 for non-card rows
+    """
+    mask = _card_rows(df, card_col)
+    visit_ids = np.full(len(df), -1, dtype=np.int64)
+    if not mask.any():
+        return visit_ids
+    card_codes = pd.factorize(df[card_col].to_numpy()[mask])[0]
+    times = df[datetime_col].to_numpy(dtype="datetime64[ns]")[mask].view(np.int64)
+    order = np.lexsort((times, card_codes))
+
+    sorted_cards, sorted_times = card_codes[order], times[order]
+    starts = np.empty(len(order), dtype=bool)
+    starts[0] = True
+    starts[1:] = (sorted_cards[1:] != sorted_cards[:-1]) | (np.diff(sorted_times) > pd.Timedelta(gap).value)
+
+    rows = np.flatnonzero(mask)[order]
+    visit_ids[rows] = np.cumsum(starts) - 1
+    return visit_ids
+
+
+def add_visit_ids(
+    df: pd.DataFrame,
+    gap: pd.Timedelta | str = VISIT_GAP,
+    card_col: str = "card",
+    datetime_col: str = "datetime",
+) -> pd.DataFrame:
+    """
+    Return a copy of df with a visit_id column from assign_visits.
+
+    Args:
+        df: Transactions with parsed datetime and card columns
+        gap: Longest pause between two purchases of the same visit
+        card_col: Name of the card column
+        datetime_col: Name of the datetime column
+
+    Returns:
+        DataFrame with added visit_id column (-1 for non-card rows)
+    """
+    return df.assign(visit_id=assign_visits(df, gap, card_col, datetime_col))
+
+
+def visit_table(
+    df: pd.DataFrame,
+    gap: pd.Timedelta | str = VISIT_GAP,
+    card_col: str = "card",
+    datetime_col: str = "datetime",
+    value_col: str = "money",
+) -> pd.DataFrame:
+    """
+    One row per card visit.
+
+    Args:
+        df: Transactions with parsed datetime, card and money columns. A
+            visit_id column, if present, is used instead of recomputing it
+        gap: Longest pause between two purchases of the same visit
+        card_col: Name of the card column
+        datetime_col: Name of the datetime column
+        value_col: Name of the amount column
+
+    Returns:
+        DataFrame ordered by visit_id with card, start, end, basket_size
+        (drinks bought) and visit_value (amount spent)
+    """
+    visit_ids = df["visit_id"].to_numpy() if "visit_id" in df.columns else assign_visits(df, gap, card_col, datetime_col)
+    rows = visit_ids >= 0
+    if not rows.any():
+        return pd.DataFrame(columns=list(VISIT_COLUMNS))
+    visits = pd.DataFrame({
+        "visit_id": visit_ids[rows],
+        card_col: df[card_col].to_numpy()[rows],
+        datetime_col: df[datetime_col].to_numpy()[rows],
+        value_col: df[value_col].to_numpy(dtype=float)[rows],
+    }).groupby("visit_id", sort=True)
+    table = visits.agg(
+        card=(card_col, "first"),
+        start=(datetime_col, "min"),
+        end=(datetime_col, "max"),
+        basket_size=(value_col, "size"),
+        visit_value=(value_col, "sum"),
+    ).reset_index()
+    return table[list(VISIT_COLUMNS)]
@@ -0,0 +1,82 @@
+"""Shared timestamp parsing for raw transactions: a fixed layout with an explicit list of fallback layouts."""
+from __future__ import annotations
+
+import pandas as pd
+
+from .config import DATE_FORMAT, DATETIME_FORMAT, FALLBACK_FORMATS
+
+# pandas turns these into the current time under any format
+_RELATIVE_WORDS = ("now", "today")
+
+
+def parse_timestamps(values: pd.Series, fmt: str = DATETIME_FORMAT, errors: str = "raise") -> pd.Series:
+    """
+    Parse a raw timestamp column against fmt and its accepted fallback layouts only.
+
+    The whole column goes through pandas' vectorized parser for fmt, and only
+    the rows it could not parse are tried against FALLBACK_FORMATS[fmt], one
+    layout at a time. There is no format inference, so free text such as
+    'today' or other separators such as '2024/03/05' never parse.
+
+    Args:
+        values: Raw string column. Already-parsed datetime columns are returned unchanged
+        fmt: Expected strptime layout, e.g. DATETIME_FORMAT or DATE_FORMAT
+        errors: "raise" to fail on values matching no accepted layout, or "coerce" to turn them into NaT
+
+    Returns:
+        datetime64[ns] Series aligned with values
+
+    Raises:
+        ValueError: If errors is "raise" and a value matches no accepted layout
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    stamps = pd.to_datetime(values, format=fmt, errors="coerce", cache=False).astype("datetime64[ns]")
+    relative = values.isin(_RELATIVE_WORDS).to_numpy()
+    if relative.any():
+        stamps[relative] = pd.NaT
+    misses = stamps.isna().to_numpy() & values.notna().to_numpy() & ~relative
+    for layout in FALLBACK_FORMATS.get(fmt, ()):
+        if not misses.any():
+            break
+        stamps[misses] = pd.to_datetime(values[misses], format=layout, errors="coerce", cache=False)
+        misses &= stamps.isna().to_numpy()
+    misses |= relative
+    if errors == "raise" and misses.any():
+        examples = values[misses].unique()[:5].tolist()
+        raise ValueError(f"{int(misses.sum())} values match no accepted layout for {fmt!r}, e.g. {examples}")
+    return stamps
+
+
+def parse_dates(values: pd.Series, errors: str = "raise") -> pd.Series:
+    """Parse a raw 'date' column (YYYY-MM-DD). See parse_timestamps."""
+    return parse_timestamps(values, DATE_FORMAT, errors)
+
+
+def parse_transaction_times(
+    df: pd.DataFrame, datetime_col: str = "datetime", date_col: str = "date"
+) -> pd.DataFrame:
+    """
+    Parse the timestamp columns of raw transactions in place.
+
+    The datetime column is parsed once and the date column is derived from it
+    by truncating to midnight rather than parsed separately; ingest validation
+    guarantees the two agree. Without a datetime column, the date column is
+    parsed on its own.
+
+    Args:
+        df: Raw transactions, e.g. from read_transactions
+        datetime_col: Name of the full timestamp column
+        date_col: Name of the calendar date column
+
+    Returns:
+        The same DataFrame with datetime64 columns
+    """
+    if datetime_col in df.columns:
+        df[datetime_col] = parse_timestamps(df[datetime_col])
+        if date_col in df.columns:
+            df[date_col] = df[datetime_col].dt.normalize()
+    elif date_col in df.columns:
+        df[date_col] = parse_dates(df[date_col])
+    return df
+
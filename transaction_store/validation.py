@@ -0,0 +1,234 @@
+"""Vectorized ingest validation: declared transaction schema, quarantine file and counters."""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import span
+
+from .config import CASH_TYPES, COFFEE_MENU, DATE_FORMAT, DATETIME_FORMAT, PROJECT_ROOT, QUARANTINE_DIR, STORE_COLUMN
+from .timestamps import parse_timestamps
+
+_COUNTERS: Counter = Counter()
+
+
+@dataclass(frozen=True)
+class ColumnRule:
+    """
+    Declared constraints for one transaction column.
+
+    kind is one of "datetime", "date", "number", "category" or "text".
+    """
+    name: str
+    kind: str
+    nullable: bool = False
+    allowed: Tuple[str, ...] | None = None
+    minimum: float | None = None
+
+
+TRANSACTION_SCHEMA: Tuple[ColumnRule, ...] = (
+    ColumnRule("date", "date"),
+    ColumnRule("datetime", "datetime"),
+    ColumnRule("cash_type", "category", allowed=CASH_TYPES),
+    ColumnRule("card", "text", nullable=True),
+    ColumnRule("money", "number", minimum=0.0),
+    ColumnRule("coffee_name", "category", allowed=COFFEE_MENU),
+)
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of validating one source."""
+    source: str | None
+    rows_checked: int
+    rows_valid: int
+    reasons: Dict[str, int] = field(default_factory=dict)
+    quarantine_path: Path | None = None
+
+    @property
+    def rows_quarantined(self) -> int:
+        return self.rows_checked - self.rows_valid
+
+
+def quarantine_path_for(source: str | Path, quarantine_dir: str | Path = QUARANTINE_DIR) -> Path:
+    """
+    Quarantine file for a source csv, e.g. upload/index_1.csv -> upload__index_1.csv.
+
+    Args:
+        source: Path of the validated csv
+        quarantine_dir: Directory holding quarantine files
+
+    Returns:
+        Path of the quarantine csv (one per source, rewritten on every read)
+    """
+    source = Path(source).resolve()
+    try:
+        parts = source.relative_to(PROJECT_ROOT).parts
+    except ValueError:
+        parts = source.parts[1:]
+    return Path(quarantine_dir) / "__".join(parts)
+
+
+def _column_checks(
+    df: pd.DataFrame, rule: ColumnRule, parsed: Dict[str, pd.Series]
+) -> List[Tuple[str, np.ndarray]]:
+    """Boolean failure masks for one column rule; parsed values are stored for cross-column checks."""
+    values = df[rule.name]
+    if rule.kind in ("datetime", "date"):
+        layout = DATETIME_FORMAT if rule.kind == "datetime" else DATE_FORMAT
+        parsed[rule.name] = parse_timestamps(values, layout, errors="coerce")
+        failed = parsed[rule.name].isna().to_numpy()
+        problem = "unparseable"
+    elif rule.kind == "number":
+        parsed[rule.name] = pd.to_numeric(values, errors="coerce").astype(float)
+        array = parsed[rule.name].to_numpy()
+        failed = np.isnan(array)
+        problem = "unparseable"
+    elif rule.kind == "category" and rule.allowed is not None:
+        failed = ~values.isin(rule.allowed).to_numpy()
+        problem = "unknown"
+    else:
+        failed = None
+
+    checks = []
+    # Null tests on string columns are costly, so only split failures into
+    # missing vs. malformed values when there are failures to split.
+    if failed is not None and failed.any():
+        present = values.notna().to_numpy()
+        if not rule.nullable:
+            checks.append((f"{rule.name}:missing", failed & ~present))
+        checks.append((f"{rule.name}:{problem}", failed & present))
+    elif failed is None and not rule.nullable:
+        checks.append((f"{rule.name}:missing", values.isna().to_numpy()))
+    if rule.kind == "number":
+        checks.append((f"{rule.name}:not_finite", np.isinf(array)))
+        if rule.minimum is not None:
+            checks.append((f"{rule.name}:below_minimum", array < rule.minimum))
+    return checks
+
+
+def _row_checks(df: pd.DataFrame, schema: Tuple[ColumnRule, ...]) -> Tuple[List[Tuple[str, np.ndarray]], Dict[str, pd.Series]]:
+    """All column and cross-column failure masks, plus the parsed columns."""
+    parsed: Dict[str, pd.Series] = {}
+    checks = []
+    for rule in schema:
+        checks.extend(_column_checks(df, rule, parsed))
+
+    if "date" in parsed and "datetime" in parsed:
+        days, stamps = parsed["date"], parsed["datetime"]
+        both = (days.notna() & stamps.notna()).to_numpy()
+        checks.append(("date:mismatch", both & (days != stamps.dt.normalize()).to_numpy()))
+    if "card" in df.columns and "cash_type" in df.columns:
+        card_payment = (df["cash_type"] == "card").to_numpy()
+        checks.append(("card:missing_for_card_payment",
+                       card_payment & df["card"].isna().to_numpy()))
+    if STORE_COLUMN in df.columns:
+        checks.append((f"{STORE_COLUMN}:missing", df[STORE_COLUMN].isna().to_numpy()))
+    return checks, parsed
+
+
+def validate_transactions(
+    df: pd.DataFrame,
+    source: str | Path | None = None,
+    quarantine_dir: str | Path | None = QUARANTINE_DIR,
+    schema: Tuple[ColumnRule, ...] = TRANSACTION_SCHEMA,
+) -> Tuple[pd.DataFrame, ValidationReport]:
+    """
+    Check raw transactions against the schema and quarantine failing rows.
+
+    Every check is a column-wide mask; rows failing any check are written to
+    the source's quarantine csv with a ``reasons`` column (semicolon-separated
+    "column:problem" codes) and the source line number, and dropped from the
+    result. Counts are added to the process-wide counters and the span.
+
+    Args:
+        df: Raw transactions as read from csv
+        source: Optional csv path, used for the quarantine file name and line numbers
+        quarantine_dir: Directory for quarantine files. If None, nothing is written
+        schema: Column rules to enforce
+
+    Returns:
+        Tuple of (valid rows with a fresh RangeIndex, float money and parsed
+        datetime/date columns, ValidationReport)
+
+    Raises:
+        ValueError: If a schema column is missing from the frame
+    """
+    missing = [rule.name for rule in schema if rule.name not in df.columns]
+    if missing:
+        raise ValueError(f"{source or 'transactions'} is missing columns: {', '.join(missing)}")
+
+    with span("validate_transactions", "transaction_store", rows_in=len(df)) as stage:
+        checks, parsed = _row_checks(df, schema)
+        failed = np.zeros(len(df), dtype=bool)
+        for _, mask in checks:
+            failed |= mask
+        reasons = {name: int(mask.sum()) for name, mask in checks if mask.any()}
+
+        valid = df.loc[~failed].reset_index(drop=True) if failed.any() else df.copy(deep=False)
+        # Hand the already-parsed columns on so loaders do not parse them again
+        if "money" in parsed:
+            valid["money"] = parsed["money"].to_numpy()[~failed]
+        if "datetime" in parsed:
+            valid["datetime"] = parsed["datetime"].to_numpy()[~failed]
+            valid["date"] = valid["datetime"].dt.normalize()
+
+        report = ValidationReport(
+            source=None if source is None else str(source),
+            rows_checked=len(df),
+            rows_valid=len(valid),
+            reasons=reasons,
+        )
+        if source is not None and quarantine_dir is not None:
+            report.quarantine_path = _write_quarantine(df, failed, checks, source, quarantine_dir)
+
+        _COUNTERS["rows_checked"] += report.rows_checked
+        _COUNTERS["rows_quarantined"] += report.rows_quarantined
+        _COUNTERS.update(reasons)
+        stage.rows_out = report.rows_valid
+        stage.set(rows_quarantined=report.rows_quarantined, reasons=reasons)
+
+    if report.rows_quarantined:
+        print(f"Quarantined {report.rows_quarantined} of {report.rows_checked} rows from "
+              f"{source or 'transactions'}: {reasons}")
+    return valid, report
+
+
+def _write_quarantine(
+    df: pd.DataFrame,
+    failed: np.ndarray,
+    checks: List[Tuple[str, np.ndarray]],
+    source: str | Path,
+    quarantine_dir: str | Path,
+) -> Path | None:
+    """Rewrite the source's quarantine csv; remove a stale one when every row passed."""
+    path = quarantine_path_for(source, quarantine_dir)
+    if not failed.any():
+        path.unlink(missing_ok=True)
+        return None
+
+    rows = np.flatnonzero(failed)
+    labels = np.full(len(rows), "", dtype=object)
+    for name, mask in checks:
+        labels = labels + np.where(mask[rows], f"{name};", "")
+    bad = df.iloc[rows].copy()
+    bad.insert(0, "reasons", pd.Series(labels).str.rstrip(";").to_numpy())
+    bad.insert(0, "line", rows + 2)  # 1-based, after the header line
+    path.parent.mkdir(parents=True, exist_ok=True)
+    bad.to_csv(path, index=False)
+    return path
+
+
+def validation_counters() -> Dict[str, int]:
+    """Cumulative rows checked, rows quarantined and failures per reason in this process."""
+    return dict(_COUNTERS)
+
+
+def reset_validation_counters() -> None:
+    """Zero the process-wide validation counters."""
+    _COUNTERS.clear()
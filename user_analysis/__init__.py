@@ -2,6 +2,7 @@
 
 from .visualization import show_feature_importance
 from .main import main as user_analysis_main
+from .feature_store import load_or_build_features
 
-__all__ = ["show_feature_importance", "user_analysis_main"]
+__all__ = ["show_feature_importance", "user_analysis_main", "load_or_build_features"]
 
@@ -12,6 +12,21 @@ DEFAULT_DATA_PATH = PROJECT_ROOT / "upload" / "index_1.csv"
 TEST_SIZE = 0.3
 RANDOM_STATE = 42
 
+# Feature store: memory-mapped engineered features keyed by input fingerprint
+FEATURE_STORE_DIR = PROJECT_ROOT / ".cache" / "user_features"
+FEATURE_SCHEMA_VERSION = 2
+FEATURE_STORE_MAX_ENTRIES = 4
+
+# Model registry: fitted models and metrics keyed by feature fingerprint + hyper-parameters
+MODEL_REGISTRY_DIR = PROJECT_ROOT / ".cache" / "model_registry"
+MODEL_REGISTRY_MAX_ENTRIES = 8
+MODEL_REGISTRY_MAX_BYTES = 512 * 2**20
+
+# Co-purchase rules: minimum share of cards buying both drinks, and of the
+# antecedent's buyers also buying the consequent
+COPURCHASE_MIN_SUPPORT = 0.01
+COPURCHASE_MIN_CONFIDENCE = 0.1
+
 # Plotting defaults
 PLOT_STYLE = "whitegrid"
 FIG_SIZE = (12, 8)
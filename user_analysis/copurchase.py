@@ -0,0 +1,313 @@
+"""Co-purchase and drink-to-drink transition analysis on sparse card x coffee matrices."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from instrumentation import span, traced
+from promotional_analysis.data_loader import COFFEE_NAME_MERGES
+
+from .config import COPURCHASE_MIN_CONFIDENCE, COPURCHASE_MIN_SUPPORT
+from .data_loader import load_transactions
+
+RULE_COLUMNS = ["antecedent", "consequent", "support", "confidence", "lift", "cards"]
+
+
+def merge_coffee_variants(names: pd.Series) -> pd.Series:
+    """Merge drink variants into one name, as normalize_coffee_names does."""
+    names = names.astype(str)
+    for variant, merged in COFFEE_NAME_MERGES:
+        names = names.str.replace(variant, merged, regex=False)
+    return names
+
+
+class CoPurchaseIndex:
+    """
+    Per-card purchase counts and per-card drink sequences as sparse count matrices.
+
+    ``card_coffee[c, d]`` counts purchases of drink d by card c, and
+    ``transitions[d, e]`` counts a card buying e as the next drink after d
+    (the pairs behind add_last_purchase's ``last_coffee``). Drink variants
+    are merged as in normalize_coffee_names, so rules and transitions use
+    the same names as the promotion recommendations. Both only grow
+    with the number of distinct (card, drink) and (drink, drink) pairs, not
+    with cards x menu. New transactions are folded in with ``update``, which
+    continues each card's sequence from its last known drink.
+    """
+
+    def __init__(self) -> None:
+        self.cards = pd.Index([], dtype=object)
+        self.coffees = pd.Index([], dtype=object)
+        self.card_coffee = sparse.csr_matrix((0, 0))
+        self.transitions = sparse.csr_matrix((0, 0))
+        self.last_coffee = np.zeros(0, dtype=np.int64)
+        self.last_seen = np.zeros(0, dtype="datetime64[ns]")
+
+    @classmethod
+    def from_transactions(cls, df: pd.DataFrame, coffee_col: str = "coffee_name") -> "CoPurchaseIndex":
+        """
+        Build the index from transactions.
+
+        Args:
+            df: Transactions with cash_type, card, datetime and drink name columns
+            coffee_col: Name of the drink name column
+
+        Returns:
+            CoPurchaseIndex
+        """
+        index = cls()
+        index.update(df, coffee_col)
+        return index
+
+    def _codes(self, labels: pd.Series, vocabulary: pd.Index) -> tuple[np.ndarray, pd.Index]:
+        codes = vocabulary.get_indexer(labels)
+        unseen = codes < 0
+        if unseen.any():
+            vocabulary = vocabulary.append(pd.Index(pd.unique(labels[unseen]), dtype=object))
+            codes[unseen] = vocabulary.get_indexer(labels[unseen])
+        return codes, vocabulary
+
+    def update(self, df: pd.DataFrame, coffee_col: str = "coffee_name") -> "CoPurchaseIndex":
+        """
+        Add transactions that follow the ones already indexed, in one sort.
+
+        Args:
+            df: Transactions with cash_type, card, datetime and drink name columns.
+                A card's new transactions may not predate its last indexed one
+            coffee_col: Name of the drink name column; variants are merged
+
+        Returns:
+            self, updated in place
+        """
+        rows = df[(df["cash_type"] == "card") & df["card"].notna()]
+        n_known = len(self.cards)
+        card_codes, self.cards = self._codes(rows["card"].to_numpy(dtype=object), self.cards)
+        coffee_codes, self.coffees = self._codes(merge_coffee_variants(rows[coffee_col]).to_numpy(dtype=object),
+                                                 self.coffees)
+        times = rows["datetime"].to_numpy(dtype="datetime64[ns]")
+        n_cards, n_coffees = len(self.cards), len(self.coffees)
+
+        # One sort by integer card code, then time
+        order = np.lexsort((times, card_codes))
+        card_codes, coffee_codes, times = card_codes[order], coffee_codes[order], times[order]
+
+        self.last_coffee = np.concatenate([self.last_coffee, np.full(n_cards - n_known, -1, dtype=np.int64)])
+        self.last_seen = np.concatenate([self.last_seen, np.full(n_cards - n_known, np.datetime64("NaT"), "datetime64[ns]")])
+        starts = np.r_[True, card_codes[1:] != card_codes[:-1]] if len(rows) else np.zeros(0, dtype=bool)
+        first_codes = card_codes[starts]
+        if (times[starts] < self.last_seen[first_codes]).any():
+            raise ValueError("new transactions predate the last indexed purchase of their card")
+
+        # Each row's previous drink: the row above within a card, or the card's last indexed drink
+        previous = np.r_[-1, coffee_codes[:-1]] if len(rows) else np.zeros(0, dtype=np.int64)
+        previous[starts] = self.last_coffee[first_codes]
+        has_previous = previous >= 0
+
+        self.card_coffee.resize((n_cards, n_coffees))
+        self.card_coffee = self.card_coffee + sparse.csr_matrix(
+            (np.ones(len(rows)), (card_codes, coffee_codes)), shape=(n_cards, n_coffees)
+        )
+        self.transitions.resize((n_coffees, n_coffees))
+        self.transitions = self.transitions + sparse.csr_matrix(
+            (np.ones(int(has_previous.sum())), (previous[has_previous], coffee_codes[has_previous])),
+            shape=(n_coffees, n_coffees),
+        )
+
+        ends = np.r_[starts[1:], True] if len(rows) else np.zeros(0, dtype=bool)
+        self.last_coffee[card_codes[ends]] = coffee_codes[ends]
+        self.last_seen[card_codes[ends]] = times[ends]
+        return self
+
+
+def transition_probabilities(index: CoPurchaseIndex) -> sparse.csr_matrix:
+    """
+    Probability of each next drink given the previous one.
+
+    Args:
+        index: CoPurchaseIndex
+
+    Returns:
+        Sparse (n_coffees, n_coffees) matrix whose non-empty rows sum to 1
+    """
+    totals = np.asarray(index.transitions.sum(axis=1)).ravel()
+    scale = np.divide(1.0, totals, out=np.zeros_like(totals), where=totals > 0)
+    return sparse.diags(scale) @ index.transitions
+
+
+def transition_table(index: CoPurchaseIndex) -> pd.DataFrame:
+    """
+    Non-zero transitions as a tidy table.
+
+    Args:
+        index: CoPurchaseIndex
+
+    Returns:
+        DataFrame with coffee_name, next_coffee, count and probability,
+        sorted by coffee_name and descending probability
+    """
+    counts = index.transitions.tocoo()
+    totals = np.asarray(index.transitions.sum(axis=1)).ravel()
+    return pd.DataFrame({
+        "coffee_name": index.coffees[counts.row],
+        "next_coffee": index.coffees[counts.col],
+        "count": counts.data,
+        "probability": counts.data / totals[counts.row],
+    }).sort_values(["coffee_name", "probability"], ascending=[True, False], ignore_index=True)
+
+
+def association_rules(
+    index: CoPurchaseIndex,
+    min_support: float = COPURCHASE_MIN_SUPPORT,
+    min_confidence: float = COPURCHASE_MIN_CONFIDENCE,
+) -> pd.DataFrame:
+    """
+    Drink pair rules A -> B over card baskets (the set of drinks each card has bought).
+
+    Pair counts come from one sparse product of the binary basket matrix
+    with itself, so only pairs that actually co-occur are materialized.
+
+    Args:
+        index: CoPurchaseIndex
+        min_support: Minimum share of cards that bought both drinks
+        min_confidence: Minimum share of A's buyers that also bought B
+
+    Returns:
+        DataFrame with antecedent, consequent, support, confidence, lift and
+        cards (buyers of both), sorted by descending lift
+    """
+    baskets = (index.card_coffee > 0).astype(np.float64)
+    n_cards = baskets.shape[0]
+    if n_cards == 0:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+    buyers = np.asarray(baskets.sum(axis=0)).ravel()
+    pairs = sparse.triu(baskets.T @ baskets, k=1).tocoo()
+    # Each unordered pair gives a rule in both directions
+    antecedent = np.concatenate([pairs.row, pairs.col])
+    consequent = np.concatenate([pairs.col, pairs.row])
+    both = np.concatenate([pairs.data, pairs.data])
+
+    support = both / n_cards
+    confidence = both / buyers[antecedent]
+    lift = confidence / (buyers[consequent] / n_cards)
+    keep = (support >= min_support) & (confidence >= min_confidence)
+    rules = pd.DataFrame({
+        "antecedent": index.coffees[antecedent[keep]],
+        "consequent": index.coffees[consequent[keep]],
+        "support": support[keep],
+        "confidence": confidence[keep],
+        "lift": lift[keep],
+        "cards": both[keep].astype(np.int64),
+    })
+    return rules.sort_values(["lift", "confidence"], ascending=False, ignore_index=True)
+
+
+def next_coffee_scores(index: CoPurchaseIndex, cards: List[str] | pd.Index | None = None) -> sparse.csr_matrix:
+    """
+    Transition probability of every drink after each card's last drink.
+
+    Args:
+        index: CoPurchaseIndex
+        cards: Card ids. If None, every indexed card
+
+    Returns:
+        Sparse (n_cards, n_coffees) matrix, with columns in index.coffees order;
+        rows of unknown cards are empty
+    """
+    codes = np.arange(len(index.cards)) if cards is None else index.cards.get_indexer(cards)
+    last = np.where(codes >= 0, index.last_coffee[codes], -1)
+    known = last >= 0
+    selector = sparse.csr_matrix(
+        (np.ones(int(known.sum())), (np.flatnonzero(known), last[known])),
+        shape=(len(codes), len(index.coffees)),
+    )
+    return selector @ transition_probabilities(index)
+
+
+def promotion_partners(rules: pd.DataFrame, drinks: List[str], k: int = 1) -> pd.DataFrame:
+    """
+    Drinks to pair with promoted drinks, by lift of the co-purchase rule.
+
+    Only rules with lift above 1 qualify: their buyers are more likely than
+    average to also buy the partner.
+
+    Args:
+        rules: Rules from association_rules
+        drinks: Promoted drinks (e.g. from recommend_daily_promotions)
+        k: Partners per drink
+
+    Returns:
+        DataFrame of the top-k rules per promoted drink, fewer if a drink
+        has no positively associated partner
+    """
+    chosen = rules[rules["antecedent"].isin(drinks) & (rules["lift"] > 1)]
+    return chosen.groupby("antecedent", sort=False).head(k).reset_index(drop=True)
+
+
+@traced("copurchase_main", "user_analysis")
+def copurchase_main(
+    data_path: str | Path | None = None,
+    stores: List[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    min_support: float = COPURCHASE_MIN_SUPPORT,
+    min_confidence: float = COPURCHASE_MIN_CONFIDENCE,
+    output_dir: str | Path | None = None,
+) -> CoPurchaseIndex:
+    """
+    Build the co-purchase index and print association rules and transitions.
+
+    Args:
+        data_path: Optional path to CSV file or partitioned dataset root
+        stores: Optional store ids to include
+        start: Optional inclusive start of the transaction window
+        end: Optional exclusive end of the transaction window
+        min_support: Minimum share of cards that bought both drinks of a rule
+        min_confidence: Minimum share of the antecedent's buyers that bought the consequent
+        output_dir: Optional directory for rules.csv and transitions.csv
+
+    Returns:
+        CoPurchaseIndex
+    """
+    with span("load_transactions", "user_analysis") as stage:
+        df = load_transactions(data_path, stores=stores, start=start, end=end)
+        stage.rows_out = len(df)
+    with span("build_copurchase", "user_analysis", rows_in=len(df)) as stage:
+        index = CoPurchaseIndex.from_transactions(df)
+        stage.rows_out = index.card_coffee.nnz
+    with span("association_rules", "user_analysis", rows_in=index.card_coffee.nnz) as stage:
+        rules = association_rules(index, min_support, min_confidence)
+        transitions = transition_table(index)
+        stage.rows_out = len(rules)
+
+    print(f"{len(index.cards):,} cards, {len(index.coffees)} drinks, "
+          f"{index.card_coffee.nnz:,} card-drink pairs, {int(index.transitions.sum()):,} transitions")
+    print("Top co-purchase rules by lift:")
+    print(rules.head(10).round(3).to_string(index=False))
+    print("Most likely next drink after each drink:")
+    print(transitions.drop_duplicates("coffee_name").round(3).to_string(index=False))
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        rules.to_csv(output_dir / "rules.csv", index=False)
+        transitions.to_csv(output_dir / "transitions.csv", index=False)
+        print(f"Written to {output_dir}")
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Co-purchase rules and drink transitions of card customers.")
+    parser.add_argument("--data-path", default=None)
+    parser.add_argument("--stores", nargs="+", default=None)
+    parser.add_argument("--min-support", type=float, default=COPURCHASE_MIN_SUPPORT)
+    parser.add_argument("--min-confidence", type=float, default=COPURCHASE_MIN_CONFIDENCE)
+    parser.add_argument("--output-dir", default=None)
+    parser.add_argument("--start", default=None, help="Only use transactions at or after this time")
+    parser.add_argument("--end", default=None, help="Only use transactions before this time")
+    args = parser.parse_args()
+    copurchase_main(args.data_path, args.stores, args.start, args.end, min_support=args.min_support,
+                    min_confidence=args.min_confidence, output_dir=args.output_dir)
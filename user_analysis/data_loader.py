@@ -1,28 +1,36 @@
 """Data loading utilities for the user model pipeline."""
 from __future__ import annotations
 
+from typing import List
+
 import pandas as pd
 
+from transaction_store import parse_transaction_times, read_transactions
+
 from .config import resolve_data_path
 
 
-def load_transactions(data_path: str | None = None) -> pd.DataFrame:
+def load_transactions(
+    data_path: str | None = None,
+    stores: List[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> pd.DataFrame:
     """
     Load the raw transaction data and parse datetime columns.
     
     Args:
-        data_path: Optional path to the CSV file. If None, uses default path
+        data_path: Optional path to the CSV file or partitioned dataset root. If None, uses default path
+        stores: Optional store ids to load. If None, loads the union of all stores
+        start: Optional inclusive start of the time window (e.g. "2024-06-01")
+        end: Optional exclusive end of the time window
         
     Returns:
         DataFrame containing transaction data with parsed datetime columns
     """
     path = resolve_data_path(data_path)
-    df = pd.read_csv(path)
+    df = read_transactions(path, stores=stores, start=start, end=end)
 
     # Normalize datetime columns for downstream processing.
-    if "datetime" in df.columns:
-        df["datetime"] = pd.to_datetime(df["datetime"])
-    if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"])
-    return df
+    return parse_transaction_times(df)
 
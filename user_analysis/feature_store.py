@@ -0,0 +1,193 @@
+"""Memory-mapped, column-major store for the engineered user features."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from .config import FEATURE_SCHEMA_VERSION, FEATURE_STORE_DIR, FEATURE_STORE_MAX_ENTRIES
+from .features import CATEGORICAL_FEATURES, NUMERIC_BASE_FEATURES, engineer_features
+
+# Raw columns the engineered features depend on
+INPUT_COLUMNS: List[str] = ["datetime", "cash_type", "card", "money", "coffee_name"]
+
+
+@dataclass
+class FeatureSet:
+    """Engineered features as stored in (or loaded from) the feature store."""
+    X: pd.DataFrame
+    y: pd.Series
+    feature_names: List[str]
+    encoders: Dict[str, LabelEncoder]
+    fingerprint: str
+    from_cache: bool
+
+
+def input_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Fingerprint the raw transactions and the feature schema.
+
+    Args:
+        df: Raw transaction DataFrame as returned by load_transactions
+
+    Returns:
+        Hex digest that changes when the input rows or the feature definitions change
+    """
+    columns = [col for col in INPUT_COLUMNS if col in df.columns]
+    digest = hashlib.sha1()
+    digest.update(json.dumps({
+        "schema_version": FEATURE_SCHEMA_VERSION,
+        "columns": columns,
+        "features": NUMERIC_BASE_FEATURES + CATEGORICAL_FEATURES,
+    }).encode())
+    digest.update(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def save_features(
+    X: pd.DataFrame,
+    y: pd.Series,
+    encoders: Dict[str, LabelEncoder],
+    fingerprint: str,
+    store_dir: str | Path = FEATURE_STORE_DIR,
+) -> Path:
+    """
+    Write features to the store as one contiguous float64 column per feature.
+
+    X is saved transposed (n_features x n_rows) so every column is a
+    contiguous slice of the memory map. The entry is written to a temporary
+    directory and renamed into place, so readers never see a partial entry.
+
+    Args:
+        X: Feature matrix
+        y: Target labels
+        encoders: Fitted label encoders for the categorical features
+        fingerprint: Input fingerprint from input_fingerprint
+        store_dir: Root directory of the feature store
+
+    Returns:
+        Path to the store entry
+    """
+    store_dir = Path(store_dir)
+    entry = store_dir / fingerprint
+    tmp = store_dir / f".{fingerprint}.{os.getpid()}.tmp"
+    tmp.mkdir(parents=True, exist_ok=True)
+
+    columns = np.lib.format.open_memmap(
+        tmp / "X.npy", mode="w+", dtype=np.float64, shape=(X.shape[1], X.shape[0])
+    )
+    for i, col in enumerate(X.columns):
+        columns[i] = X[col].to_numpy(dtype=np.float64)
+    columns.flush()
+    del columns
+
+    classes, codes = np.unique(y.astype(str).to_numpy(), return_inverse=True)
+    np.save(tmp / "y_codes.npy", codes.astype(np.int32))
+    np.save(tmp / "row_index.npy", X.index.to_numpy(dtype=np.int64))
+    meta = {
+        "schema_version": FEATURE_SCHEMA_VERSION,
+        "fingerprint": fingerprint,
+        "created": time.time(),
+        "n_rows": int(X.shape[0]),
+        "feature_names": list(X.columns),
+        "target_classes": classes.tolist(),
+        "encoders": {col: enc.classes_.tolist() for col, enc in encoders.items()},
+    }
+    with open(tmp / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+
+    if entry.exists():
+        shutil.rmtree(entry)
+    os.replace(tmp, entry)
+    _prune(store_dir, FEATURE_STORE_MAX_ENTRIES)
+    return entry
+
+
+def load_features(fingerprint: str, store_dir: str | Path = FEATURE_STORE_DIR) -> FeatureSet | None:
+    """
+    Open a store entry without copying the feature matrix.
+
+    X is a DataFrame view over a read-only memory map, so only the pages a
+    consumer touches are read from disk.
+
+    Args:
+        fingerprint: Input fingerprint from input_fingerprint
+        store_dir: Root directory of the feature store
+
+    Returns:
+        FeatureSet, or None if the entry is missing or has another schema version
+    """
+    entry = Path(store_dir) / fingerprint
+    meta_path = entry / "meta.json"
+    if not meta_path.exists():
+        return None
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    if meta.get("schema_version") != FEATURE_SCHEMA_VERSION:
+        return None
+
+    columns = np.load(entry / "X.npy", mmap_mode="r")
+    index = pd.Index(np.load(entry / "row_index.npy", mmap_mode="r"))
+    # columns.T is a Fortran-ordered view; pandas keeps it as one block without copying
+    X = pd.DataFrame(columns.T, index=index, columns=meta["feature_names"], copy=False)
+    codes = np.load(entry / "y_codes.npy", mmap_mode="r")
+    y = pd.Series(
+        pd.Categorical.from_codes(codes, categories=meta["target_classes"]),
+        index=index,
+        name="coffee_name",
+    )
+
+    encoders = {}
+    for col, classes in meta["encoders"].items():
+        encoder = LabelEncoder()
+        encoder.classes_ = np.asarray(classes, dtype=object)
+        encoders[col] = encoder
+    os.utime(meta_path)  # mark as recently used for pruning
+    return FeatureSet(X, y, meta["feature_names"], encoders, fingerprint, from_cache=True)
+
+
+def load_or_build_features(
+    df: pd.DataFrame,
+    store_dir: str | Path | None = FEATURE_STORE_DIR,
+    rebuild: bool = False,
+) -> FeatureSet:
+    """
+    Return engineered features from the store, building and saving them on a miss.
+
+    Args:
+        df: Raw transaction DataFrame as returned by load_transactions
+        store_dir: Root directory of the feature store. If None, always rebuilds in memory
+        rebuild: Force feature engineering even if a matching entry exists
+
+    Returns:
+        FeatureSet with X, y, feature names and encoders
+    """
+    fingerprint = input_fingerprint(df)
+    if store_dir is not None and not rebuild:
+        cached = load_features(fingerprint, store_dir)
+        if cached is not None:
+            return cached
+
+    _, X, y, feature_names, encoders = engineer_features(df)
+    if store_dir is None:
+        return FeatureSet(X, y, feature_names, encoders, fingerprint, from_cache=False)
+    save_features(X, y, encoders, fingerprint, store_dir)
+    # Re-open from the store so every caller gets the same float64, memory-mapped layout
+    return replace(load_features(fingerprint, store_dir), from_cache=False)
+
+
+def _prune(store_dir: Path, max_entries: int) -> None:
+    """Remove the least recently used entries beyond max_entries."""
+    entries = [p for p in store_dir.iterdir() if (p / "meta.json").exists()]
+    entries.sort(key=lambda p: (p / "meta.json").stat().st_mtime, reverse=True)
+    for stale in entries[max_entries:]:
+        shutil.rmtree(stale, ignore_errors=True)
@@ -3,6 +3,8 @@ from __future__ import annotations
 
 import pandas as pd
 
+from transaction_store import assign_visits
+
 
 def add_customer_history(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -12,7 +14,8 @@ def add_customer_history(df: pd.DataFrame) -> pd.DataFrame:
         df: DataFrame with cash_type, card, coffee_name, datetime, money columns
         
     Returns:
-        DataFrame with added customer_favorite_coffee, customer_visit_count, customer_avg_spend columns
+        DataFrame with added customer_favorite_coffee, customer_visit_count, customer_avg_spend columns.
+        customer_visit_count counts visits (see transaction_store.sessions), not transactions
     """
     df = df.copy()
     if "cash_type" not in df.columns:
@@ -20,9 +23,10 @@ def add_customer_history(df: pd.DataFrame) -> pd.DataFrame:
 
     card_df = df[df["cash_type"] == "card"].dropna(subset=["card"]).copy()
     if not card_df.empty:
+        card_df["visit_id"] = assign_visits(card_df)
         customer_stats = card_df.groupby("card").agg(
             customer_favorite_coffee=("coffee_name", _first_mode),
-            customer_visit_count=("datetime", "count"),
+            customer_visit_count=("visit_id", "nunique"),
             customer_avg_spend=("money", "mean"),
         )
         df = df.merge(customer_stats, on="card", how="left")
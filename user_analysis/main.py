@@ -2,34 +2,65 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import List
 
+from instrumentation import span, traced
+
+from .config import FEATURE_STORE_DIR
 from .data_loader import load_transactions
-from .features import engineer_features
-from .models import train_and_evaluate
+from .feature_store import load_or_build_features
+from .models import train_and_evaluate, train_and_evaluate_cached
 from .visualization import plot_feature_importance
 
 
-def main(data_path: str | Path | None = None, show_plot: bool = True) -> None:
+@traced("user_analysis_main", "user_analysis")
+def main(
+    data_path: str | Path | None = None,
+    show_plot: bool = True,
+    stores: List[str] | None = None,
+    use_feature_store: bool = True,
+    use_model_registry: bool = True,
+    start: str | None = None,
+    end: str | None = None,
+) -> None:
     """
     Run the complete user model pipeline mirroring the original notebook.
     
     Args:
-        data_path: Optional path to CSV file. If None, uses default path
+        data_path: Optional path to CSV file or partitioned dataset root. If None, uses default path
         show_plot: Whether to display feature importance plot. Defaults to True
+        stores: Optional store ids to analyze. If None, uses the union of all stores
+        use_feature_store: Reuse memory-mapped features for unchanged input. If False, features
+            are built in memory and the store is neither read nor written. Defaults to True
+        use_model_registry: Reuse fitted models for unchanged features and settings. Defaults to True
+        start: Optional inclusive start of the time window (e.g. "2024-06-01")
+        end: Optional exclusive end of the time window
         
     Returns:
         None. Prints results and optionally displays plot
     """
-    df = load_transactions(data_path)
+    with span("load_transactions", "user_analysis") as stage:
+        df = load_transactions(data_path, stores=stores, start=start, end=end)
+        stage.rows_out = len(df)
     print(f"Loaded {len(df):,} rows from {data_path or 'DEFAULT_DATA_PATH'}")
 
-    engineered_df, X, y, features, _ = engineer_features(df)
+    with span("engineer_features", "user_analysis", rows_in=len(df)) as stage:
+        feature_set = load_or_build_features(df, store_dir=FEATURE_STORE_DIR if use_feature_store else None)
+        X, y, features = feature_set.X, feature_set.y, feature_set.feature_names
+        stage.rows_out = len(X)
+        stage.set(from_cache=feature_set.from_cache)
     print(f"Total features: {len(features)}")
     print(f"Feature list (first 10): {features[:10]}")
     print("\nClass distribution:")
     print(y.value_counts())
 
-    results = train_and_evaluate(X, y)
+    with span("train_and_evaluate", "user_analysis", rows_in=len(X)) as stage:
+        if use_model_registry:
+            results = train_and_evaluate_cached(X, y, feature_set.fingerprint)
+            stage.set(from_registry=results["from_registry"])
+        else:
+            results = train_and_evaluate(X, y)
+        stage.rows_out = len(results["splits"]["X_test"])
     splits = results["splits"]
     print(f"\nTraining set: {len(splits['X_train'])} samples")
     print(f"Test set: {len(splits['X_test'])} samples\n")
@@ -1,6 +1,8 @@
 """Model training sub-package for user model pipeline."""
 from __future__ import annotations
 
+from typing import Any, Dict
+
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
@@ -10,13 +12,20 @@ from .decision_tree import train_decision_tree
 from .random_forest import train_random_forest
 
 
-def train_and_evaluate(X: pd.DataFrame, y: pd.Series) -> dict:
+def train_and_evaluate(
+    X: pd.DataFrame,
+    y: pd.Series,
+    decision_tree_params: Dict[str, Any] | None = None,
+    random_forest_params: Dict[str, Any] | None = None,
+) -> dict:
     """
     Train Decision Tree and Random Forest models and capture metrics.
     
     Args:
         X: Feature matrix DataFrame
         y: Target labels Series
+        decision_tree_params: Optional keyword overrides for train_decision_tree
+        random_forest_params: Optional keyword overrides for train_random_forest
         
     Returns:
         Dictionary containing:
@@ -32,8 +41,12 @@ def train_and_evaluate(X: pd.DataFrame, y: pd.Series) -> dict:
     )
     class_weights = compute_balanced_class_weights(y)
 
-    _, dt_result = train_decision_tree(X_train, y_train, X_test, y_test)
-    rf_model, rf_result = train_random_forest(X_train, y_train, X_test, y_test)
+    _, dt_result = train_decision_tree(
+        X_train, y_train, X_test, y_test, **(decision_tree_params or {})
+    )
+    rf_model, rf_result = train_random_forest(
+        X_train, y_train, X_test, y_test, **(random_forest_params or {})
+    )
 
     feature_importance = pd.DataFrame(
         {"feature": X.columns, "importance": rf_model.feature_importances_}
@@ -49,8 +62,13 @@ def train_and_evaluate(X: pd.DataFrame, y: pd.Series) -> dict:
     }
 
 
+# Imported after train_and_evaluate is defined; the registry wraps it
+from .registry import ModelRegistry, train_and_evaluate_cached  # noqa: E402
+
 __all__ = [
     "train_and_evaluate",
+    "train_and_evaluate_cached",
+    "ModelRegistry",
     "train_decision_tree",
     "train_random_forest",
     "ModelResult",
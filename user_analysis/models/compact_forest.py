@@ -0,0 +1,414 @@
+"""Flattened random forest for fast loading and vectorized batch inference."""
+from __future__ import annotations
+
+import tempfile
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, List
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from ..config import PROJECT_ROOT
+from ..data_loader import load_transactions
+from ..feature_store import FeatureSet, load_or_build_features
+from .registry import ModelRegistry, resolve_hyperparameters, train_and_evaluate_cached, training_key
+
+COMPACT_FOREST_PATH = PROJECT_ROOT / ".cache" / "compact_forest.npz"
+THRESHOLD_MODES = ("float64", "float32", "quantized")
+DEFAULT_BATCH_ROWS = 4096
+# Rows x trees walked together per step; sized so the work arrays stay in cache
+TREE_BLOCK_WALKERS = 32_768
+# Above this many rows sklearn's compiled traversal saves more than the compact load time
+SERVING_MAX_ROWS = 8192
+_LEAF = -1  # sklearn's TREE_LEAF
+
+
+@dataclass
+class CompactForest:
+    """
+    All trees of a forest stored as one set of contiguous node arrays.
+
+    children[i] holds the (left, right) child of node i, so a step is one take
+    at 2 * node + went_right. Leaves are their own children, so every row can
+    be walked for max_depth steps without checking for leaves.
+
+    Thresholds are kept in one of three forms:
+        - 'float64': sklearn's thresholds as-is
+        - 'float32': each threshold rounded down to float32, which gives the same
+          decisions because sklearn compares float32 inputs
+        - 'quantized': per-feature rank of the threshold; inputs are binned once
+          per batch with searchsorted, so comparisons run on small integers
+
+    registry_key is the model registry key of the sklearn forest it was
+    exported from, so a saved file can be matched to the current features.
+    """
+    feature: np.ndarray
+    threshold: np.ndarray
+    children: np.ndarray
+    value: np.ndarray
+    roots: np.ndarray
+    classes: np.ndarray
+    feature_names: np.ndarray
+    max_depth: int
+    threshold_mode: str = "float64"
+    bin_edges: np.ndarray | None = None
+    bin_offsets: np.ndarray | None = None
+    registry_key: str = ""
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @cached_property
+    def _walk_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Split features and flat children as intp (take() then skips a conversion per step) and the leaf mask."""
+        is_leaf = self.children[:, 0] == np.arange(len(self.children))
+        return self.feature.astype(np.intp), self.children.ravel().astype(np.intp), is_leaf
+
+    def _prepare(self, X: pd.DataFrame | np.ndarray) -> np.ndarray:
+        """Convert input rows to the (n_rows, n_features) array the split tests run on."""
+        if isinstance(X, pd.DataFrame) and len(self.feature_names):
+            X = X[list(self.feature_names)]
+        # sklearn compares float32 inputs against the thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if self.threshold_mode != "quantized":
+            return X
+        bins = np.empty(X.shape, dtype=self.threshold.dtype)
+        for f in range(X.shape[1]):
+            edges = self.bin_edges[self.bin_offsets[f]:self.bin_offsets[f + 1]]
+            bins[:, f] = np.searchsorted(edges, X[:, f].astype(np.float64), side="left")
+        return bins
+
+    def apply(self, X: pd.DataFrame | np.ndarray) -> np.ndarray:
+        """
+        Return the leaf index reached in every tree.
+
+        Args:
+            X: Feature rows (DataFrame with the training columns, or array)
+
+        Returns:
+            Array of shape (n_rows, n_trees) with global node indices
+        """
+        return self._apply_prepared(self._prepare(X)).T
+
+    def _apply_prepared(self, data: np.ndarray) -> np.ndarray:
+        """Walk all rows through all trees, a block of trees at a time; returns leaves as (n_trees, n_rows)."""
+        n_rows = len(data)
+        # Feature-major copy so a (feature, row) lookup is one flat take
+        flat = np.ascontiguousarray(data.T).ravel()
+        feature, children, is_leaf = self._walk_arrays
+        leaves = np.empty(self.n_trees * n_rows, dtype=np.int64)
+        # Trees per block keep the per-step work arrays small enough to stay in cache
+        block = max(1, TREE_BLOCK_WALKERS // max(n_rows, 1))
+        for first in range(0, self.n_trees, block):
+            roots = self.roots[first:first + block].astype(np.int64)
+            slots = np.arange(first * n_rows, (first + len(roots)) * n_rows, dtype=np.int64)
+            rows = np.tile(np.arange(n_rows, dtype=np.int64), len(roots))
+            nodes = np.repeat(roots, n_rows)
+            for step in range(self.max_depth):
+                lookup = feature.take(nodes)
+                lookup *= n_rows
+                lookup += rows
+                went_right = flat.take(lookup) > self.threshold.take(nodes)
+                nodes += nodes
+                nodes += went_right
+                nodes = children.take(nodes)
+                # Leaves are their own children, so finished rows can keep stepping in place;
+                # every other step they are dropped once they are the majority
+                if step % 2 == 0:
+                    continue
+                done = is_leaf.take(nodes)
+                n_done = np.count_nonzero(done)
+                if n_done == len(nodes):
+                    break
+                if 2 * n_done > len(nodes):
+                    leaves[slots[done]] = nodes[done]
+                    walking = ~done
+                    slots, rows, nodes = slots[walking], rows[walking], nodes[walking]
+            leaves[slots] = nodes
+        return leaves.reshape(self.n_trees, n_rows)
+
+    def predict_proba(self, X: pd.DataFrame | np.ndarray,
+                      batch_rows: int = DEFAULT_BATCH_ROWS) -> np.ndarray:
+        """
+        Average the leaf class distributions over all trees, in batches.
+
+        Args:
+            X: Feature rows
+            batch_rows: Rows traversed at once (bounds the rows x trees work array)
+
+        Returns:
+            Array of shape (n_rows, n_classes)
+        """
+        data = self._prepare(X)
+        proba = np.zeros((len(data), len(self.classes)))
+        for start in range(0, len(data), batch_rows):
+            batch = proba[start:start + batch_rows]
+            # Adding one tree at a time sums in tree order, like sklearn
+            for leaves in self._apply_prepared(data[start:start + batch_rows]):
+                batch += self.value.take(leaves, axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X: pd.DataFrame | np.ndarray,
+                batch_rows: int = DEFAULT_BATCH_ROWS) -> np.ndarray:
+        """
+        Predict class labels.
+
+        Args:
+            X: Feature rows
+            batch_rows: Rows traversed at once
+
+        Returns:
+            Array of predicted class labels
+        """
+        return self.classes[np.argmax(self.predict_proba(X, batch_rows), axis=1)]
+
+
+def export_forest(model: RandomForestClassifier, threshold_mode: str = "float64") -> CompactForest:
+    """
+    Flatten a fitted RandomForestClassifier into a CompactForest.
+
+    Args:
+        model: Fitted single-output RandomForestClassifier
+        threshold_mode: 'float64', 'float32' or 'quantized'
+
+    Returns:
+        CompactForest giving the same predictions as model
+    """
+    if threshold_mode not in THRESHOLD_MODES:
+        raise ValueError(f"Unknown threshold mode: {threshold_mode}. Use one of {THRESHOLD_MODES}")
+    if model.n_outputs_ != 1:
+        raise ValueError("Only single-output forests can be exported")
+
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    sizes = np.array([tree.node_count for tree in trees])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    n_classes = len(model.classes_)
+
+    feature = np.concatenate([tree.feature for tree in trees]).astype(np.int32)
+    threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+    left = np.concatenate([tree.children_left + off for tree, off in zip(trees, offsets)])
+    right = np.concatenate([tree.children_right + off for tree, off in zip(trees, offsets)])
+    raw_left = np.concatenate([tree.children_left for tree in trees])
+    value = np.concatenate([tree.value[:, 0, :n_classes] for tree in trees]).astype(np.float64)
+
+    is_leaf = raw_left == _LEAF
+    node_ids = np.arange(len(feature))
+    children = np.stack([np.where(is_leaf, node_ids, left),
+                         np.where(is_leaf, node_ids, right)], axis=1).astype(np.int32)
+    feature[is_leaf] = 0
+
+    bin_edges = bin_offsets = None
+    if threshold_mode == "float32":
+        rounded = threshold.astype(np.float32)
+        # Round down so that x <= t32 exactly when x <= t64 for every float32 x
+        too_high = rounded.astype(np.float64) > threshold
+        rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+        rounded[is_leaf] = np.inf
+        threshold = rounded
+    elif threshold_mode == "quantized":
+        n_features = model.n_features_in_
+        edges = [np.unique(threshold[~is_leaf & (feature == f)]) for f in range(n_features)]
+        bin_offsets = np.concatenate([[0], np.cumsum([len(e) for e in edges])]).astype(np.int64)
+        bin_edges = np.concatenate(edges) if bin_offsets[-1] else np.empty(0)
+        rank_dtype = np.uint16 if max((len(e) for e in edges), default=0) < 2**16 - 1 else np.int32
+        ranks = np.full(len(threshold), np.iinfo(rank_dtype).max, dtype=rank_dtype)
+        for f, feature_edges in enumerate(edges):
+            mask = ~is_leaf & (feature == f)
+            ranks[mask] = np.searchsorted(feature_edges, threshold[mask])
+        threshold = ranks
+    else:
+        threshold[is_leaf] = np.inf
+
+    depth = max(estimator.get_depth() for estimator in model.estimators_)
+    names = getattr(model, "feature_names_in_", np.empty(0, dtype=object))
+    return CompactForest(
+        feature=feature,
+        threshold=threshold,
+        children=children,
+        value=value,
+        roots=offsets.astype(np.int32),
+        classes=np.asarray(model.classes_),
+        feature_names=np.asarray(names, dtype=object),
+        max_depth=int(depth),
+        threshold_mode=threshold_mode,
+        bin_edges=bin_edges,
+        bin_offsets=bin_offsets,
+    )
+
+
+def save_compact_forest(forest: CompactForest, path: str | Path = COMPACT_FOREST_PATH) -> Path:
+    """
+    Write a CompactForest to an uncompressed .npz file.
+
+    Args:
+        forest: CompactForest to save
+        path: Output file path
+
+    Returns:
+        Path to the written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    arrays = {
+        "feature": forest.feature,
+        "threshold": forest.threshold,
+        "children": forest.children,
+        "value": forest.value,
+        "roots": forest.roots,
+        "classes": forest.classes.astype(str),
+        "feature_names": forest.feature_names.astype(str),
+        "max_depth": np.array(forest.max_depth),
+        "threshold_mode": np.array(forest.threshold_mode),
+        "registry_key": np.array(forest.registry_key),
+    }
+    if forest.bin_edges is not None:
+        arrays["bin_edges"] = forest.bin_edges
+        arrays["bin_offsets"] = forest.bin_offsets
+    np.savez(path, **arrays)
+    return path
+
+
+def load_compact_forest(path: str | Path = COMPACT_FOREST_PATH) -> CompactForest:
+    """
+    Load a CompactForest written by save_compact_forest.
+
+    Args:
+        path: Path to the .npz file
+
+    Returns:
+        CompactForest
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return CompactForest(
+            feature=data["feature"],
+            threshold=data["threshold"],
+            children=data["children"],
+            value=data["value"],
+            roots=data["roots"],
+            classes=data["classes"].astype(object),
+            feature_names=data["feature_names"].astype(object),
+            max_depth=int(data["max_depth"]),
+            threshold_mode=str(data["threshold_mode"]),
+            bin_edges=data["bin_edges"] if "bin_edges" in data else None,
+            bin_offsets=data["bin_offsets"] if "bin_offsets" in data else None,
+            registry_key=str(data["registry_key"]) if "registry_key" in data else "",
+        )
+
+
+def load_serving_forest(feature_set: FeatureSet, path: str | Path = COMPACT_FOREST_PATH,
+                        registry: ModelRegistry | None = None,
+                        threshold_mode: str = "float64") -> CompactForest:
+    """
+    Return the compact forest for a feature set, exporting it only when the saved one is stale.
+
+    The saved file is used when its registry_key matches the key of the
+    feature set's fingerprint and the current hyper-parameters, so serving
+    never unpickles the sklearn forest. Otherwise the forest is taken from
+    the registry (training on a miss), exported and saved.
+
+    Args:
+        feature_set: Features the model is trained on
+        path: Compact forest file
+        registry: Registry to use. If None, uses the default ModelRegistry
+        threshold_mode: Mode used when the forest has to be exported
+
+    Returns:
+        CompactForest matching the registry entry
+    """
+    key = training_key(feature_set.fingerprint, resolve_hyperparameters())
+    path = Path(path)
+    if path.exists():
+        forest = load_compact_forest(path)
+        if forest.registry_key == key:
+            return forest
+    results = train_and_evaluate_cached(feature_set.X, feature_set.y, feature_set.fingerprint, registry)
+    forest = export_forest(results["rf_model"], threshold_mode)
+    forest.registry_key = results["registry_key"]
+    save_compact_forest(forest, path)
+    return forest
+
+
+def validate_compact_forest(forest: CompactForest, model: RandomForestClassifier,
+                            X: pd.DataFrame | np.ndarray, atol: float = 1e-12) -> Dict[str, float]:
+    """
+    Check a CompactForest against the sklearn forest it was exported from.
+
+    Args:
+        forest: Exported CompactForest
+        model: Original fitted RandomForestClassifier
+        X: Rows to compare on
+        atol: Allowed absolute difference in probabilities (summation order only)
+
+    Returns:
+        Dictionary with 'mismatches' and 'max_proba_diff'
+
+    Raises:
+        AssertionError: If any prediction differs or probabilities differ beyond atol
+    """
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(X)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+    mismatches = int(np.sum(model.classes_[expected.argmax(axis=1)] != forest.classes[actual.argmax(axis=1)]))
+    if mismatches or max_diff > atol:
+        raise AssertionError(
+            f"Compact forest disagrees with sklearn: {mismatches} predictions, "
+            f"max probability difference {max_diff:.3g}"
+        )
+    return {"mismatches": mismatches, "max_proba_diff": max_diff}
+
+
+def _time(func, repeat: int = 3) -> float:
+    """Return the best wall time of repeated calls."""
+    best = np.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(data_path: str | None = None, threshold_modes: List[str] | None = None) -> None:
+    """
+    Export the registry's random forest in each threshold mode, validate it and report timings.
+
+    Args:
+        data_path: Optional path to CSV file or partitioned dataset root
+        threshold_modes: Modes to export. If None, exports all THRESHOLD_MODES
+
+    Returns:
+        None. Writes COMPACT_FOREST_PATH (last mode) and prints load/latency comparisons
+    """
+    feature_set = load_or_build_features(load_transactions(data_path))
+    results = train_and_evaluate_cached(feature_set.X, feature_set.y, feature_set.fingerprint)
+    model = results["rf_model"]
+    X = feature_set.X
+    row = X.iloc[:1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sklearn_path = Path(tmp) / "rf.joblib"
+        joblib.dump(model, sklearn_path)
+        print(f"sklearn   load {_time(lambda: joblib.load(sklearn_path)) * 1e3:8.1f} ms  "
+              f"1 row {_time(lambda: model.predict(row)) * 1e3:7.2f} ms  "
+              f"{len(X):,} rows {_time(lambda: model.predict(X)) * 1e3:8.1f} ms")
+
+    for mode in threshold_modes or THRESHOLD_MODES:
+        forest = export_forest(model, mode)
+        forest.registry_key = results["registry_key"]
+        checks = validate_compact_forest(forest, model, X)
+        path = save_compact_forest(forest)
+        print(f"{mode:<9} load {_time(lambda: load_compact_forest(path)) * 1e3:8.1f} ms  "
+              f"1 row {_time(lambda: forest.predict(row)) * 1e3:7.2f} ms  "
+              f"{len(X):,} rows {_time(lambda: forest.predict(X)) * 1e3:8.1f} ms  "
+              f"size {path.stat().st_size / 2**20:6.2f} MiB  "
+              f"max |dp| {checks['max_proba_diff']:.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Local registry of fitted models and metrics with LRU and size-budget eviction."""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from ..config import (
+    MODEL_REGISTRY_DIR,
+    MODEL_REGISTRY_MAX_BYTES,
+    MODEL_REGISTRY_MAX_ENTRIES,
+    RANDOM_STATE,
+    TEST_SIZE,
+)
+from . import train_and_evaluate
+from .decision_tree import train_decision_tree
+from .random_forest import train_random_forest
+
+ARTIFACT_FILE = "artifacts.joblib"
+META_FILE = "meta.json"
+
+
+def _defaults(func) -> Dict[str, Any]:
+    """Return the keyword defaults of a training function."""
+    return {
+        name: param.default
+        for name, param in inspect.signature(func).parameters.items()
+        if param.default is not inspect.Parameter.empty
+    }
+
+
+def resolve_hyperparameters(
+    decision_tree_params: Dict[str, Any] | None = None,
+    random_forest_params: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """
+    Merge overrides with the training functions' defaults.
+
+    Args:
+        decision_tree_params: Optional overrides for train_decision_tree
+        random_forest_params: Optional overrides for train_random_forest
+
+    Returns:
+        Dictionary with every setting that affects the trained models
+    """
+    return {
+        "test_size": TEST_SIZE,
+        "random_state": RANDOM_STATE,
+        "decision_tree": {**_defaults(train_decision_tree), **(decision_tree_params or {})},
+        "random_forest": {**_defaults(train_random_forest), **(random_forest_params or {})},
+    }
+
+
+def training_key(fingerprint: str, hyperparameters: Dict[str, Any]) -> str:
+    """
+    Build the registry key for a feature fingerprint and hyper-parameters.
+
+    Args:
+        fingerprint: Feature-store input fingerprint
+        hyperparameters: Output of resolve_hyperparameters
+
+    Returns:
+        Hex digest identifying the training run
+    """
+    payload = json.dumps(
+        {"fingerprint": fingerprint, "params": hyperparameters, "sklearn": sklearn.__version__},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class ModelRegistry:
+    """
+    Directory of training results, one sub-directory per key.
+
+    Each entry holds the joblib-dumped artifacts and a meta.json whose mtime
+    records the last use. When the registry exceeds max_entries or max_bytes
+    the least recently used entries are removed.
+    """
+
+    def __init__(
+        self,
+        root: str | Path = MODEL_REGISTRY_DIR,
+        max_entries: int = MODEL_REGISTRY_MAX_ENTRIES,
+        max_bytes: int = MODEL_REGISTRY_MAX_BYTES,
+    ) -> None:
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """
+        Load an entry's artifacts and mark it as recently used.
+
+        Args:
+            key: Registry key from training_key
+
+        Returns:
+            Artifacts dictionary, or None on a miss
+        """
+        entry = self.root / key
+        meta_path = entry / META_FILE
+        if not meta_path.exists():
+            return None
+        try:
+            artifacts = joblib.load(entry / ARTIFACT_FILE)
+        except Exception:
+            # Unreadable entry (e.g. written by an incompatible version); drop it
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        os.utime(meta_path)
+        return artifacts
+
+    def put(self, key: str, artifacts: Dict[str, Any], meta: Dict[str, Any] | None = None) -> Path:
+        """
+        Store artifacts under a key, then evict entries over budget.
+
+        Args:
+            key: Registry key from training_key
+            artifacts: Picklable dictionary of models and metrics
+            meta: Optional extra metadata written to meta.json
+
+        Returns:
+            Path to the entry directory
+        """
+        entry = self.root / key
+        tmp = self.root / f".{key}.{os.getpid()}.tmp"
+        tmp.mkdir(parents=True, exist_ok=True)
+        joblib.dump(artifacts, tmp / ARTIFACT_FILE)
+        with open(tmp / META_FILE, "w") as f:
+            json.dump({"key": key, "created": time.time(), **(meta or {})}, f, indent=2, default=str)
+        if entry.exists():
+            shutil.rmtree(entry)
+        os.replace(tmp, entry)
+        self.evict(keep=key)
+        return entry
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        List entries, most recently used first.
+
+        Returns:
+            List of dictionaries with key, last_used and size_bytes
+        """
+        if not self.root.exists():
+            return []
+        entries = []
+        for entry in self.root.iterdir():
+            meta_path = entry / META_FILE
+            if not meta_path.exists():
+                continue
+            entries.append({
+                "key": entry.name,
+                "last_used": meta_path.stat().st_mtime,
+                "size_bytes": sum(p.stat().st_size for p in entry.iterdir()),
+            })
+        return sorted(entries, key=lambda e: e["last_used"], reverse=True)
+
+    def evict(self, keep: str | None = None) -> List[str]:
+        """
+        Remove least recently used entries beyond the entry and size budgets.
+
+        Args:
+            keep: Optional key that is never evicted (e.g. the entry just written)
+
+        Returns:
+            Keys of the removed entries
+        """
+        removed = []
+        total = 0
+        for index, entry in enumerate(self.entries()):
+            total += entry["size_bytes"]
+            over_budget = index >= self.max_entries or total > self.max_bytes
+            if over_budget and entry["key"] != keep:
+                shutil.rmtree(self.root / entry["key"], ignore_errors=True)
+                total -= entry["size_bytes"]
+                removed.append(entry["key"])
+        return removed
+
+
+def train_and_evaluate_cached(
+    X: pd.DataFrame,
+    y: pd.Series,
+    fingerprint: str,
+    registry: ModelRegistry | None = None,
+    decision_tree_params: Dict[str, Any] | None = None,
+    random_forest_params: Dict[str, Any] | None = None,
+) -> dict:
+    """
+    Return train_and_evaluate results from the registry, training only on a miss.
+
+    The train/test split is stored as row labels and rebuilt from X on a hit,
+    so the returned dictionary has the same shape as train_and_evaluate's.
+
+    Args:
+        X: Feature matrix DataFrame (with a unique index)
+        y: Target labels Series
+        fingerprint: Feature-store fingerprint of the input rows
+        registry: Registry to use. If None, uses the default ModelRegistry
+        decision_tree_params: Optional keyword overrides for train_decision_tree
+        random_forest_params: Optional keyword overrides for train_random_forest
+
+    Returns:
+        train_and_evaluate dictionary plus 'registry_key' and 'from_registry'
+    """
+    registry = registry or ModelRegistry()
+    hyperparameters = resolve_hyperparameters(decision_tree_params, random_forest_params)
+    key = training_key(fingerprint, hyperparameters)
+
+    artifacts = registry.get(key)
+    if artifacts is not None:
+        train_labels, test_labels = artifacts.pop("train_index"), artifacts.pop("test_index")
+        artifacts["splits"] = {
+            "X_train": X.loc[train_labels],
+            "X_test": X.loc[test_labels],
+            "y_train": y.loc[train_labels],
+            "y_test": y.loc[test_labels],
+        }
+        return {**artifacts, "registry_key": key, "from_registry": True}
+
+    results = train_and_evaluate(X, y, decision_tree_params, random_forest_params)
+    splits = results["splits"]
+    stored = {name: value for name, value in results.items() if name != "splits"}
+    stored["train_index"] = np.asarray(splits["X_train"].index)
+    stored["test_index"] = np.asarray(splits["X_test"].index)
+    registry.put(key, stored, meta={
+        "fingerprint": fingerprint,
+        "hyperparameters": hyperparameters,
+        "sklearn": sklearn.__version__,
+        "accuracy": {
+            "decision_tree": results["decision_tree"].accuracy,
+            "random_forest": results["random_forest"].accuracy,
+        },
+    })
+    return {**results, "registry_key": key, "from_registry": False}
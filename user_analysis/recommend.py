@@ -0,0 +1,301 @@
+"""Batched top-k drink recommendations per card holder from the trained classifier."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from instrumentation import span, traced
+from transaction_store import assign_visits, calendar_dimension, hour_dimension
+
+from .copurchase import CoPurchaseIndex, merge_coffee_variants, next_coffee_scores
+from .data_loader import load_transactions
+from .feature_store import load_or_build_features
+from .models import train_and_evaluate_cached
+from .models.compact_forest import SERVING_MAX_ROWS, load_serving_forest
+
+DEFAULT_TOP_K = 3
+UNKNOWN = "Unknown"
+
+
+def _first_max(counts: pd.Series, key: str) -> pd.Series:
+    """
+    Pick, per card, the value with the highest count (smallest value on ties).
+
+    Args:
+        counts: Series indexed by (card, value) with occurrence counts
+        key: Name of the value level
+
+    Returns:
+        Series indexed by card
+    """
+    frame = counts.rename("count").reset_index()
+    frame = frame.sort_values(["card", "count", key], ascending=[True, False, True])
+    return frame.drop_duplicates("card").set_index("card")[key]
+
+
+def build_card_profiles(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Precompute the per-card inputs of the next-purchase features in one pass.
+
+    Matches the definitions in features.customer: favorite coffee is the first
+    mode, visit count counts visits, average spend covers all card transactions,
+    and last coffee is the most recent purchase. The typical hour is the card's most
+    frequent purchase hour and is used as the hour of the next visit.
+
+    Args:
+        df: Raw transactions with datetime, cash_type, card, money, coffee_name
+
+    Returns:
+        DataFrame indexed by card
+    """
+    cards = df[(df["cash_type"] == "card") & df["card"].notna()]
+    cards = cards.sort_values("datetime", kind="stable")
+    cards = cards.assign(visit_id=assign_visits(cards))
+    grouped = cards.groupby("card")
+    profiles = pd.DataFrame({
+        "customer_visit_count": grouped["visit_id"].nunique().astype(float),
+        "customer_avg_spend": grouped["money"].mean(),
+        "last_coffee": grouped["coffee_name"].last(),
+        "last_seen": grouped["datetime"].max(),
+    })
+    profiles["customer_favorite_coffee"] = _first_max(
+        cards.groupby(["card", "coffee_name"]).size(), "coffee_name"
+    )
+    hours = cards["datetime"].dt.hour.rename("hour")
+    profiles["typical_hour"] = _first_max(cards.groupby([cards["card"], hours]).size(), "hour")
+    return profiles
+
+
+def _encode(values: pd.Series, encoder: LabelEncoder) -> np.ndarray:
+    """
+    Label-encode values, mapping labels unseen in training to the 'Unknown' code.
+
+    Raises:
+        ValueError: If there are unseen labels and the encoder never saw 'Unknown'
+    """
+    classes = np.asarray(encoder.classes_).astype(str)
+    values = values.astype(str).to_numpy()
+    codes = np.searchsorted(classes, values)
+    codes = np.minimum(codes, len(classes) - 1)
+    unseen = classes[codes] != values
+    if unseen.any():
+        fallback = np.flatnonzero(classes == UNKNOWN)
+        if not len(fallback):
+            raise ValueError(
+                f"labels not seen when the encoder was fitted and no '{UNKNOWN}' class to map them to: "
+                f"{sorted(set(values[unseen]))}"
+            )
+        codes[unseen] = fallback[0]
+    return codes
+
+
+def next_day_features(
+    profiles: pd.DataFrame,
+    df: pd.DataFrame,
+    feature_names: List[str],
+    encoders: Dict[str, LabelEncoder],
+    date: pd.Timestamp,
+) -> pd.DataFrame:
+    """
+    Build one feature row per card for a visit on the given date.
+
+    Args:
+        profiles: Output of build_card_profiles
+        df: Raw transactions, used for the hour/month average price context
+        feature_names: Column order expected by the model
+        encoders: Fitted label encoders for the categorical features
+        date: Day of the predicted visit
+
+    Returns:
+        Feature matrix indexed by card
+    """
+    hour = profiles["typical_hour"].to_numpy()
+    day = calendar_dimension(date, date).iloc[0]
+    hours = hour_dimension()
+    is_weekend = int(day["is_weekend"])
+    price_by_hour = df.groupby(df["datetime"].dt.hour)["money"].mean()
+    price_by_month = df.groupby(df["datetime"].dt.month)["money"].mean()
+    overall_price = df["money"].mean()
+
+    features = {
+        "hour": hour,
+        "day_of_week_num": day["day_of_week_num"],
+        "month_num": day["month_num"],
+        "is_weekend": is_weekend,
+        "hour_sin": hours["hour_sin"].to_numpy()[hour],
+        "hour_cos": hours["hour_cos"].to_numpy()[hour],
+        "month_sin": day["month_sin"],
+        "month_cos": day["month_cos"],
+        "day_of_week_sin": day["day_of_week_sin"],
+        "day_of_week_cos": day["day_of_week_cos"],
+        "customer_visit_count": profiles["customer_visit_count"].to_numpy(),
+        "customer_avg_spend": profiles["customer_avg_spend"].to_numpy(),
+        "avg_price_by_hour": price_by_hour.reindex(hour).fillna(overall_price).to_numpy(),
+        "avg_price_by_month": price_by_month.get(date.month, overall_price),
+        "hour_weekend": hour * is_weekend,
+        "month_weekend": date.month * is_weekend,
+        "customer_favorite_coffee_encoded": _encode(
+            profiles["customer_favorite_coffee"], encoders["customer_favorite_coffee"]
+        ),
+        "last_coffee_encoded": _encode(profiles["last_coffee"], encoders["last_coffee"]),
+    }
+    X = pd.DataFrame(features, index=profiles.index)
+    return X[feature_names].astype(np.float64)
+
+
+def top_k(proba: np.ndarray, classes: np.ndarray, k: int = DEFAULT_TOP_K) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Select the k most likely classes per row.
+
+    Uses argpartition so only the k winners per row are sorted.
+
+    Args:
+        proba: Probability matrix of shape (n_rows, n_classes)
+        classes: Class labels in column order
+        k: Number of classes to return per row
+
+    Returns:
+        Tuple of (labels, probabilities), each of shape (n_rows, k), best first
+    """
+    k = min(k, proba.shape[1])
+    candidates = np.argpartition(-proba, k - 1, axis=1)[:, :k]
+    scores = np.take_along_axis(proba, candidates, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    best = np.take_along_axis(candidates, order, axis=1)
+    return np.asarray(classes)[best], np.take_along_axis(scores, order, axis=1)
+
+
+def recommend_next_day(
+    df: pd.DataFrame,
+    model,
+    feature_names: List[str],
+    encoders: Dict[str, LabelEncoder],
+    k: int = DEFAULT_TOP_K,
+    date: str | pd.Timestamp | None = None,
+    active_days: int | None = None,
+    copurchase: CoPurchaseIndex | None = None,
+) -> pd.DataFrame:
+    """
+    Rank the top-k drinks for every known card on the next day, in one batch.
+
+    Args:
+        df: Raw transactions as returned by load_transactions
+        model: Fitted classifier with predict_proba (RandomForestClassifier or CompactForest)
+        feature_names: Column order expected by the model
+        encoders: Fitted label encoders for the categorical features
+        k: Number of drinks per card
+        date: Day to recommend for. If None, the day after the last transaction
+        active_days: Only include cards seen within this many days. If None, includes all cards
+        copurchase: Optional CoPurchaseIndex of the same transactions, adding each
+            drink's transition probability after the card's last drink
+
+    Returns:
+        DataFrame with card, rank, coffee_name and probability (k rows per card),
+        plus next_coffee_probability if copurchase is given
+    """
+    date = pd.Timestamp(date) if date is not None else df["datetime"].max().normalize() + pd.Timedelta(days=1)
+    profiles = build_card_profiles(df)
+    if active_days is not None:
+        profiles = profiles[profiles["last_seen"] >= date - pd.Timedelta(days=active_days)]
+    if profiles.empty:
+        columns = ["card", "rank", "coffee_name", "probability"]
+        return pd.DataFrame(columns=columns + (["next_coffee_probability"] if copurchase is not None else []))
+
+    X = next_day_features(profiles, df, feature_names, encoders, date)
+    classes = getattr(model, "classes_", None)
+    if classes is None:
+        classes = model.classes
+    labels, scores = top_k(model.predict_proba(X), classes, k)
+
+    k = labels.shape[1]
+    recommendations = pd.DataFrame({
+        "card": np.repeat(profiles.index.to_numpy(), k),
+        "rank": np.tile(np.arange(1, k + 1), len(profiles)),
+        "coffee_name": labels.ravel(),
+        "probability": scores.ravel(),
+    })
+    if copurchase is not None:
+        transitions = next_coffee_scores(copurchase, profiles.index)
+        rows = np.repeat(np.arange(len(profiles)), k)
+        columns = copurchase.coffees.get_indexer(merge_coffee_variants(recommendations["coffee_name"]))
+        known = columns >= 0
+        probability = np.zeros(len(recommendations))
+        probability[known] = np.asarray(transitions[rows[known], columns[known]]).ravel()
+        recommendations["next_coffee_probability"] = probability
+    return recommendations
+
+
+@traced("recommend_main", "user_analysis")
+def recommend_main(
+    data_path: str | Path | None = None,
+    k: int = DEFAULT_TOP_K,
+    active_days: int | None = None,
+    output_path: str | Path | None = None,
+    stores: List[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> pd.DataFrame:
+    """
+    Generate next-day top-k recommendations with the registry's random forest.
+
+    The forest is served as a CompactForest from load_serving_forest, which
+    loads in a few milliseconds instead of unpickling the sklearn model. With
+    more than SERVING_MAX_ROWS cards the sklearn forest is used instead, as
+    its compiled traversal then outweighs the slower load.
+
+    Each recommendation also carries the co-purchase transition probability
+    of the drink after the card's last one.
+
+    Args:
+        data_path: Optional path to CSV file or partitioned dataset root
+        k: Number of drinks per card
+        active_days: Only include cards seen within this many days
+        output_path: Optional csv path to write the recommendations to
+        stores: Optional store ids to include
+        start: Optional inclusive start of the transaction window
+        end: Optional exclusive end of the transaction window
+
+    Returns:
+        Recommendations DataFrame from recommend_next_day
+    """
+    with span("load_transactions", "user_analysis") as stage:
+        df = load_transactions(data_path, stores=stores, start=start, end=end)
+        stage.rows_out = len(df)
+    with span("load_model", "user_analysis", rows_in=len(df)):
+        feature_set = load_or_build_features(df)
+        if df["card"].nunique() > SERVING_MAX_ROWS:
+            model = train_and_evaluate_cached(feature_set.X, feature_set.y, feature_set.fingerprint)["rf_model"]
+        else:
+            model = load_serving_forest(feature_set)
+    with span("build_copurchase", "user_analysis", rows_in=len(df)) as stage:
+        copurchase = CoPurchaseIndex.from_transactions(df)
+        stage.rows_out = copurchase.card_coffee.nnz
+    with span("recommend_next_day", "user_analysis", rows_in=len(df)) as stage:
+        recommendations = recommend_next_day(
+            df, model, feature_set.feature_names, feature_set.encoders, k=k, active_days=active_days,
+            copurchase=copurchase,
+        )
+        stage.rows_out = len(recommendations)
+    print(f"Top-{k} recommendations for {recommendations['card'].nunique():,} cards")
+    print(recommendations.head(3 * k).to_string(index=False))
+    if output_path is not None:
+        recommendations.to_csv(output_path, index=False)
+        print(f"Written to {output_path}")
+    return recommendations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Next-day top-k drink recommendations per card.")
+    parser.add_argument("--data-path", default=None)
+    parser.add_argument("--k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--active-days", type=int, default=None)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--start", default=None, help="Only use transactions at or after this time")
+    parser.add_argument("--end", default=None, help="Only use transactions before this time")
+    args = parser.parse_args()
+    recommend_main(args.data_path, args.k, args.active_days, args.output, start=args.start, end=args.end)
@@ -1,13 +1,15 @@
 """Visualization helpers for the user model pipeline."""
 from __future__ import annotations
 
+from typing import List
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 from .config import FIG_SIZE, PLOT_STYLE
 from .data_loader import load_transactions
-from .features import engineer_features
-from .models import train_and_evaluate
+from .feature_store import load_or_build_features
+from .models import train_and_evaluate_cached
 
 sns.set_style(PLOT_STYLE)
 
@@ -38,22 +40,24 @@ def plot_feature_importance(feature_importance):
     plt.show()
 
 
-def show_feature_importance(data_path: str | None = None):
+def show_feature_importance(data_path: str | None = None, stores: List[str] | None = None):
     """
     Convenience wrapper for reproducing the notebook's feature-importance visualization.
     
-    Loads data, performs feature engineering, trains the random forest, and
-    displays the bar chart so external callers can obtain the plot with a single call.
+    Loads data, reads (or builds) the engineered features from the feature
+    store, takes the fitted random forest from the model registry (training it
+    on a miss), and displays the bar chart so external callers can obtain the plot with a single call.
     
     Args:
-        data_path: Optional path to CSV file. If None, uses default path
+        data_path: Optional path to CSV file or partitioned dataset root. If None, uses default path
+        stores: Optional store ids to include. If None, uses the union of all stores
         
     Returns:
         None. Displays the feature importance bar chart
     """
-    df = load_transactions(data_path)
-    _, X, y, _, _ = engineer_features(df)
-    results = train_and_evaluate(X, y)
+    df = load_transactions(data_path, stores=stores)
+    feature_set = load_or_build_features(df)
+    results = train_and_evaluate_cached(feature_set.X, feature_set.y, feature_set.fingerprint)
     feature_importance = results["feature_importance"]
     plot_feature_importance(feature_importance)
 